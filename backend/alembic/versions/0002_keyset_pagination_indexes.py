@@ -0,0 +1,28 @@
+"""composite indexes for keyset pagination on (created_at, id)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"], unique=False)
+    op.create_index("ix_items_created_at_id", "items", ["created_at", "id"], unique=False)
+    op.create_index(
+        "ix_items_owner_id_created_at_id", "items", ["owner_id", "created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_owner_id_created_at_id", table_name="items")
+    op.drop_index("ix_items_created_at_id", table_name="items")
+    op.drop_index("ix_users_created_at_id", table_name="users")
@@ -0,0 +1,64 @@
+"""generation history with deduplicated, compressed artifacts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "generation_artifacts",
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("kind", sa.String(length=8), nullable=False),
+        sa.Column("encoding", sa.String(length=16), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("compressed_size", sa.Integer(), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint("digest"),
+    )
+
+    op.create_table(
+        "generations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("client", sa.String(), nullable=True),
+        sa.Column("business_type", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("request", sa.JSON(), nullable=True),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("cache_status", sa.String(length=16), nullable=True),
+        sa.Column("partial", sa.Boolean(), nullable=True),
+        sa.Column("llm_calls", sa.Integer(), nullable=True),
+        sa.Column("input_tokens", sa.Integer(), nullable=True),
+        sa.Column("output_tokens", sa.Integer(), nullable=True),
+        sa.Column("latency_ms", sa.Float(), nullable=True),
+        sa.Column("html_digest", sa.String(length=64), nullable=True),
+        sa.Column("css_digest", sa.String(length=64), nullable=True),
+        sa.Column("js_digest", sa.String(length=64), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(["html_digest"], ["generation_artifacts.digest"]),
+        sa.ForeignKeyConstraint(["css_digest"], ["generation_artifacts.digest"]),
+        sa.ForeignKeyConstraint(["js_digest"], ["generation_artifacts.digest"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_generations_id", "generations", ["id"], unique=False)
+    op.create_index("ix_generations_client", "generations", ["client"], unique=False)
+    op.create_index("ix_generations_created_at_id", "generations", ["created_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_generations_created_at_id", table_name="generations")
+    op.drop_index("ix_generations_client", table_name="generations")
+    op.drop_index("ix_generations_id", table_name="generations")
+    op.drop_table("generations")
+    op.drop_table("generation_artifacts")
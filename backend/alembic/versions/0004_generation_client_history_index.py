@@ -0,0 +1,27 @@
+"""composite index for a client's generation history on (client, created_at, id)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:40:00
+
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_generations_client_created_at_id", "generations", ["client", "created_at", "id"], unique=False
+    )
+    # Covered by the composite index's leading column
+    op.drop_index("ix_generations_client", table_name="generations")
+
+
+def downgrade() -> None:
+    op.create_index("ix_generations_client", "generations", ["client"], unique=False)
+    op.drop_index("ix_generations_client_created_at_id", table_name="generations")
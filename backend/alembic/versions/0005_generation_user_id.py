@@ -0,0 +1,42 @@
+"""key generation history by user id rather than the client key
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 18:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Batch mode: SQLite can only add a foreign key by rebuilding the table
+    with op.batch_alter_table("generations") as batch_op:
+        batch_op.add_column(sa.Column("user_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_generations_user_id_users", "users", ["user_id"], ["id"])
+    # Client keys of signed-in users are "user:<email>"; emails can change, ids do not
+    op.execute(
+        "UPDATE generations SET user_id = "
+        "(SELECT users.id FROM users WHERE 'user:' || users.email = generations.client) "
+        "WHERE client LIKE 'user:%'"
+    )
+    op.create_index(
+        "ix_generations_user_id_created_at_id", "generations", ["user_id", "created_at", "id"], unique=False
+    )
+    op.drop_index("ix_generations_client_created_at_id", table_name="generations")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_generations_client_created_at_id", "generations", ["client", "created_at", "id"], unique=False
+    )
+    op.drop_index("ix_generations_user_id_created_at_id", table_name="generations")
+    with op.batch_alter_table("generations") as batch_op:
+        batch_op.drop_constraint("fk_generations_user_id_users", type_="foreignkey")
+        batch_op.drop_column("user_id")
@@ -0,0 +1,5 @@
+# Load .env once, before anything reads the environment at import time. Variables
+# already set in the environment take precedence over the file.
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -0,0 +1,61 @@
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.principal_cache import principal_cache
+from ..core.security import decode_request_token
+from ..db.session import get_async_db
+from ..schemas.user import User
+from ..services import user as user_service
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
+# For routes open to anonymous callers that do more for signed-in ones
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token", auto_error=False)
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    # Busy clients resend the same token; skip the JWT decode and user lookup
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    # Read first: an update to the user while we look them up voids what we read
+    generation = principal_cache.generation()
+    payload = decode_request_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise credentials_exception
+
+    db_user = await user_service.get_user_by_email_async(db, payload["sub"])
+    if db_user is None or not db_user.is_active:
+        raise credentials_exception
+
+    principal = User.model_validate(db_user)
+    principal_cache.set(token, db_user.id, principal, payload["exp"], generation)
+    return principal
+
+
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[User]:
+    """The signed-in user, or None for anonymous callers and invalid tokens."""
+    if not token:
+        return None
+    try:
+        return await get_current_user(token, db)
+    except HTTPException:
+        return None
+
+
+async def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough privileges")
+    return current_user
@@ -1,23 +1,24 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...deps import get_current_superuser
 from ....core.config import settings
-from ....core.security import create_access_token, verify_password
-from ....db.session import get_db
+from ....core.principal_cache import principal_cache
+from ....core.security import create_access_token, verify_password_async
+from ....db.session import get_async_db
 from ....services import user as user_service
 from ....schemas.user import Token
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 @router.post("/token", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = user_service.get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await user_service.get_user_by_email_async(db, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -30,3 +31,7 @@ async def login(
         expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/principal-cache/stats", dependencies=[Depends(get_current_superuser)])
+async def principal_cache_stats():
+    return principal_cache.stats()
@@ -0,0 +1,80 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...deps import get_current_superuser, get_current_user
+from ....core.serialization import page_response
+from ....db.session import get_async_db
+from ....schemas.generation import Generation, GenerationSummary
+from ....schemas.pagination import Page
+from ....schemas.user import User
+from ....services import generation_history
+from ....services.artifacts import MEDIA_TYPES, etag_matches, parse_accept_encoding
+from ....services.generation_history import ARTIFACT_KINDS, GenerationRecorder, get_generation_recorder
+
+router = APIRouter()
+
+# Generations are scoped to the signed-in user, by id so a changed email
+# keeps its history; anonymous requests are not recorded, since an address
+# is shared by everyone behind the same NAT or proxy
+
+@router.get("/", response_model=Page[GenerationSummary])
+async def read_generations(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The caller's generations, newest first, without the template bodies."""
+    try:
+        generations, next_cursor = await generation_history.get_generations_page(
+            db, current_user.id, cursor=cursor, limit=limit
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return page_response(GenerationSummary, generations, next_cursor)
+
+@router.get("/stats", dependencies=[Depends(get_current_superuser)])
+async def generation_stats(recorder: Optional[GenerationRecorder] = Depends(get_generation_recorder)):
+    if recorder is None:
+        return {"enabled": False}
+    return {"enabled": True, **recorder.stats()}
+
+@router.get("/{generation_id}", response_model=Generation)
+async def read_generation(
+    generation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    generation = await generation_history.get_generation(db, generation_id, current_user.id)
+    if generation is None:
+        raise HTTPException(status_code=404, detail="Generation not found")
+    return generation
+
+@router.get("/{generation_id}/artifacts/{kind}")
+async def read_generation_artifact(
+    generation_id: int,
+    kind: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    if kind not in ARTIFACT_KINDS:
+        raise HTTPException(status_code=404, detail="Unknown artifact kind")
+    generation = await generation_history.get_generation(db, generation_id, current_user.id)
+    digest = getattr(generation, f"{kind}_digest", None) if generation is not None else None
+    artifact = await generation_history.get_artifact(db, digest) if digest else None
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    etag = f'"{artifact.digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # Send the stored bytes as they are when the client can decode them
+    if artifact.encoding in parse_accept_encoding(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = artifact.encoding
+        body = artifact.body
+    else:
+        body = generation_history.decompress(artifact.encoding, artifact.body)
+    return Response(content=body, media_type=MEDIA_TYPES[kind], headers=headers)
@@ -0,0 +1,97 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ....core.config import settings
+from ....core.serialization import FastJSONResponse, dumps, page_response, serialize_rows, serializer_for
+from ....db.base import get_async_session_factory
+from ....db.session import get_async_db
+from ...deps import get_current_user
+from ....services import item as item_service
+from ....schemas.item import Item, ItemCreate, ItemWithOwner
+from ....schemas.pagination import Page
+from ....schemas.user import User
+
+router = APIRouter()
+
+def scope_owner(current_user: User, owner_id: Optional[int]) -> Optional[int]:
+    """The owner filter a read may use: anything for superusers, else the caller's own items."""
+    if current_user.is_superuser:
+        return owner_id
+    if owner_id is not None and owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    return current_user.id
+
+@router.post("/", response_model=Item)
+async def create_item(
+    item: ItemCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await item_service.create_item_async(db, item, owner_id=current_user.id)
+
+@router.post("/bulk", response_model=List[Item])
+async def create_items_bulk(
+    items: List[ItemCreate],
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if len(items) > settings.BULK_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_SIZE} items per request")
+    rows = await item_service.create_items_bulk_async(db, items, owner_id=current_user.id)
+    # Rows just written from validated input; returned as-is rather than revalidated
+    return FastJSONResponse(serialize_rows(Item, rows))
+
+@router.get("/", response_model=Page[Item])
+async def read_items(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    owner_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """A page of the caller's items; superusers see everyone's, optionally one owner's."""
+    try:
+        items, next_cursor = await item_service.get_items_page_async(
+            db, cursor=cursor, limit=limit, owner_id=scope_owner(current_user, owner_id)
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return page_response(Item, items, next_cursor)
+
+@router.get("/export")
+async def export_items(
+    owner_id: Optional[int] = None,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream items (optionally one owner's) with their owner as NDJSON.
+
+    Lines include the owner's email, so only superusers may export other
+    users' items; everyone else gets their own.
+    """
+    owner_id = scope_owner(current_user, owner_id)
+    serializer = serializer_for(ItemWithOwner)
+
+    async def lines():
+        # The request-scoped session is closed before a streaming body runs,
+        # so the export owns its session for the lifetime of the stream
+        async with get_async_session_factory()() as db:
+            async for batch in item_service.iter_item_batches_async(
+                db, owner_id=owner_id, batch_size=batch_size
+            ):
+                yield b"".join(dumps(serializer.dump(item)) + b"\n" for item in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/{item_id}", response_model=Item)
+async def read_item(
+    item_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_item = await item_service.get_item_async(db, item_id)
+    # Someone else's item is reported as missing rather than forbidden
+    if db_item is None or (db_item.owner_id != current_user.id and not current_user.is_superuser):
+        raise HTTPException(status_code=404, detail="Item not found")
+    return db_item
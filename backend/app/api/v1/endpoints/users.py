@@ -1,42 +1,87 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ....db.session import get_db
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ....core.config import settings
+from ....core.serialization import FastJSONResponse, page_response, serialize_rows
+from ....db.session import get_async_db
+from ...deps import get_current_superuser, get_current_user
 from ....services import user as user_service
+from ....schemas.pagination import Page
 from ....schemas.user import User, UserCreate, UserUpdate
 
 router = APIRouter()
 
+def ensure_self_or_superuser(current_user: User, user_id: int):
+    if current_user.id != user_id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+
 @router.post("/", response_model=User)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = user_service.get_user_by_email(db, user.email)
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await user_service.get_user_by_email_async(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return user_service.create_user(db, user)
+    return await user_service.create_user_async(db, user)
+
+@router.post("/bulk", response_model=List[User])
+async def create_users_bulk(
+    users: List[UserCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    if len(users) > settings.BULK_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_SIZE} users per request")
+    emails = [user.email for user in users]
+    if len(set(emails)) != len(emails):
+        raise HTTPException(status_code=400, detail="Duplicate emails in request")
+    existing = await user_service.get_existing_emails_async(db, emails)
+    if existing:
+        raise HTTPException(status_code=400, detail=f"Email already registered: {', '.join(existing)}")
+    # Rows just written from validated input; returned as-is rather than revalidated
+    return FastJSONResponse(serialize_rows(User, await user_service.create_users_bulk_async(db, users)))
 
-@router.get("/", response_model=List[User])
-def read_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+@router.get("/", response_model=Page[User])
+async def read_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_superuser)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    try:
+        users, next_cursor = await user_service.get_users_page_async(db, cursor=cursor, limit=limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return page_response(User, users, next_cursor)
+
+@router.get("/me", response_model=User)
+async def read_current_user(current_user: User = Depends(get_current_user)):
+    return current_user
 
 @router.get("/{user_id}", response_model=User)
-def read_user(user_id: int, db: Session = Depends(get_db)):
-    db_user = user_service.get_user(db, user_id)
+async def read_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    ensure_self_or_superuser(current_user, user_id)
+    db_user = await user_service.get_user_async(db, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 @router.put("/{user_id}", response_model=User)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
 ):
-    db_user = user_service.get_user(db, user_id)
+    ensure_self_or_superuser(current_user, user_id)
+    if "is_active" in user_update.model_fields_set and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only a superuser can change is_active")
+    db_user = await user_service.get_user_async(db, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user_service.update_user(db, db_user, user_update)
\ No newline at end of file
+    if user_update.email is not None and user_update.email != db_user.email:
+        if await user_service.get_user_by_email_async(db, user_update.email):
+            raise HTTPException(status_code=400, detail="Email already registered")
+    return await user_service.update_user_async(db, db_user, user_update)
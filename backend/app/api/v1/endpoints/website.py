@@ -1,79 +1,561 @@
-from fastapi import APIRouter, HTTPException
-from app.schemas.website import WebsiteRequest, WebsiteResponse
-from app.services.template_service import TemplateGeneratorService
+from typing import List, Optional, Tuple
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+from app.schemas.website import (
+    BatchItemResult,
+    BatchRequest,
+    JobStatus,
+    LayoutImageResponse,
+    WebsiteRequest,
+    WebsiteResponse,
+)
+from app.services.template_service import (
+    LLM_MODEL,
+    LLM_TEMPERATURE,
+    TemplateGeneratorService,
+    get_template_service,
+    scheduler_stats,
+)
+from app.services.template_parser import REQUIRED_SECTIONS, IncrementalFenceParser, parse_template
+from app.services.prompts import GenerationPlan, plan_generation, plan_repair, token_usage
+from app.services.template_cache import TemplateCache, cache_key, get_template_cache
+from app.services.single_flight import SingleFlight, get_single_flight
+from app.services.job_queue import JobQueue, QueueFullError, get_job_queue
+from app.services.sectioned_generation import generate_sectioned
+from app.services.minify import minify_template
+from app.services.call_policy import CallPolicy, get_call_policy
+from app.services.layout_images import (
+    LAYOUT_IMAGE_MAX_BYTES,
+    LayoutImage,
+    LayoutImageStore,
+    get_layout_image_store,
+)
+from app.services.similarity_index import SimilarityLookup, get_similarity_lookup
+from app.services.batch_generation import (
+    BATCH_MAX_ITEMS,
+    BATCH_MAX_VARIANTS,
+    BatchItem,
+    generate_text,
+    run_batch,
+    template_result,
+)
+from app.services.generation_history import (
+    GenerationRecorder,
+    GenerationTimer,
+    get_generation_recorder,
+)
+from app.api.deps import get_current_superuser, get_optional_user
+from app.schemas.user import User
+from app.core.rate_limit import charge_rate_limit, current_client
+from app.services.artifacts import (
+    ArtifactPublisher,
+    choose_encoding,
+    etag_matches,
+    get_artifact_publisher,
+)
+import json
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Handlers and format are configured once by app.core.observability.configure_logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/generate-template", response_model=WebsiteResponse)
-async def generate_template(request: WebsiteRequest):
-    try:
-        logger.info(f"Received template generation request for business type: {request.business_type}")
-        
-        # Initialize template service
-        template_service = TemplateGeneratorService()
-        
-        # Create the prompt for the template generation
-        prompt = f"""
-        Create a modern, responsive website for a {request.business_type} with the following description:
-        {request.description}
-        
-        Style preferences: {request.style_preferences}
-        Features requested: {', '.join(request.features)}
-        
-        Please include:
-        - A clean, modern design
-        - Responsive layout using modern CSS (flexbox/grid)
-        - Semantic HTML5 elements
-        - Interactive elements
-        - Proper spacing and typography
-        
-        Return the complete HTML and CSS code in the following format:
-        
-        HTML:
-        ```html
-        [Your HTML code here]
-        ```
-        
-        CSS:
-        ```css
-        [Your CSS code here]
-        ```
-        """
-        
+def lookup_cached(
+    request: WebsiteRequest,
+    template_cache: Optional[TemplateCache],
+    similarity: Optional[SimilarityLookup] = None
+) -> Tuple[str, Optional[dict], str]:
+    """The request's cache key, a cached template if any, and the X-Cache status.
+
+    An exact miss falls back to the template of a near-duplicate request
+    when the similarity index is in "serve" mode.
+    """
+    key = cache_key(request, LLM_MODEL, LLM_TEMPERATURE)
+    if template_cache is None:
+        return key, None, "MISS"
+    if request.bypass_cache:
+        template_cache.record_bypass()
+        return key, None, "MISS"
+    cached = template_cache.get(key)
+    if cached is not None:
+        return key, cached, "HIT"
+    if similarity is not None:
+        near = similarity.nearest_cached(request, LLM_MODEL, template_cache)
+        if near is not None:
+            template, match = near
+            logger.info("Serving the template of a similar request (similarity %.3f)", match.score)
+            return key, template, "SIMILAR"
+    return key, None, "MISS"
+
+def few_shot_plan(
+    request: WebsiteRequest,
+    plan: GenerationPlan,
+    template_cache: Optional[TemplateCache],
+    similarity: Optional[SimilarityLookup]
+) -> GenerationPlan:
+    """Re-plan with the nearest cached templates as examples, when few-shot mode finds any."""
+    if similarity is None or request.layout_image:
+        return plan
+    examples = similarity.examples(request, template_cache)
+    return plan_generation(request, examples) if examples else plan
+
+async def resolve_layout_image(
+    request: WebsiteRequest,
+    layout_images: Optional[LayoutImageStore]
+) -> Optional[LayoutImage]:
+    """Prepare the request's layout image and point ``layout_image`` at its id.
+
+    Cache keys then depend on the prepared image rather than on whether it
+    was uploaded or sent inline. Raises ValueError for unusable images.
+    """
+    if not request.layout_image:
+        return None
+    if layout_images is None:
+        raise ValueError("Layout images are not available")
+    image = await layout_images.resolve(request.layout_image)
+    request.layout_image = image.digest
+    return image
+
+async def generate_website(
+    request: WebsiteRequest,
+    template_service: TemplateGeneratorService,
+    template_cache: Optional[TemplateCache],
+    single_flight: SingleFlight,
+    layout_image: Optional[LayoutImage] = None,
+    similarity: Optional[SimilarityLookup] = None
+) -> Tuple[dict, str]:
+    """Return the parsed html/css for a request and its cache status (HIT, SIMILAR or MISS)."""
+    # Render the prompt and size max_tokens; rejects oversized input with ValueError
+    plan = plan_generation(request)
+    
+    key, cached, status = lookup_cached(request, template_cache, similarity)
+    if cached is not None:
+        return cached, status
+    
+    async def generate_single() -> dict:
+        plan_used = few_shot_plan(request, plan, template_cache, similarity)
         # Generate the template using Claude
         logger.info("Calling Claude API for template generation")
-        generated_content = await template_service.generate_template(prompt)
+        generated_content = await template_service.generate_template(
+            plan_used.prompt,
+            max_tokens=plan_used.max_tokens,
+            estimated_input_tokens=plan_used.input_tokens + (layout_image.tokens if layout_image else 0),
+            layout_image=layout_image
+        )
         
-        # Parse the response to extract HTML and CSS
-        try:
-            # Split the content into HTML and CSS sections
-            html_section = generated_content.split("```html")[1].split("```")[0].strip()
-            css_section = generated_content.split("```css")[1].split("```")[0].strip()
-            
-            return {
-                "html": html_section,
-                "css": css_section,
-                "preview": "preview_url"
-            }
-        except Exception as parsing_error:
-            logger.error(f"Error parsing Claude response: {parsing_error}")
-            logger.debug(f"Raw content: {generated_content}")
+        # Parse the response to extract HTML, CSS and any JS in one pass
+        parsed = parse_template(generated_content)
+        repair = parsed.missing() + [name for name in parsed.truncated if name not in parsed.missing()]
+        if repair and len(parsed.missing()) < len(REQUIRED_SECTIONS):
+            # Regenerate only what is missing or cut off instead of the whole site
+            logger.warning("Incomplete template, repairing sections: %s", repair)
+            repair_plan = plan_repair(request, parsed.sections, repair)
+            repaired = parse_template(await template_service.generate_template(
+                repair_plan.prompt,
+                max_tokens=repair_plan.max_tokens,
+                estimated_input_tokens=repair_plan.input_tokens
+            ))
+            for name in repair:
+                if repaired.sections.get(name) and name not in repaired.truncated:
+                    parsed.sections[name] = repaired.sections[name]
+                    if name in parsed.truncated:
+                        parsed.truncated.remove(name)
+        
+        if not parsed.html:
+            logger.error("Error parsing Claude response: no HTML found")
+            logger.debug("Raw content: %s", generated_content)
             raise HTTPException(
                 status_code=500,
                 detail="Failed to parse the generated template. Please try again."
             )
+        
+        return {"html": parsed.html, "css": parsed.css, "js": parsed.js, "partial": not parsed.complete}
+
+    async def produce() -> dict:
+        result = None
+        if request.parallel_sections:
+            result = await generate_sectioned(request, template_service, layout_image)
+            if result is None:
+                logger.warning("Sectioned generation failed, falling back to a single call")
+        if result is None:
+            result = await generate_single()
+
+        result = minify_template(result)
+        # Partial results are returned but never cached
+        if template_cache is not None and not result["partial"]:
+            template_cache.set(key, result)
+            if similarity is not None:
+                similarity.record(key, request, LLM_MODEL)
+        return result
+    
+    # Identical concurrent requests share a single upstream call
+    return await single_flight.do(key, produce), "MISS"
+
+def record_generation(
+    recorder: Optional[GenerationRecorder],
+    request: WebsiteRequest,
+    result: dict,
+    cache_status: str,
+    timer: GenerationTimer,
+    user: Optional[User]
+):
+    """Queue the generation for the signed-in caller's history; written in the background."""
+    if recorder is not None and user is not None:
+        recorder.record(
+            request, result, cache_status, timer.elapsed, timer.usage, LLM_MODEL, current_client.get(), user.id
+        )
+
+async def publish_preview(result: dict, artifact_publisher: Optional[ArtifactPublisher]) -> str:
+    """Store the template as content-addressed artifacts and return its preview URL."""
+    if artifact_publisher is None:
+        return ""
+    return await artifact_publisher.publish(result)
+
+@router.post("/generate-template", response_model=WebsiteResponse)
+async def generate_template(
+    request: WebsiteRequest,
+    response: Response,
+    template_service: TemplateGeneratorService = Depends(get_template_service),
+    template_cache: Optional[TemplateCache] = Depends(get_template_cache),
+    single_flight: SingleFlight = Depends(get_single_flight),
+    artifact_publisher: Optional[ArtifactPublisher] = Depends(get_artifact_publisher),
+    layout_images: Optional[LayoutImageStore] = Depends(get_layout_image_store),
+    similarity: Optional[SimilarityLookup] = Depends(get_similarity_lookup),
+    recorder: Optional[GenerationRecorder] = Depends(get_generation_recorder),
+    user: Optional[User] = Depends(get_optional_user)
+):
+    try:
+        logger.info("Received template generation request for business type: %s", request.business_type)
+        
+        layout_image = await resolve_layout_image(request, layout_images)
+        with GenerationTimer() as timer:
+            result, cache_status = await generate_website(
+                request, template_service, template_cache, single_flight, layout_image, similarity
+            )
+        record_generation(recorder, request, result, cache_status, timer, user)
+        response.headers["X-Cache"] = cache_status
+        return {**result, "preview": await publish_preview(result, artifact_publisher)}
             
     except ValueError as ve:
-        logger.error(f"Validation error: {str(ve)}")
+        logger.error("Validation error: %s", ve)
         raise HTTPException(status_code=400, detail=str(ve))
+    except HTTPException:
+        # Already mapped, e.g. a 503 with Retry-After when the upstream is unavailable
+        raise
     except Exception as e:
-        logger.error(f"Template generation failed: {str(e)}")
+        logger.error("Template generation failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Template generation failed: {str(e)}"
         )
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/generate-template/stream")
+async def generate_template_stream(
+    request: WebsiteRequest,
+    template_service: TemplateGeneratorService = Depends(get_template_service),
+    template_cache: Optional[TemplateCache] = Depends(get_template_cache),
+    artifact_publisher: Optional[ArtifactPublisher] = Depends(get_artifact_publisher),
+    layout_images: Optional[LayoutImageStore] = Depends(get_layout_image_store),
+    similarity: Optional[SimilarityLookup] = Depends(get_similarity_lookup),
+    recorder: Optional[GenerationRecorder] = Depends(get_generation_recorder),
+    user: Optional[User] = Depends(get_optional_user)
+):
+    logger.info("Received streaming template request for business type: %s", request.business_type)
+    try:
+        layout_image = await resolve_layout_image(request, layout_images)
+        plan = plan_generation(request)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    key, cached, cache_status = lookup_cached(request, template_cache, similarity)
+    if cached is None:
+        plan = few_shot_plan(request, plan, template_cache, similarity)
+
+    async def events():
+        # Flush headers right away so the client sees the first byte before Claude does
+        yield sse_event("start", {"business_type": request.business_type, "cached": cached is not None})
+        if cached is not None:
+            yield sse_event("html_chunk", cached["html"])
+            yield sse_event("css_chunk", cached["css"])
+            if cached.get("js"):
+                yield sse_event("js_chunk", cached["js"])
+            record_generation(recorder, request, cached, cache_status, GenerationTimer(), user)
+            yield sse_event("done", {"partial": False, "preview": await publish_preview(cached, artifact_publisher)})
+            return
+
+        parser = IncrementalFenceParser()
+        completion = []
+        try:
+            with GenerationTimer() as timer:
+                async for text in template_service.stream_template(
+                    plan.prompt,
+                    max_tokens=plan.max_tokens,
+                    estimated_input_tokens=plan.input_tokens + (layout_image.tokens if layout_image else 0),
+                    layout_image=layout_image
+                ):
+                    completion.append(text)
+                    for event, chunk in parser.feed(text):
+                        yield sse_event(event, chunk)
+            for event, chunk in parser.close():
+                yield sse_event(event, chunk)
+            # The client already has the raw chunks; only a complete template
+            # (no truncated or missing section) is minified, stored and published
+            parsed = parse_template("".join(completion))
+            done = {"partial": not parsed.complete}
+            if parsed.complete:
+                result = minify_template({"html": parsed.html, "css": parsed.css, "js": parsed.js, "partial": False})
+                if template_cache is not None:
+                    template_cache.set(key, result)
+                    if similarity is not None:
+                        similarity.record(key, request, LLM_MODEL)
+                record_generation(recorder, request, result, "MISS", timer, user)
+                done["preview"] = await publish_preview(result, artifact_publisher)
+            yield sse_event("done", done)
+        except Exception as e:
+            # Headers are already sent, so report failures in-band
+            logger.error("Streaming template generation failed: %s", e)
+            yield sse_event("error", {"detail": f"Template generation failed: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/generate-batch")
+async def generate_batch(
+    batch: BatchRequest,
+    template_service: TemplateGeneratorService = Depends(get_template_service),
+    template_cache: Optional[TemplateCache] = Depends(get_template_cache),
+    artifact_publisher: Optional[ArtifactPublisher] = Depends(get_artifact_publisher),
+    layout_images: Optional[LayoutImageStore] = Depends(get_layout_image_store),
+    similarity: Optional[SimilarityLookup] = Depends(get_similarity_lookup),
+    recorder: Optional[GenerationRecorder] = Depends(get_generation_recorder),
+    user: Optional[User] = Depends(get_optional_user)
+):
+    """Generate several requests, or several design variants of each, concurrently.
+
+    Results are streamed as NDJSON lines (BatchItemResult) in completion
+    order. Calls share the instruction prefix, and a request's variants its
+    text too, through upstream prompt caching.
+    """
+    if batch.variants > BATCH_MAX_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_VARIANTS} variants per request")
+    if len(batch.requests) * batch.variants > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} generations per batch")
+    logger.info("Received batch of %d requests x %d variants", len(batch.requests), batch.variants)
+
+    # Validate everything up front so a bad entry fails the batch before any upstream call
+    items: List[BatchItem] = []
+    for request_index, request in enumerate(batch.requests):
+        try:
+            layout_image = await resolve_layout_image(request, layout_images)
+            for variant in range(batch.variants):
+                plan = plan_generation(request, variant=(variant + 1, batch.variants))
+                items.append(BatchItem(len(items), request_index, variant, request, plan, layout_image))
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=f"requests[{request_index}]: {ve}")
+    # Each generation costs what a single generate-template call does
+    await charge_rate_limit(len(items))
+
+    async def run_item(item: BatchItem, warmed: Optional[asyncio.Event]) -> dict:
+        result = None
+        with GenerationTimer() as timer:
+            if item.variant == 0:
+                key, result, cache_status = lookup_cached(item.request, template_cache, similarity)
+            if result is None:
+                result = template_result(await generate_text(template_service, item, warmed))
+                cache_status = "MISS"
+                if item.variant == 0 and template_cache is not None and not result["partial"]:
+                    template_cache.set(key, result)
+                    if similarity is not None:
+                        similarity.record(key, item.request, LLM_MODEL)
+        record_generation(recorder, item.request, result, cache_status, timer, user)
+        return {"cache": cache_status, "result": {**result, "preview": await publish_preview(result, artifact_publisher)}}
+
+    async def lines():
+        async for item, outcome, error in run_batch(items, run_item):
+            line = BatchItemResult(
+                index=item.index,
+                request_index=item.request_index,
+                variant=item.variant,
+                status="failed" if error is not None else "succeeded",
+                error=(error.detail if isinstance(error, HTTPException) else str(error)) if error is not None else None,
+                **(outcome or {})
+            )
+            yield line.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@router.post("/layout-images", response_model=LayoutImageResponse)
+async def upload_layout_image(
+    request: Request,
+    layout_images: Optional[LayoutImageStore] = Depends(get_layout_image_store)
+):
+    """Upload a layout image as multipart/form-data (field ``file``).
+
+    The form is parsed here rather than declared as a ``File`` parameter so
+    an oversized upload is refused from its Content-Length before any of it
+    is read. Returns the id to send as ``layout_image``.
+    """
+    if layout_images is None:
+        raise HTTPException(status_code=503, detail="Layout images are not available")
+    content_length = request.headers.get("content-length")
+    # Allow for the multipart boundaries and headers around the file
+    if content_length and content_length.isdigit() and int(content_length) > LAYOUT_IMAGE_MAX_BYTES + 64 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload is larger than {LAYOUT_IMAGE_MAX_BYTES} bytes")
+
+    async with request.form(max_files=1, max_fields=1) as form:
+        upload = form.get("file")
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(status_code=400, detail="Expected a multipart upload with a 'file' field")
+        try:
+            image, deduplicated = await layout_images.ingest_upload(upload)
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+
+    return {
+        "id": image.digest,
+        "media_type": image.media_type,
+        "width": image.width,
+        "height": image.height,
+        "size_bytes": len(image.body),
+        "deduplicated": deduplicated,
+    }
+
+# Operational stats expose client keys (user emails, IPs) and capacity; superusers only
+
+@router.get("/layout-images/stats", dependencies=[Depends(get_current_superuser)])
+async def layout_image_stats(layout_images: Optional[LayoutImageStore] = Depends(get_layout_image_store)):
+    if layout_images is None:
+        return {"backend": None}
+    return layout_images.stats()
+
+@router.get("/cache/stats", dependencies=[Depends(get_current_superuser)])
+async def cache_stats(template_cache: Optional[TemplateCache] = Depends(get_template_cache)):
+    if template_cache is None:
+        return {"backend": None}
+    return template_cache.stats()
+
+@router.get("/token-usage/stats", dependencies=[Depends(get_current_superuser)])
+async def token_usage_stats():
+    return token_usage.stats()
+
+@router.get("/llm/stats", dependencies=[Depends(get_current_superuser)])
+async def llm_stats(call_policy: Optional[CallPolicy] = Depends(get_call_policy)):
+    if call_policy is None:
+        return {"models": []}
+    return call_policy.stats()
+
+@router.get("/scheduler/stats", dependencies=[Depends(get_current_superuser)])
+async def llm_scheduler_stats():
+    return scheduler_stats()
+
+@router.get("/similarity/stats", dependencies=[Depends(get_current_superuser)])
+async def similarity_stats(similarity: Optional[SimilarityLookup] = Depends(get_similarity_lookup)):
+    if similarity is None:
+        return {"entries": None}
+    return similarity.stats()
+
+@router.get("/coalescing/stats", dependencies=[Depends(get_current_superuser)])
+async def coalescing_stats(single_flight: SingleFlight = Depends(get_single_flight)):
+    return single_flight.stats()
+
+@router.get("/preview/{digest}")
+async def get_preview(
+    digest: str,
+    request: Request,
+    artifact_publisher: Optional[ArtifactPublisher] = Depends(get_artifact_publisher)
+):
+    artifact = await artifact_publisher.get(digest) if artifact_publisher is not None else None
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Preview not found")
+
+    # Content-addressed, so a URL's body never changes. The body is model
+    # output served from the API origin: sandbox it into an opaque origin
+    # (its own scripts run, but cannot reach the API's cookies or storage),
+    # and stop browsers sniffing it into another type
+    headers = {
+        "ETag": artifact.etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept-Encoding",
+        "Content-Security-Policy": "sandbox allow-scripts",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if etag_matches(request.headers.get("if-none-match"), artifact.etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"), artifact)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    body = artifact.variants[encoding] if encoding else artifact.body
+    return Response(content=body, media_type=artifact.media_type, headers=headers)
+
+@router.get("/artifacts/stats", dependencies=[Depends(get_current_superuser)])
+async def artifact_stats(artifact_publisher: Optional[ArtifactPublisher] = Depends(get_artifact_publisher)):
+    if artifact_publisher is None:
+        return {"backend": None}
+    return artifact_publisher.stats()
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_generation_job(
+    request: WebsiteRequest,
+    template_service: TemplateGeneratorService = Depends(get_template_service),
+    template_cache: Optional[TemplateCache] = Depends(get_template_cache),
+    single_flight: SingleFlight = Depends(get_single_flight),
+    artifact_publisher: Optional[ArtifactPublisher] = Depends(get_artifact_publisher),
+    layout_images: Optional[LayoutImageStore] = Depends(get_layout_image_store),
+    similarity: Optional[SimilarityLookup] = Depends(get_similarity_lookup),
+    recorder: Optional[GenerationRecorder] = Depends(get_generation_recorder),
+    job_queue: JobQueue = Depends(get_job_queue),
+    user: Optional[User] = Depends(get_optional_user)
+):
+    logger.info("Queueing template generation job for business type: %s", request.business_type)
+    try:
+        # Fail fast on oversized input or a bad image instead of queueing a job that cannot succeed
+        layout_image = await resolve_layout_image(request, layout_images)
+        plan_generation(request)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    # Jobs run on the queue's workers, outside this request's context; carry
+    # the caller over so the LLM scheduler still attributes the work to them
+    client = current_client.get()
+
+    async def run() -> dict:
+        token = current_client.set(client)
+        try:
+            with GenerationTimer() as timer:
+                result, cache_status = await generate_website(
+                    request, template_service, template_cache, single_flight, layout_image, similarity
+                )
+            record_generation(recorder, request, result, cache_status, timer, user)
+            return {**result, "preview": await publish_preview(result, artifact_publisher)}
+        finally:
+            current_client.reset(token)
+
+    try:
+        job = job_queue.submit(run, client)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": "10"}
+        )
+    return job.to_dict()
+
+@router.get("/jobs/stats", dependencies=[Depends(get_current_superuser)])
+async def job_stats(job_queue: JobQueue = Depends(get_job_queue)):
+    return job_queue.stats()
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_generation_job(job_id: str, job_queue: JobQueue = Depends(get_job_queue)):
+    job = job_queue.get(job_id, current_client.get())
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import website
+from .endpoints import auth, generations, items, users, website
 
 api_router = APIRouter()
 
@@ -7,4 +7,28 @@ api_router.include_router(
     website.router,
     prefix="/website",
     tags=["website"]
-)
\ No newline at end of file
+)
+
+api_router.include_router(
+    auth.router,
+    prefix="/auth",
+    tags=["auth"]
+)
+
+api_router.include_router(
+    users.router,
+    prefix="/users",
+    tags=["users"]
+)
+
+api_router.include_router(
+    items.router,
+    prefix="/items",
+    tags=["items"]
+)
+
+api_router.include_router(
+    generations.router,
+    prefix="/generations",
+    tags=["generations"]
+)
@@ -0,0 +1,40 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+# Streams whose chunks must reach the client as soon as they are written
+UNBUFFERED_MEDIA_TYPES = ("text/event-stream",)
+
+
+class StreamingAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            await super().send_with_gzip(message)
+            # gzip holds data back until its buffer fills, which would stall
+            # SSE and other live streams (those that also opt out of proxy
+            # buffering); pass these through as if already encoded
+            if content_type.startswith(UNBUFFERED_MEDIA_TYPES) or headers.get("x-accel-buffering") == "no":
+                self.content_encoding_set = True
+            return
+        await super().send_with_gzip(message)
+
+
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves server-sent event and other live streams uncompressed.
+
+    Responses that already carry a Content-Encoding (the precompressed
+    previews) are passed through untouched by the base class.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "gzip" in headers.get("Accept-Encoding", ""):
+                responder = StreamingAwareGZipResponder(
+                    self.app, self.minimum_size, compresslevel=self.compresslevel
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
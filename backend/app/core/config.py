@@ -7,24 +7,216 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Modern Backend"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    ENVIRONMENT: str = "development"
+    
+    # Observability
+    # "json" for log shippers, "text" for local development
+    LOG_FORMAT: str = "json"
+    LOG_LEVEL: str = "INFO"
+    # Prometheus /metrics endpoint and per-route request metrics
+    METRICS_ENABLED: bool = True
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    BCRYPT_ROUNDS: int = 12
+    # Threads dedicated to bcrypt so hashing never runs on the event loop
+    PASSWORD_HASH_WORKERS: int = 4
+    # Resolved principals are cached per token until exp, capped by this TTL
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 300
+    
+    # Rate limiting: token buckets keyed by JWT subject, else client IP
+    RATE_LIMIT_ENABLED: bool = True
+    # Generation endpoints (generate-template, its stream, job submission)
+    RATE_LIMIT_GENERATE_PER_MINUTE: float = 10
+    RATE_LIMIT_GENERATE_BURST: int = 5
+    # generate-batch, charged one unit per generation; a burst below
+    # BATCH_MAX_ITEMS would turn the largest batches away for good
+    RATE_LIMIT_BATCH_PER_MINUTE: float = 100
+    RATE_LIMIT_BATCH_BURST: int = 50
+    # Every other API route
+    RATE_LIMIT_API_PER_MINUTE: float = 600
+    RATE_LIMIT_API_BURST: int = 100
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Only enable behind a proxy that sets X-Forwarded-For; clients can forge it otherwise
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
     
     # Database
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with its async driver (aiosqlite / asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    # Largest batch accepted by the bulk create endpoints
+    BULK_MAX_SIZE: int = 1000
     
     # CORS - Allow both development and production URLs
     BACKEND_CORS_ORIGINS: list[str] = [
         "http://localhost:3000",
         "http://127.0.0.1:3000",
-        "https://alchemix-ai.vercel.app"
+        "https://alchemix-ai.vercel.app",
+        "https://frontend-ks5on2clo-alchemix-ai.vercel.app"
     ]
+    # Extra origin for a deployment's own frontend
+    FRONTEND_URL: Optional[str] = None
+    
+    # Responses below this size are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1000
+    GZIP_COMPRESS_LEVEL: int = 6
+    
+    # Optional at import; the LLM client reports a missing key when it is first needed
+    OPENAI_API_KEY: Optional[str] = None
+    ANTHROPIC_API_KEY: Optional[str] = None
+    
+    # Generation model; part of the template cache key
+    LLM_MODEL: str = "claude-3-sonnet-20240229"
+    # Upper bound on concurrent upstream generations per worker process
+    LLM_MAX_CONCURRENCY: int = 8
+    # Mark shared prompt prefixes for Anthropic prompt caching on batch calls.
+    # The upstream only caches prefixes of at least 1024 tokens (2048 on Haiku)
+    # and only on models that support it; disable for models that reject the beta.
+    LLM_PROMPT_CACHING: bool = True
+    
+    # LLM call policy
+    # Tried in order after LLM_MODEL when it keeps failing, e.g. '["claude-3-haiku-20240307"]'
+    LLM_FALLBACK_MODELS: list[str] = []
+    # Deadline for one upstream attempt (for streams: until the first token)
+    LLM_ATTEMPT_TIMEOUT: float = 60.0
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    # Send a second attempt when the first is slower than the observed p95
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+    # A model's circuit opens when this share of its last LLM_BREAKER_WINDOW
+    # attempts failed (once at least half the window is filled)
+    LLM_BREAKER_FAILURE_RATIO: float = 0.5
+    LLM_BREAKER_WINDOW: int = 50
+    LLM_BREAKER_RESET_TIMEOUT: float = 30.0
+    # Completed calls kept per model for latency percentiles
+    LLM_LATENCY_WINDOW: int = 500
+    # Fair sharing of LLM_MAX_CONCURRENCY: slots per client, and round-robin
+    # weights for authenticated users vs anonymous (per-IP) clients
+    LLM_CLIENT_MAX_CONCURRENCY: int = 4
+    LLM_SCHEDULER_USER_WEIGHT: int = 2
+    LLM_SCHEDULER_IP_WEIGHT: int = 1
+    
+    # Connection pool shared by every upstream LLM call in a worker process
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 60.0
+    # Transport-level backstop; per-attempt deadlines come from the call policy
+    LLM_TIMEOUT: float = 120.0
+    
+    # Prompt budgets (app.services.prompts)
+    # Output budget: a base allowance plus a share per requested feature,
+    # clamped to what the model may return in one completion
+    OUTPUT_TOKENS_BASE: int = 1800
+    OUTPUT_TOKENS_PER_FEATURE: int = 350
+    OUTPUT_TOKENS_MIN: int = 1500
+    OUTPUT_TOKENS_MAX: int = 4000
+    # Repairs only regenerate the missing sections, so they get a smaller budget
+    REPAIR_OUTPUT_TOKENS: int = 2000
+    SHELL_OUTPUT_TOKENS: int = 1500
+    SECTION_OUTPUT_TOKENS: int = 1200
+    # Input limits enforced before anything is sent upstream
+    MAX_DESCRIPTION_TOKENS: int = 1500
+    MAX_FEATURES: int = 20
+    # "reject" oversized descriptions with a 400, or "trim" them to the budget
+    PROMPT_OVERSIZE_POLICY: str = "reject"
+    
+    # Sectioned generation: section calls in flight per request (the global
+    # LLM scheduler still applies) and sections accepted per page
+    SECTION_CONCURRENCY: int = 4
+    MAX_SECTIONS: int = 8
+    
+    # Batch generation: requests x variants accepted in one batch, and calls
+    # in flight per batch (the global LLM scheduler still applies)
+    BATCH_MAX_ITEMS: int = 50
+    BATCH_MAX_VARIANTS: int = 5
+    BATCH_CONCURRENCY: int = 4
+    
+    # Background generation jobs
+    JOB_MAX_CONCURRENCY: int = 4
+    JOB_QUEUE_DEPTH: int = 100
+    # How long finished jobs stay pollable before they are dropped
+    JOB_RESULT_TTL: float = 3600.0
+    # How long shutdown waits for queued and running jobs; keep it below the
+    # server's graceful timeout (GRACEFUL_TIMEOUT, 30s) so the rest of shutdown runs
+    JOB_DRAIN_TIMEOUT: float = 20.0
+    
+    # Template cache: "memory", "sqlite" or "none"
+    TEMPLATE_CACHE_BACKEND: str = "memory"
+    TEMPLATE_CACHE_TTL: float = 86400.0
+    TEMPLATE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    TEMPLATE_CACHE_PATH: str = "template_cache.sqlite3"
+    # Strip insignificant whitespace from generated templates
+    TEMPLATE_MINIFY: bool = True
+    
+    # Preview artifacts: "memory" keeps them per worker; "disk" shares them
+    # between workers on a host
+    ARTIFACT_STORE_BACKEND: str = "memory"
+    ARTIFACT_STORE_MAX_BYTES: int = 128 * 1024 * 1024
+    ARTIFACT_STORE_PATH: str = "artifacts"
+    # Artifacts below this size are not worth precompressing
+    ARTIFACT_COMPRESS_MIN_BYTES: int = 512
+    ARTIFACT_BROTLI_QUALITY: int = 11
+    PREVIEW_URL_PREFIX: str = "/api/v1/website/preview"
+    
+    # Layout images
+    # Uploads above this are rejected while streaming, before anything is decoded
+    LAYOUT_IMAGE_MAX_BYTES: int = 20 * 1024 * 1024
+    # Decompression-bomb guard, checked from the header before decoding
+    LAYOUT_IMAGE_MAX_PIXELS: int = 50_000_000
+    # Longest edge sent to the model; larger images are downscaled by the API
+    # anyway, so sending more only costs bandwidth and input tokens
+    LAYOUT_IMAGE_MAX_EDGE: int = 1568
+    LAYOUT_IMAGE_JPEG_QUALITY: int = 85
+    # Perceptual hashes at most this many bits apart count as the same image
+    LAYOUT_IMAGE_DEDUP_DISTANCE: int = 0
+    # Raw-upload and perceptual hashes remembered for deduplication
+    LAYOUT_IMAGE_INDEX_SIZE: int = 1024
+    
+    # Generation history
+    GENERATION_HISTORY_ENABLED: bool = True
+    # Buffered generations are written when this many are waiting or this many
+    # seconds have passed, whichever comes first
+    GENERATION_FLUSH_BATCH: int = 200
+    GENERATION_FLUSH_INTERVAL: float = 1.0
+    # Beyond this many unwritten generations new ones are dropped rather than
+    # letting a slow database grow memory without bound
+    GENERATION_BUFFER_MAX: int = 10000
+    GENERATION_ZSTD_LEVEL: int = 6
+    # Digests this worker has already stored, so repeats skip compression and the insert
+    GENERATION_KNOWN_DIGESTS: int = 100000
     
-    OPENAI_API_KEY: str
-    ANTHROPIC_API_KEY: str
+    # Similarity index over cached requests (app.services.similarity_index).
+    # Comma-separated: "few_shot" adds the nearest cached templates to the
+    # prompt, "serve" answers near-duplicate requests from the cache; "off" disables.
+    # Off unless opted in: both hand one customer's generated copy (names,
+    # contact details) to another customer's request
+    SIMILARITY_MODE: str = "off"
+    # Cosine similarity at or above which a cached template is served as is.
+    # No default: "serve" needs a value calibrated on real traffic, since a
+    # false match hands one business another's site
+    SIMILARITY_SERVE_THRESHOLD: Optional[float] = None
+    # Few-shot examples: how many, how similar at least, and their prompt budget
+    SIMILARITY_FEW_SHOT_K: int = 1
+    SIMILARITY_FEW_SHOT_THRESHOLD: float = 0.5
+    SIMILARITY_FEW_SHOT_TOKENS: int = 1200
+    # Hashed feature dimensions (a power of two) and entries kept before the oldest are overwritten
+    SIMILARITY_DIM: int = 256
+    SIMILARITY_MAX_ENTRIES: int = 50000
+    # Empty keeps the index in memory only. Entries point at template cache
+    # keys, so persisting is only useful with the sqlite template cache. Each
+    # worker keeps its own index; with several, the file holds the last one saved
+    SIMILARITY_INDEX_PATH: str = ""
+    SIMILARITY_SAVE_EVERY: int = 100
     
     class Config:
         env_file = ".env"
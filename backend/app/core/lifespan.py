@@ -0,0 +1,64 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+import logging
+from prometheus_client import REGISTRY
+from .config import settings
+from .metrics import register_app_collector
+from ..db.base import dispose_engines
+from ..services.llm_client import load_api_key
+from ..services.template_cache import create_template_cache
+from ..services.single_flight import SingleFlight
+from ..services.job_queue import JobQueue
+from ..services.prompts import compile_prompts
+from ..services.artifacts import create_artifact_publisher, create_artifact_store
+from ..services.layout_images import LayoutImageStore
+from ..services.similarity_index import create_similarity_lookup
+from ..services.generation_history import create_generation_recorder
+from ..services.template_service import create_call_policy
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    compile_prompts()
+    # One LLM client per worker, built by get_llm_client on the first
+    # generation; only the key is checked here so misconfiguration shows at boot
+    app.state.llm_client = None
+    app.state.llm_client_error = None
+    try:
+        load_api_key()
+    except ValueError as e:
+        logger.error("Failed to initialize Anthropic client: %s", e)
+        app.state.llm_client_error = str(e)
+    app.state.call_policy = create_call_policy()
+    app.state.template_cache = create_template_cache()
+    app.state.similarity_lookup = create_similarity_lookup()
+    app.state.artifact_publisher = create_artifact_publisher()
+    # Prepared layout images get a store of their own (shared across workers
+    # on disk), so uploads are not served as public previews
+    app.state.layout_images = LayoutImageStore(create_artifact_store("layout-images"))
+    app.state.single_flight = SingleFlight()
+    app.state.job_queue = JobQueue()
+    await app.state.job_queue.start()
+    app.state.generation_recorder = create_generation_recorder()
+    if app.state.generation_recorder is not None:
+        await app.state.generation_recorder.start()
+    collector = register_app_collector(app) if settings.METRICS_ENABLED else None
+
+    yield
+
+    if collector is not None:
+        REGISTRY.unregister(collector)
+    # Waits up to JOB_DRAIN_TIMEOUT for queued and running jobs, failing the rest
+    await app.state.job_queue.stop()
+    # After the queue, so generations from drained jobs are written too
+    if app.state.generation_recorder is not None:
+        await app.state.generation_recorder.stop()
+
+    if app.state.llm_client is not None:
+        await app.state.llm_client.close()
+    if app.state.similarity_lookup is not None:
+        app.state.similarity_lookup.save()
+    if app.state.template_cache is not None:
+        app.state.template_cache.close()
+    await dispose_engines()
@@ -0,0 +1,215 @@
+from typing import Iterable
+import time
+from fastapi import FastAPI, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; upstream generations take far longer than ordinary API calls
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 45, 60, 90, 120)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte", ["method", "route"]
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+LLM_ATTEMPT_LATENCY = Histogram(
+    "llm_attempt_duration_seconds",
+    "Duration of one upstream LLM attempt (for streams: until the first token)",
+    ["model", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_ERRORS = Counter("llm_errors_total", "Failed upstream LLM attempts by error type", ["model", "error"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the LLM API", ["model", "direction"])
+
+DB_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled connection", ["engine"], buckets=DB_BUCKETS
+)
+DB_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out of the pool", ["engine"])
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Statement execution time by SQL verb", ["engine", "verb"], buckets=DB_BUCKETS
+)
+DB_ERRORS = Counter("db_errors_total", "Statements that raised a DBAPI error", ["engine"])
+
+
+def _verb(statement: str) -> str:
+    # First keyword only, so the label set stays small whatever the SQL
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def _time_checkouts(pool, name: str):
+    # Pools have no "before checkout" event, so the wait is timed around connect()
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_CHECKOUT_WAIT.labels(name).observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+def instrument_engine(engine: Engine, name: str):
+    """Record pool checkout waits, checked-out connections and statement timings.
+
+    For an AsyncEngine pass ``async_engine.sync_engine``; the events fire on
+    the sync core underneath it.
+    """
+    checked_out = DB_CHECKED_OUT.labels(name)
+    query_latency = {}
+
+    _time_checkouts(engine.pool, name)
+
+    @event.listens_for(engine, "engine_disposed")
+    def on_dispose(conn):
+        # dispose() swaps in a fresh pool
+        _time_checkouts(engine.pool, name)
+
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out.inc()
+
+    @event.listens_for(engine.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        verb = _verb(statement)
+        histogram = query_latency.get(verb)
+        if histogram is None:
+            histogram = query_latency[verb] = DB_QUERY_LATENCY.labels(name, verb)
+        histogram.observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        DB_ERRORS.labels(name).inc()
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class AppStatsCollector(Collector):
+    """Expose the in-process ``stats()`` of caches, queues and the LLM policy at scrape time.
+
+    These components already keep their own counters, so reading them on
+    scrape costs nothing on the request path. Scrapes run on the event loop,
+    so every ``stats()`` read here must only read counters, never do I/O
+    (sizes of the disk stores are running totals for that reason).
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+
+    def collect(self) -> Iterable:
+        from app.core.principal_cache import principal_cache
+        from app.services.prompts import token_usage
+        from app.services.template_service import scheduler_stats
+
+        state = self.app.state
+        lookups = CounterMetricFamily("cache_lookups", "Cache lookups by cache and result", labels=["cache", "result"])
+        hit_ratio = GaugeMetricFamily("cache_hit_ratio", "Hits over hits plus misses since start", labels=["cache"])
+        caches = [("principal", principal_cache.stats())]
+        template_cache = getattr(state, "template_cache", None)
+        if template_cache is not None:
+            stats = template_cache.stats()
+            caches.append(("template", stats))
+            lookups.add_metric(["template", "bypass"], stats["bypasses"])
+            yield GaugeMetricFamily("template_cache_bytes", "Size of the template cache", value=stats["size_bytes"])
+            yield CounterMetricFamily("template_cache_evictions", "Template cache evictions", value=stats["evictions"])
+        for name, stats in caches:
+            lookups.add_metric([name, "hit"], stats["hits"])
+            lookups.add_metric([name, "miss"], stats["misses"])
+            hit_ratio.add_metric([name], stats["hit_rate"])
+        yield lookups
+        yield hit_ratio
+
+        single_flight = getattr(state, "single_flight", None)
+        if single_flight is not None:
+            stats = single_flight.stats()
+            yield CounterMetricFamily("generation_upstream_calls", "Generations that reached the LLM", value=stats["upstream_calls"])
+            yield CounterMetricFamily("generation_coalesced", "Generations served by an identical in-flight call", value=stats["coalesced"])
+
+        artifact_publisher = getattr(state, "artifact_publisher", None)
+        if artifact_publisher is not None:
+            stats = artifact_publisher.stats()
+            yield CounterMetricFamily("artifacts_published", "Preview artifacts stored", value=stats["published"])
+            yield CounterMetricFamily("artifacts_deduplicated", "Preview artifacts already stored", value=stats["deduplicated"])
+            yield GaugeMetricFamily("artifact_store_bytes", "Size of the artifact store", value=stats["size_bytes"])
+
+        similarity = getattr(state, "similarity_lookup", None)
+        if similarity is not None:
+            stats = similarity.stats()
+            yield GaugeMetricFamily("similarity_index_entries", "Past generations in the similarity index", value=stats["entries"])
+            yield CounterMetricFamily("similarity_served", "Generations answered with a similar request's template", value=stats["served"])
+            yield CounterMetricFamily("similarity_examples", "Few-shot examples added to prompts", value=stats["examples_used"])
+
+        layout_images = getattr(state, "layout_images", None)
+        if layout_images is not None:
+            stats = layout_images.stats()
+            yield CounterMetricFamily("layout_images_ingested", "Layout images decoded and stored", value=stats["ingested"])
+            yield CounterMetricFamily("layout_images_deduplicated", "Layout images matched to one already stored", value=stats["deduplicated"])
+
+        recorder = getattr(state, "generation_recorder", None)
+        if recorder is not None:
+            stats = recorder.stats()
+            yield CounterMetricFamily("generation_history_written", "Generations written to the history", value=stats["written"])
+            yield CounterMetricFamily("generation_history_dropped", "Generations dropped from the history (buffer full or write failed)", value=stats["dropped"] + stats["failed"])
+            yield GaugeMetricFamily("generation_history_pending", "Generations waiting for the next history flush", value=stats["pending"])
+            yield CounterMetricFamily("generation_artifacts_deduplicated", "Artifact bodies already stored and not written again", value=stats["artifacts_deduplicated"])
+
+        job_queue = getattr(state, "job_queue", None)
+        if job_queue is not None:
+            stats = job_queue.stats()
+            jobs = GaugeMetricFamily("generation_jobs", "Retained generation jobs by status", labels=["status"])
+            for status in ("queued", "running", "succeeded", "failed"):
+                jobs.add_metric([status], stats[status])
+            yield jobs
+            yield GaugeMetricFamily("generation_job_queue_depth", "Jobs waiting for a worker", value=stats["queue_depth"])
+
+        stats = scheduler_stats()
+        yield GaugeMetricFamily("llm_slots_in_flight", "LLM generation slots in use", value=stats["in_flight"])
+        yield GaugeMetricFamily("llm_slots_waiting", "Generations queued for an LLM slot", value=stats["waiting"])
+        yield GaugeMetricFamily("llm_slot_clients", "Clients holding or waiting for LLM slots", value=stats["active_clients"])
+
+        call_policy = getattr(state, "call_policy", None)
+        if call_policy is not None:
+            stats = call_policy.stats()
+            circuit = GaugeMetricFamily("llm_circuit_open", "1 while a model's circuit breaker is open", labels=["model"])
+            retries = CounterMetricFamily("llm_retries", "Retried LLM attempts", labels=["model"])
+            hedges = CounterMetricFamily("llm_hedges", "Hedged LLM attempts", labels=["model"])
+            for model, model_stats in stats["per_model"].items():
+                circuit.add_metric([model], 1 if model_stats["circuit"] == "open" else 0)
+                retries.add_metric([model], model_stats["retries"])
+                hedges.add_metric([model], model_stats["hedges"])
+            yield circuit
+            yield retries
+            yield hedges
+            yield CounterMetricFamily("llm_fallbacks", "Calls moved to a fallback model", value=stats["fallbacks"])
+
+        usage = token_usage.stats()
+        yield CounterMetricFamily("llm_truncated_completions", "Completions that hit max_tokens", value=usage["truncated"])
+        yield CounterMetricFamily("llm_planned_output_tokens", "max_tokens requested across calls", value=usage["planned_output_tokens"])
+
+
+def register_app_collector(app: FastAPI) -> AppStatsCollector:
+    collector = AppStatsCollector(app)
+    REGISTRY.register(collector)
+    return collector
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
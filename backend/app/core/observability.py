@@ -0,0 +1,119 @@
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import json
+import logging
+import sys
+import time
+import uuid
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .config import settings
+from .metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+
+# Id of the request being served, attached to every log record emitted while serving it
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Accepted from a proxy's X-Request-ID as long as it looks like an id
+MAX_REQUEST_ID_LENGTH = 128
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; the message is only rendered for records that are emitted."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = settings.LOG_LEVEL, fmt: str = settings.LOG_FORMAT):
+    """Send application and uvicorn logs through one stdout handler.
+
+    ``fmt`` is "json" (the default, for log shippers) or "text" for local
+    development. Safe to call more than once.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(RequestIdFilter())
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+    # uvicorn installs its own handlers; route its error and access logs through ours
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+
+def route_of(scope: Scope) -> str:
+    # The matched route's template ("/api/v1/website/preview/{digest}"), so
+    # path parameters do not explode the label set
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class ObservabilityMiddleware:
+    """Assign a request id and record latency, status and in-flight count per route.
+
+    Pure ASGI so streamed responses are timed to their last byte without
+    being buffered. Added last, so it wraps every other middleware and
+    rate-limited or compressed responses are measured too.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Bound metric children per (method, route[, status]); labels() costs a lock and a lookup
+        self._latency = {}
+        self._requests = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get("x-request-id", "")
+        rid = incoming if 0 < len(incoming) <= MAX_REQUEST_ID_LENGTH and incoming.isprintable() else uuid.uuid4().hex
+        token = request_id.set(rid)
+        status = 500
+
+        async def send_with_id(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", rid.encode())]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            key = (scope["method"], route_of(scope))
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = HTTP_LATENCY.labels(*key)
+            latency.observe(elapsed)
+            counter = self._requests.get((key, status))
+            if counter is None:
+                counter = self._requests[(key, status)] = HTTP_REQUESTS.labels(*key, str(status))
+            counter.inc()
+            request_id.reset(token)
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+import json
+from sqlalchemy import tuple_
+
+# Keyset pagination walks (created_at, id) in ascending order, or descending
+# for newest-first listings; the cursor is the position of the last row on the
+# previous page, opaque to clients.
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+async def keyset_page(
+    db, query, model, cursor: Optional[str], limit: int, descending: bool = False
+) -> Tuple[list, Optional[str]]:
+    """Run ``query`` for one page after ``cursor``; returns the rows and the next cursor."""
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+    query = query.limit(limit + 1)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        position = tuple_(model.created_at, model.id)
+        query = query.where(position < (created_at, row_id) if descending else position > (created_at, row_id))
+    rows = list((await db.scalars(query)).all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
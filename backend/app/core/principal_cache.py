@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from typing import Dict, Generic, Optional, Set, TypeVar
+import hashlib
+import time
+from .config import settings
+
+P = TypeVar("P")
+
+
+class PrincipalCache(Generic[P]):
+    """Bounded cache of authenticated principals keyed by a hash of the bearer token.
+
+    Entries expire at the token's ``exp`` or after ``ttl`` seconds, whichever
+    comes first, and every entry for a user can be dropped at once when that
+    user changes.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, user_id, principal)
+        self._by_user: Dict[int, Set[str]] = {}
+        # Invalidation generations: a lookup that started before its user was
+        # invalidated must not cache what it read. Bounded like the entries;
+        # users that fall out count as invalidated at the newest forgotten one
+        self._generation = 0
+        self._invalidated: "OrderedDict[int, int]" = OrderedDict()  # user_id -> generation
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[P]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def peek(self, token: str) -> Optional[P]:
+        """The cached principal without counting a lookup or refreshing its recency."""
+        entry = self._entries.get(self._key(token))
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[2]
+
+    def generation(self) -> int:
+        """Read before looking a principal up; pass it to ``set`` afterwards."""
+        return self._generation
+
+    def set(
+        self, token: str, user_id: int, principal: P, token_exp: float, generation: Optional[int] = None
+    ) -> None:
+        """Cache ``principal``, unless its user was invalidated after ``generation``."""
+        if generation is not None and self._invalidated.get(user_id, self._forgotten) > generation:
+            return
+        key = self._key(token)
+        if key in self._entries:
+            self._remove(key)
+        expires_at = min(token_exp, time.time() + self.ttl)
+        self._entries[key] = (expires_at, user_id, principal)
+        self._by_user.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._generation += 1
+        self._invalidated[user_id] = self._generation
+        self._invalidated.move_to_end(user_id)
+        while len(self._invalidated) > self.max_entries:
+            _, forgotten = self._invalidated.popitem(last=False)
+            self._forgotten = max(self._forgotten, forgotten)
+        for key in self._by_user.pop(user_id, set()):
+            self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+        self._invalidated.clear()
+        self._forgotten = self._generation
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: str):
+        _, user_id, _ = self._entries.pop(key)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+
+principal_cache: PrincipalCache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL
+)
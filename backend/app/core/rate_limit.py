@@ -0,0 +1,231 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+import json
+import math
+import time
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .config import settings
+from .principal_cache import principal_cache
+from .security import decode_request_token, decoded_tokens
+
+# Rate-limit key of the client behind the current request ("user:<sub>" or
+# "ip:<address>"); the LLM scheduler reads it to share capacity fairly
+current_client: ContextVar[str] = ContextVar("current_client", default="anonymous")
+
+
+def client_key(scope: Scope) -> str:
+    """Identify the caller by JWT subject when a valid bearer token is sent, else by IP.
+
+    A token whose principal is cached is not decoded at all; otherwise the
+    decoded payload is kept for the rest of the request (decode_request_token).
+    """
+    headers = Headers(scope=scope)
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        principal = principal_cache.peek(token)
+        if principal is not None:
+            # The subject is the email; cached principals are dropped when it changes
+            return f"user:{principal.email}"
+        payload = decode_request_token(token)
+        if payload is not None and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets; swap in a shared store to limit across workers."""
+
+    @abstractmethod
+    async def hit(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float, float]:
+        """Take ``cost`` tokens from ``key``'s bucket.
+
+        Returns (allowed, tokens remaining, seconds until ``cost`` tokens are available).
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets, bounded to ``max_keys`` by dropping the least recently seen.
+
+    A dropped bucket comes back full, which is what an idle client's bucket
+    would have refilled to anyway.
+    """
+
+    def __init__(self, max_keys: int = settings.RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def hit(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated_at) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return allowed, tokens, retry_after
+
+
+class RateLimitRule:
+    def __init__(self, name: str, per_minute: float, burst: int, prefixes: List[str], methods: Optional[List[str]] = None):
+        self.name = name
+        self.rate = per_minute / 60
+        self.per_minute = per_minute
+        self.burst = burst
+        self.prefixes = tuple(prefixes)
+        self.methods = set(methods) if methods else None
+
+    def matches(self, method: str, path: str) -> bool:
+        return path.startswith(self.prefixes) and (self.methods is None or method in self.methods)
+
+
+class RateLimitCharge:
+    """The bucket a request was charged from, for endpoints whose cost depends on the body."""
+
+    def __init__(self, backend: RateLimitBackend, rule: RateLimitRule, key: str):
+        self.backend = backend
+        self.rule = rule
+        self.key = key
+
+    async def charge(self, cost: float):
+        """Take the rest of ``cost`` units; the one taken on entry counts toward it.
+
+        Raises 413 for a cost the bucket can never hold, else 429 with Retry-After.
+        """
+        if cost <= 1:
+            return
+        if cost > self.rule.burst:
+            # The bucket never holds that many tokens, so retrying would not help
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request costs {cost:g} {self.rule.name} units; at most {self.rule.burst} are allowed at once",
+            )
+        allowed, _, retry_after = await self.backend.hit(
+            f"{self.rule.name}:{self.key}", self.rule.rate, self.rule.burst, cost - 1
+        )
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded, retry in {math.ceil(retry_after)}s",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+# Set by RateLimitMiddleware while a rate-limited request is handled
+current_rate_limit: ContextVar[Optional[RateLimitCharge]] = ContextVar("current_rate_limit", default=None)
+
+
+async def charge_rate_limit(cost: float):
+    """Charge the current request ``cost`` units of its rule in total; raises 429 (or 413) over the limit.
+
+    A no-op when rate limiting is disabled or the route has no rule.
+    """
+    charge = current_rate_limit.get()
+    if charge is not None:
+        await charge.charge(cost)
+
+
+def default_rules() -> List[RateLimitRule]:
+    api = settings.API_V1_STR
+    # First match wins, so the generation rules come before the catch-all
+    return [
+        RateLimitRule(
+            "generate",
+            settings.RATE_LIMIT_GENERATE_PER_MINUTE,
+            settings.RATE_LIMIT_GENERATE_BURST,
+            [f"{api}/website/generate-template", f"{api}/website/jobs"],
+            methods=["POST"],
+        ),
+        # Charged one unit per generation (see charge_rate_limit), from a
+        # bucket of its own so a batch of dozens fits
+        RateLimitRule(
+            "batch",
+            settings.RATE_LIMIT_BATCH_PER_MINUTE,
+            settings.RATE_LIMIT_BATCH_BURST,
+            [f"{api}/website/generate-batch"],
+            methods=["POST"],
+        ),
+        RateLimitRule("api", settings.RATE_LIMIT_API_PER_MINUTE, settings.RATE_LIMIT_API_BURST, [api]),
+    ]
+
+
+class RateLimitMiddleware:
+    """Token-bucket rate limiting per client and rule, answering 429 with Retry-After.
+
+    Pure ASGI (not BaseHTTPMiddleware) so streamed responses pass through
+    untouched. Each rule has its own bucket per client, so a burst of
+    generations does not also lock the client out of polling its jobs.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: Optional[RateLimitBackend] = None,
+        rules: Optional[List[RateLimitRule]] = None,
+        enabled: bool = settings.RATE_LIMIT_ENABLED,
+    ):
+        self.app = app
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.rules = rules if rules is not None else default_rules()
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        decoded = decoded_tokens.set({})
+        key = client_key(scope)
+        token = current_client.set(key)
+        try:
+            rule = next((r for r in self.rules if r.matches(scope["method"], scope["path"])), None)
+            if not self.enabled or rule is None:
+                await self.app(scope, receive, send)
+                return
+            allowed, remaining, retry_after = await self.backend.hit(f"{rule.name}:{key}", rule.rate, rule.burst)
+            if not allowed:
+                await self._reject(send, rule, retry_after)
+                return
+            charge_token = current_rate_limit.set(RateLimitCharge(self.backend, rule, key))
+
+            async def send_with_limits(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-ratelimit-limit", f"{rule.per_minute:g}/minute".encode()),
+                        (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_limits)
+            finally:
+                current_rate_limit.reset(charge_token)
+        finally:
+            current_client.reset(token)
+            decoded_tokens.reset(decoded)
+
+    async def _reject(self, send: Send, rule: RateLimitRule, retry_after: float):
+        body = json.dumps({"detail": f"Rate limit exceeded, retry in {math.ceil(retry_after)}s"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+                (b"x-ratelimit-limit", f"{rule.per_minute:g}/minute".encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
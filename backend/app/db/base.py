@@ -1,8 +1,84 @@
+from datetime import datetime, timezone
+from functools import lru_cache
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
+from ..core.metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+def engine_options(url: str) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # SQLite uses its own single-connection / file pools that take no sizing
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    return options
+
+# Engines and session factories are built on first use rather than at import:
+# importing the app stays cheap, and under a preloading server no pool is
+# created in the parent process and then shared by forked workers
+@lru_cache
+def get_engine() -> Engine:
+    engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+    instrument_engine(engine, "sync")
+    return engine
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(url, **engine_options(url))
+    instrument_engine(async_engine.sync_engine, "async")
+    return async_engine
+
+@lru_cache
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+@lru_cache
+def get_async_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+async def dispose_engines():
+    """Close the pools of whichever engines were created."""
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+
+_LAZY = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_session_factory,
+    "AsyncSessionLocal": get_async_session_factory,
+}
+
+def __getattr__(name: str):
+    # Keeps `from app.db.base import engine` (scripts, benchmarks) working
+    factory = _LAZY.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+Base = declarative_base()
+
+def utcnow() -> datetime:
+    # Python-side timestamp default: keeps stored values in one format on every
+    # backend, which keyset pagination on (created_at, id) relies on
+    return datetime.now(timezone.utc)
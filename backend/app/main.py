@@ -1,38 +1,81 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.routes import api_router
+from app.core.config import settings
+from app.core.compression import StreamingAwareGZipMiddleware
+from app.core.lifespan import lifespan
+from app.core.metrics import metrics_endpoint
+from app.core.observability import ObservabilityMiddleware, configure_logging
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.serialization import FastJSONResponse
 import os
 
-app = FastAPI()
-
-# CORS middleware with environment-based origins
-allowed_origins = [
-    "https://frontend-ks5on2clo-alchemix-ai.vercel.app",
-    "http://localhost:3000",  # For local development
-    os.getenv("FRONTEND_URL", ""),  # From environment variable
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[origin for origin in allowed_origins if origin],  # Filter out empty strings
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include API router
-app.include_router(api_router, prefix="/api/v1")
-
-@app.get("/")
-async def root():
-    return {
-        "message": "API is running",
-        "environment": os.getenv("ENVIRONMENT", "development"),
-        "version": "1.0.0"
-    }
-
-# For Railway deployment
+
+def cors_origins() -> list[str]:
+    origins = list(settings.BACKEND_CORS_ORIGINS)
+    if settings.FRONTEND_URL and settings.FRONTEND_URL not in origins:
+        origins.append(settings.FRONTEND_URL)
+    return origins
+
+
+def create_app() -> FastAPI:
+    """Build the API application.
+
+    Nothing here opens a connection: database engines, the LLM client and
+    the caches are created by the lifespan or on first use, so building the
+    app (and importing this module) stays cheap for every worker.
+    """
+    configure_logging()
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        # orjson rendering for every JSON response (generated templates run to tens of KB)
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan
+    )
+
+    # Per-client token buckets; added before CORS so 429s still carry CORS headers
+    app.add_middleware(RateLimitMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins(),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Compress large JSON responses (generated templates, paginated lists)
+    app.add_middleware(
+        StreamingAwareGZipMiddleware,
+        minimum_size=settings.GZIP_MINIMUM_SIZE,
+        compresslevel=settings.GZIP_COMPRESS_LEVEL
+    )
+
+    # Request ids and per-route metrics; added last so it wraps every other middleware
+    if settings.METRICS_ENABLED:
+        app.add_middleware(ObservabilityMiddleware)
+        app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+
+    @app.get("/")
+    async def root():
+        return {
+            "message": "API is running",
+            "environment": settings.ENVIRONMENT,
+            "version": settings.VERSION
+        }
+
+    return app
+
+
+app = create_app()
+
+# Local development; production runs under gunicorn (see gunicorn.conf.py)
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True) 
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=settings.ENVIRONMENT == "development")
@@ -0,0 +1,4 @@
+from ..db.base import Base
+from .user import User
+from .item import Item
+from .generation import Generation, GenerationArtifact
@@ -0,0 +1,49 @@
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, JSON, LargeBinary, String
+from sqlalchemy.sql import func
+from ..db.base import Base, utcnow
+
+class GenerationArtifact(Base):
+    """A compressed html, css or js body, stored once per distinct content."""
+
+    __tablename__ = "generation_artifacts"
+
+    # sha256 of the uncompressed body
+    digest = Column(String(64), primary_key=True)
+    kind = Column(String(8), nullable=False)
+    # "zstd", "gzip" or "identity"
+    encoding = Column(String(16), nullable=False)
+    size = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+
+class Generation(Base):
+    __tablename__ = "generations"
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_generations_created_at_id", "created_at", "id"),
+        # A user's history, newest first, without sorting their rows
+        Index("ix_generations_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # The signed-in user who made the request; anonymous generations are not recorded
+    user_id = Column(Integer, ForeignKey("users.id"))
+    # The rate limiting client key the request was made under
+    client = Column(String)
+    business_type = Column(String)
+    description = Column(String)
+    # The full request as sent, with an inline layout image replaced by its id
+    request = Column(JSON)
+    model = Column(String)
+    # HIT, SIMILAR or MISS
+    cache_status = Column(String(16))
+    partial = Column(Boolean, default=False)
+    llm_calls = Column(Integer, default=0)
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    latency_ms = Column(Float)
+    html_digest = Column(String(64), ForeignKey("generation_artifacts.digest"))
+    css_digest = Column(String(64), ForeignKey("generation_artifacts.digest"))
+    js_digest = Column(String(64), ForeignKey("generation_artifacts.digest"))
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
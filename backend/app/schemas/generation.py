@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+class GenerationSummary(BaseModel):
+    id: int
+    business_type: Optional[str] = None
+    description: Optional[str] = None
+    model: Optional[str] = None
+    cache_status: Optional[str] = None
+    partial: bool = False
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_ms: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class Generation(GenerationSummary):
+    request: Optional[Dict[str, Any]] = None
+    # Content digests; fetch the bodies from /generations/{id}/artifacts/{kind}
+    html_digest: Optional[str] = None
+    css_digest: Optional[str] = None
+    js_digest: Optional[str] = None
@@ -20,3 +20,13 @@ class Item(ItemBase):
 
     class Config:
         from_attributes = True
+
+class ItemOwner(BaseModel):
+    id: int
+    email: str
+
+    class Config:
+        from_attributes = True
+
+class ItemWithOwner(Item):
+    owner: Optional[ItemOwner] = None
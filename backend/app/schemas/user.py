@@ -4,16 +4,20 @@ from datetime import datetime
 
 class UserBase(BaseModel):
     email: EmailStr
-    is_active: Optional[bool] = True
-    is_superuser: Optional[bool] = False
 
+# Account flags are not accepted on signup; new users are active, never superusers
 class UserCreate(UserBase):
     password: str
 
-class UserUpdate(UserBase):
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None
     password: Optional[str] = None
+    # Only a superuser may change it
+    is_active: Optional[bool] = None
 
 class UserInDB(UserBase):
+    is_active: Optional[bool] = True
+    is_superuser: Optional[bool] = False
     id: int
     created_at: datetime
     updated_at: Optional[datetime]
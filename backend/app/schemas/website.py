@@ -1,14 +1,57 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
 
+# Short free-text fields go into every prompt verbatim; the description has
+# its own token budget (see app.services.prompts.MAX_DESCRIPTION_TOKENS)
 class WebsiteRequest(BaseModel):
     description: str
-    business_type: str = "business"  # default value
-    style_preferences: Optional[str] = "simple and minimal"
-    features: Optional[List[str]] = ["basic"]
+    business_type: str = Field("business", max_length=100)
+    style_preferences: Optional[str] = Field("simple and minimal", max_length=500)
+    features: Optional[List[Annotated[str, Field(max_length=100)]]] = ["basic"]
+    # Id returned by POST /layout-images; inline base64 (or a data: URL) is
+    # still accepted but keeps the whole image in the request body
     layout_image: Optional[str] = None
+    bypass_cache: bool = False  # skip the template cache lookup for this request
+    # Generate the page shell and each section in concurrent smaller calls
+    parallel_sections: bool = False
 
 class WebsiteResponse(BaseModel):
     html: str
     css: str
-    preview: str
\ No newline at end of file
+    js: Optional[str] = None
+    preview: str
+    # True when a section is still missing or truncated after the repair attempt
+    partial: bool = False
+
+class BatchRequest(BaseModel):
+    requests: List[WebsiteRequest] = Field(min_length=1)
+    # Distinct designs per request; only the first is read from or stored in the template cache
+    variants: int = Field(1, ge=1)
+
+class BatchItemResult(BaseModel):
+    """One line of the NDJSON batch response, sent as soon as its generation completes."""
+    index: int  # position in requests x variants order
+    request_index: int
+    variant: int
+    status: str  # succeeded or failed
+    cache: Optional[str] = None  # HIT, SIMILAR or MISS
+    result: Optional[WebsiteResponse] = None
+    error: Optional[str] = None
+
+class LayoutImageResponse(BaseModel):
+    id: str  # pass as WebsiteRequest.layout_image
+    media_type: str
+    width: int
+    height: int
+    size_bytes: int
+    # True when an identical or perceptually identical image was already stored
+    deduplicated: bool
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, succeeded or failed
+    result: Optional[WebsiteResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,402 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from fastapi import Request
+import logging
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; previews are then served gzip-only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+ARTIFACT_STORE_BACKEND = settings.ARTIFACT_STORE_BACKEND
+ARTIFACT_STORE_MAX_BYTES = settings.ARTIFACT_STORE_MAX_BYTES
+ARTIFACT_STORE_PATH = settings.ARTIFACT_STORE_PATH
+ARTIFACT_COMPRESS_MIN_BYTES = settings.ARTIFACT_COMPRESS_MIN_BYTES
+ARTIFACT_BROTLI_QUALITY = settings.ARTIFACT_BROTLI_QUALITY
+PREVIEW_URL_PREFIX = settings.PREVIEW_URL_PREFIX
+
+MEDIA_TYPES = {
+    "html": "text/html",
+    "css": "text/css",
+    "js": "text/javascript",
+    # Prepared layout images, kept in a store of their own (see app.services.layout_images)
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+# Preferred order when a client accepts several encodings
+ENCODINGS = ("br", "gzip")
+
+
+class Artifact:
+    """An immutable, content-addressed blob with its precompressed variants."""
+
+    def __init__(self, digest: str, kind: str, body: bytes, variants: Dict[str, bytes]):
+        self.digest = digest
+        self.kind = kind
+        self.body = body
+        self.variants = variants
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.kind]
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.variants.values())
+
+
+def digest_of(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def is_digest(value: str) -> bool:
+    return _DIGEST_RE.fullmatch(value) is not None
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """Precompress once at publish time; variants that do not shrink are dropped."""
+    if len(body) < ARTIFACT_COMPRESS_MIN_BYTES:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=ARTIFACT_BROTLI_QUALITY)
+    return {name: data for name, data in variants.items() if len(data) < len(body)}
+
+
+class ArtifactStore(ABC):
+    """Storage interface for artifacts keyed by the sha256 of their body."""
+
+    @abstractmethod
+    def get(self, digest: str) -> Optional[Artifact]:
+        ...
+
+    @abstractmethod
+    def has(self, digest: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put(self, artifact: Artifact) -> None:
+        ...
+
+    @abstractmethod
+    def size_bytes(self) -> int:
+        ...
+
+
+class MemoryArtifactStore(ArtifactStore):
+    def __init__(self, max_bytes: int = ARTIFACT_STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._artifacts: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, digest: str) -> Optional[Artifact]:
+        artifact = self._artifacts.get(digest)
+        if artifact is not None:
+            self._artifacts.move_to_end(digest)
+        return artifact
+
+    def has(self, digest: str) -> bool:
+        return digest in self._artifacts
+
+    def put(self, artifact: Artifact) -> None:
+        if artifact.digest in self._artifacts or artifact.size > self.max_bytes:
+            return
+        self._artifacts[artifact.digest] = artifact
+        self._bytes += artifact.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._artifacts.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class DiskArtifactStore(ArtifactStore):
+    """Files named ``<digest>.<kind>[.<encoding>]`` under two-character shards.
+
+    Content addressing makes every file write-once, so concurrent workers
+    only need an atomic rename to never observe a partial file. Each worker
+    indexes the artifacts it has seen (scanned at start, written or read
+    since) in LRU order with a running byte total, and deletes the least
+    recently used beyond ``max_bytes``. With several workers each one's
+    total is its own view, so the directory can run over until every worker
+    has seen the others' files.
+    """
+
+    SUFFIXES = {"gzip": ".gz", "br": ".br"}
+    _FILE_RE = re.compile(r"([0-9a-f]{64})\.([a-z]+)(\.gz|\.br)?")
+
+    def __init__(self, path: str = ARTIFACT_STORE_PATH, max_bytes: int = ARTIFACT_STORE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # digest -> (kind, bytes on disk)
+        self._bytes = 0
+        # Reads and writes run on executor threads
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self._scan()
+
+    def _base(self, digest: str) -> str:
+        return os.path.join(self.path, digest[:2], digest)
+
+    def _paths(self, digest: str, kind: str) -> List[str]:
+        path = f"{self._base(digest)}.{kind}"
+        # The body first: once it is gone the artifact is gone, even if removing a variant fails
+        return [path] + [path + suffix for suffix in self.SUFFIXES.values()]
+
+    def _scan(self):
+        found: Dict[str, list] = {}  # digest -> [kind, bytes, mtime of the body]
+        for shard in os.listdir(self.path):
+            shard_path = os.path.join(self.path, shard)
+            # Anything else (e.g. another store's subdirectory) is not ours
+            if len(shard) != 2 or not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                match = self._FILE_RE.fullmatch(name)
+                if match is None or match.group(2) not in MEDIA_TYPES:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(shard_path, name))
+                except FileNotFoundError:
+                    continue
+                entry = found.setdefault(match.group(1), [None, 0, 0.0])
+                entry[1] += stat.st_size
+                if match.group(3) is None:
+                    entry[0], entry[2] = match.group(2), stat.st_mtime
+        with self._lock:
+            # Oldest first; variants without a body are a write that never finished
+            for digest, (kind, size, _) in sorted(found.items(), key=lambda item: item[1][2]):
+                if kind is not None:
+                    self._index[digest] = (kind, size)
+                    self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        while self._bytes > self.max_bytes and self._index:
+            digest, (kind, size) = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            for path in self._paths(digest, kind):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _add(self, digest: str, kind: str, size: int):
+        with self._lock:
+            if digest in self._index:
+                return
+            self._index[digest] = (kind, size)
+            self._bytes += size
+            self._evict()
+
+    def _forget(self, digest: str):
+        with self._lock:
+            entry = self._index.pop(digest, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def _locate(self, digest: str) -> Optional[str]:
+        """The artifact's kind, marking it recently used, or None."""
+        with self._lock:
+            entry = self._index.get(digest)
+            if entry is not None:
+                self._index.move_to_end(digest)
+                return entry[0]
+        # Written by another worker since the scan
+        for kind in MEDIA_TYPES:
+            paths = self._paths(digest, kind)
+            if os.path.exists(paths[0]):
+                size = 0
+                for path in paths:
+                    try:
+                        size += os.path.getsize(path)
+                    except FileNotFoundError:
+                        pass
+                self._add(digest, kind, size)
+                return kind
+        return None
+
+    def get(self, digest: str) -> Optional[Artifact]:
+        kind = self._locate(digest)
+        if kind is None:
+            return None
+        path = f"{self._base(digest)}.{kind}"
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            # Evicted by another worker
+            self._forget(digest)
+            return None
+        variants = {}
+        for encoding, suffix in self.SUFFIXES.items():
+            try:
+                with open(path + suffix, "rb") as f:
+                    variants[encoding] = f.read()
+            except FileNotFoundError:
+                pass
+        return Artifact(digest, kind, body, variants)
+
+    def has(self, digest: str) -> bool:
+        return self._locate(digest) is not None
+
+    def put(self, artifact: Artifact) -> None:
+        if artifact.size > self.max_bytes or self.has(artifact.digest):
+            return
+        path = f"{self._base(artifact.digest)}.{artifact.kind}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Variants first, so a visible body always has its variants next to it
+        files = [(path + self.SUFFIXES[e], data) for e, data in artifact.variants.items()]
+        for target, data in files + [(path, artifact.body)]:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        self._add(artifact.digest, artifact.kind, artifact.size)
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+def _link_assets(html: str, css_url: Optional[str], js_url: Optional[str]) -> str:
+    lowered = html.lower()
+    if css_url:
+        tag = f'<link rel="stylesheet" href="{css_url}">'
+        index = lowered.find("</head>")
+        html = html[:index] + tag + html[index:] if index != -1 else tag + html
+        lowered = html.lower()
+    if js_url:
+        tag = f'<script src="{js_url}" defer></script>'
+        index = lowered.rfind("</body>")
+        html = html[:index] + tag + html[index:] if index != -1 else html + tag
+    return html
+
+
+class ArtifactPublisher:
+    """Publish generated templates to an ArtifactStore and count what was new."""
+
+    def __init__(self, store: ArtifactStore):
+        self.store = store
+        self.published = 0
+        self.deduplicated = 0
+
+    def _put(self, kind: str, text: str) -> str:
+        body = text.encode()
+        digest = digest_of(body)
+        if self.store.has(digest):
+            self.deduplicated += 1
+        else:
+            self.store.put(Artifact(digest, kind, body, compress_variants(body)))
+            self.published += 1
+        return digest
+
+    def publish_sync(self, result: dict) -> str:
+        # The stylesheet and script are separate artifacts so unchanged ones
+        # stay in the browser cache when only the markup differs
+        css_url = f"{PREVIEW_URL_PREFIX}/{self._put('css', result['css'])}" if result.get("css") else None
+        js_url = f"{PREVIEW_URL_PREFIX}/{self._put('js', result['js'])}" if result.get("js") else None
+        return self._put("html", _link_assets(result["html"], css_url, js_url))
+
+    async def publish(self, result: dict) -> str:
+        """Store the html/css/js of ``result`` and return the preview URL."""
+        loop = asyncio.get_running_loop()
+        # Brotli at quality 11 is CPU-heavy, keep it off the event loop
+        digest = await loop.run_in_executor(None, self.publish_sync, result)
+        return f"{PREVIEW_URL_PREFIX}/{digest}"
+
+    def get_sync(self, digest: str) -> Optional[Artifact]:
+        # Digests become file names in the disk store, so reject anything else
+        if not is_digest(digest):
+            return None
+        try:
+            return self.store.get(digest)
+        except Exception as e:
+            logger.error("Artifact read failed: %s", e)
+            return None
+
+    async def get(self, digest: str) -> Optional[Artifact]:
+        loop = asyncio.get_running_loop()
+        # The disk store reads files
+        return await loop.run_in_executor(None, self.get_sync, digest)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.store).__name__,
+            "published": self.published,
+            "deduplicated": self.deduplicated,
+            "evictions": getattr(self.store, "evictions", 0),
+            "size_bytes": self.store.size_bytes(),
+            "brotli": brotli is not None,
+        }
+
+
+def parse_accept_encoding(header: Optional[str]) -> List[str]:
+    """Encodings from an Accept-Encoding header with a non-zero q value."""
+    accepted = []
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header: Optional[str], artifact: Artifact) -> Optional[str]:
+    accepted = parse_accept_encoding(header)
+    for encoding in ENCODINGS:
+        if encoding in artifact.variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def create_artifact_store(namespace: Optional[str] = None) -> ArtifactStore:
+    """The configured store; a ``namespace`` gets one of its own, apart from the previews."""
+    if ARTIFACT_STORE_BACKEND == "disk":
+        return DiskArtifactStore(os.path.join(ARTIFACT_STORE_PATH, namespace) if namespace else ARTIFACT_STORE_PATH)
+    if ARTIFACT_STORE_BACKEND == "memory":
+        return MemoryArtifactStore()
+    raise ValueError(f"Unknown ARTIFACT_STORE_BACKEND: {ARTIFACT_STORE_BACKEND}")
+
+def create_artifact_publisher() -> ArtifactPublisher:
+    return ArtifactPublisher(create_artifact_store())
+
+def get_artifact_publisher(request: Request) -> Optional[ArtifactPublisher]:
+    return getattr(request.app.state, "artifact_publisher", None)
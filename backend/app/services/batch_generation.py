@@ -0,0 +1,133 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+from app.core.config import settings
+from app.schemas.website import WebsiteRequest
+from app.services.layout_images import LayoutImage
+from app.services.minify import minify_template
+from app.services.prompts import GenerationPlan
+from app.services.template_parser import parse_template
+from app.services.template_service import TemplateGeneratorService
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+BATCH_MAX_ITEMS = settings.BATCH_MAX_ITEMS
+BATCH_MAX_VARIANTS = settings.BATCH_MAX_VARIANTS
+BATCH_CONCURRENCY = settings.BATCH_CONCURRENCY
+
+
+class BatchItem:
+    """One generation of a batch: variant ``variant`` of ``requests[request_index]``."""
+
+    def __init__(
+        self,
+        index: int,
+        request_index: int,
+        variant: int,
+        request: WebsiteRequest,
+        plan: GenerationPlan,
+        layout_image: Optional[LayoutImage] = None
+    ):
+        self.index = index
+        self.request_index = request_index
+        self.variant = variant
+        self.request = request
+        self.plan = plan
+        self.layout_image = layout_image
+
+
+async def generate_text(
+    template_service: TemplateGeneratorService,
+    item: BatchItem,
+    warmed: Optional[asyncio.Event] = None
+) -> str:
+    """Run one batch call and return the completion text.
+
+    When ``warmed`` is given the call is streamed and the event set at the
+    first token: by then the upstream has read, and cached, the prompt
+    prefix, so the request's other variants can start and read it instead of
+    each paying for it in full.
+    """
+    plan = item.plan
+    image = item.layout_image
+    kwargs = dict(
+        max_tokens=plan.max_tokens,
+        estimated_input_tokens=plan.input_tokens + (image.tokens if image else 0),
+        layout_image=image,
+        system=plan.system,
+        variant=plan.variant
+    )
+    if warmed is None:
+        return await template_service.generate_template(plan.prompt, **kwargs)
+    chunks = []
+    try:
+        async for text in template_service.stream_template(plan.prompt, **kwargs):
+            warmed.set()
+            chunks.append(text)
+    finally:
+        # Followers must not wait forever on a leader that failed
+        warmed.set()
+    return "".join(chunks)
+
+
+def template_result(text: str) -> dict:
+    """Parse and minify a completion; raises ValueError when it has no HTML."""
+    parsed = parse_template(text)
+    if not parsed.html:
+        raise ValueError("Failed to parse the generated template")
+    return minify_template({"html": parsed.html, "css": parsed.css, "js": parsed.js, "partial": not parsed.complete})
+
+
+async def run_batch(
+    items: List[BatchItem],
+    run_item: Callable[[BatchItem, Optional[asyncio.Event]], Awaitable[dict]],
+    concurrency: int = BATCH_CONCURRENCY
+) -> AsyncIterator[Tuple[BatchItem, Optional[dict], Optional[BaseException]]]:
+    """Run ``items`` concurrently and yield (item, result, error) as each completes.
+
+    The first variant of a request with several is its leader: the other
+    variants wait until ``run_item`` sets the event it is given (see
+    generate_text) before taking a slot, so they hit the prompt cache.
+    Closing the iterator early cancels whatever is still running.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    done: "asyncio.Queue[Tuple[BatchItem, Optional[dict], Optional[BaseException]]]" = asyncio.Queue()
+    leaders: Dict[int, asyncio.Event] = {}
+    counts: Dict[int, int] = {}
+    for item in items:
+        counts[item.request_index] = counts.get(item.request_index, 0) + 1
+
+    async def run(item: BatchItem, warmed: Optional[asyncio.Event], wait_for: Optional[asyncio.Event]):
+        try:
+            if wait_for is not None:
+                await wait_for.wait()
+            async with slots:
+                result = await run_item(item, warmed)
+            done.put_nowait((item, result, None))
+        except Exception as e:
+            logger.warning("Batch item %d failed: %s", item.index, e)
+            done.put_nowait((item, None, e))
+        finally:
+            if warmed is not None:
+                warmed.set()
+
+    tasks = []
+    # Leaders are created first so they take the first slots
+    ordered = sorted(items, key=lambda item: (item.variant > 0, item.index))
+    for item in ordered:
+        warmed = wait_for = None
+        if counts[item.request_index] > 1:
+            if item.request_index not in leaders:
+                warmed = leaders[item.request_index] = asyncio.Event()
+            else:
+                wait_for = leaders[item.request_index]
+        tasks.append(asyncio.create_task(run(item, warmed, wait_for)))
+
+    try:
+        for _ in range(len(tasks)):
+            yield await done.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
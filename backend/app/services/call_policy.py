@@ -0,0 +1,426 @@
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+import asyncio
+import math
+import random
+import time
+from fastapi import Request
+import logging
+from app.core.config import settings
+from app.core.metrics import LLM_ATTEMPT_LATENCY, LLM_ERRORS
+
+if TYPE_CHECKING:
+    from app.services.fair_scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status codes worth another attempt: timeouts, rate limits, overload (529) and 5xx
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class AttemptTimeoutError(Exception):
+    pass
+
+
+class UpstreamUnavailableError(Exception):
+    """Every model failed or had its circuit open; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    # Only reached after a call failed, by which point the SDK is loaded
+    import anthropic
+
+    if isinstance(error, (AttemptTimeoutError, anthropic.APIConnectionError)):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def should_fall_back(error: BaseException) -> bool:
+    import anthropic
+
+    # A model that does not exist (or is not enabled for this key) will not recover on retry
+    return is_retryable(error) or isinstance(error, anthropic.NotFoundError)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class LatencyWindow:
+    """The most recent ``size`` latencies, for percentile estimates."""
+
+    def __init__(self, size: int):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+    def summary(self) -> dict:
+        return {
+            "samples": len(self),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class CircuitBreaker:
+    """Closed -> open on a high failure ratio -> half-open after ``reset_timeout``.
+
+    The ratio is taken over the last ``window`` attempts rather than a run of
+    consecutive failures, so a steady trickle of overload errors across
+    concurrent calls does not trip it. While half-open a single probe call
+    is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_ratio: float, window: int, reset_timeout: float):
+        self.failure_ratio = failure_ratio
+        self.min_calls = max(1, window // 2)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.opened = 0
+        self._outcomes = deque(maxlen=window)  # True for a failure
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        if self.state != "closed":
+            self.state = "closed"
+            self._outcomes.clear()
+            self._probing = False
+        self._outcomes.append(False)
+
+    def release_probe(self):
+        """End a half-open probe that settled nothing (e.g. cancelled), so the next call can probe."""
+        if self.state == "half_open":
+            self._probing = False
+
+    def record_failure(self):
+        self._outcomes.append(True)
+        if self.state == "open":
+            return
+        failures = sum(self._outcomes)
+        if self.state == "half_open" or (
+            len(self._outcomes) >= self.min_calls
+            and failures >= self.failure_ratio * len(self._outcomes)
+        ):
+            logger.warning("Circuit opened: %d of the last %d attempts failed", failures, len(self._outcomes))
+            self.state = "open"
+            self.opened += 1
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class ModelStats:
+    def __init__(self, breaker: CircuitBreaker, window: int):
+        self.breaker = breaker
+        self.latency = LatencyWindow(window)
+        self.first_item_latency = LatencyWindow(window)
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Hedges not sent because no concurrency slot was free
+        self.hedges_skipped = 0
+        self.short_circuited = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "short_circuited": self.short_circuited,
+            "attempt_latency": self.latency.summary(),
+            "first_token_latency": self.first_item_latency.summary(),
+        }
+
+
+class CallPolicy:
+    """Deadlines, jittered retries, hedging, circuit breaking and model fallback for LLM calls.
+
+    ``call`` and ``stream`` take a function that performs one attempt
+    against a given model; the policy decides how often, against which
+    model and for how long it runs. State is per worker process.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        attempt_timeout: float = settings.LLM_ATTEMPT_TIMEOUT,
+        max_attempts: int = settings.LLM_MAX_ATTEMPTS,
+        retry_base_delay: float = settings.LLM_RETRY_BASE_DELAY,
+        retry_max_delay: float = settings.LLM_RETRY_MAX_DELAY,
+        hedge: bool = settings.LLM_HEDGE_ENABLED,
+        hedge_min_samples: int = settings.LLM_HEDGE_MIN_SAMPLES,
+        hedge_min_delay: float = settings.LLM_HEDGE_MIN_DELAY,
+        breaker_failure_ratio: float = settings.LLM_BREAKER_FAILURE_RATIO,
+        breaker_window: int = settings.LLM_BREAKER_WINDOW,
+        breaker_reset_timeout: float = settings.LLM_BREAKER_RESET_TIMEOUT,
+        latency_window: int = settings.LLM_LATENCY_WINDOW,
+        hedge_slots: Optional["FairScheduler"] = None,
+    ):
+        self.models = list(dict.fromkeys(models))
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        # The caller holds one slot of this scheduler per call; each hedge
+        # needs one more, so hedges count against the same concurrency cap
+        self.hedge_slots = hedge_slots
+        self._models: Dict[str, ModelStats] = {
+            model: ModelStats(CircuitBreaker(breaker_failure_ratio, breaker_window, breaker_reset_timeout), latency_window)
+            for model in self.models
+        }
+        # End-to-end latency of successful calls, retries and fallbacks included
+        self.latency = LatencyWindow(latency_window)
+        self.calls = 0
+        self.failed_calls = 0
+        self.fallbacks = 0
+
+    def _backoff(self, attempt: int, error: Optional[BaseException]) -> float:
+        # Full jitter keeps retrying workers from synchronizing on the upstream
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.retry_max_delay))
+        return delay
+
+    def _hedge_delay(self, stats: ModelStats) -> Optional[float]:
+        if not self.hedge or len(stats.latency) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, stats.latency.percentile(95))
+
+    def _record_failure(self, stats: ModelStats, error: BaseException):
+        # A bad request is not an outage, so only retryable errors count
+        # against the circuit; any other API error still shows the upstream
+        # answered, which is all a half-open probe has to establish
+        import anthropic
+
+        if is_retryable(error):
+            stats.failures += 1
+            stats.breaker.record_failure()
+        elif isinstance(error, anthropic.APIStatusError):
+            stats.breaker.record_success()
+
+    async def _timed(self, model: str, fn: Callable[[str], Awaitable[T]], first_item: bool = False) -> T:
+        stats = self._models[model]
+        stats.attempts += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(model), self.attempt_timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            error = AttemptTimeoutError(f"{model} did not answer within {self.attempt_timeout}s")
+            self._record_failure(stats, error)
+            LLM_ATTEMPT_LATENCY.labels(model, "timeout").observe(time.monotonic() - started)
+            LLM_ERRORS.labels(model, "AttemptTimeoutError").inc()
+            raise error
+        except Exception as e:
+            self._record_failure(stats, e)
+            LLM_ATTEMPT_LATENCY.labels(model, "error").observe(time.monotonic() - started)
+            LLM_ERRORS.labels(model, type(e).__name__).inc()
+            raise
+        finally:
+            # Cancelled or failed in a way that proves nothing: let another call probe
+            stats.breaker.release_probe()
+        elapsed = time.monotonic() - started
+        stats.successes += 1
+        # Time to first token is tracked apart so it does not skew the hedge delay
+        (stats.first_item_latency if first_item else stats.latency).add(elapsed)
+        LLM_ATTEMPT_LATENCY.labels(model, "first_token" if first_item else "ok").observe(elapsed)
+        stats.breaker.record_success()
+        return result
+
+    async def _attempt(self, model: str, fn: Callable[[str], Awaitable[T]]) -> T:
+        stats = self._models[model]
+        delay = self._hedge_delay(stats)
+        first = asyncio.ensure_future(self._timed(model, fn))
+        pending = {first}
+        try:
+            if delay is None:
+                return await first
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                # Slower than p95 so far: race a second request against it,
+                # if a slot is free for it
+                hedge = self._start_hedge(model, fn)
+                if hedge is None:
+                    stats.hedges_skipped += 1
+                    return await first
+                stats.hedges += 1
+                pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _start_hedge(self, model: str, fn: Callable[[str], Awaitable[T]]) -> Optional[asyncio.Future]:
+        if self.hedge_slots is None:
+            return asyncio.ensure_future(self._timed(model, fn))
+        key = self.hedge_slots.try_acquire()
+        if key is None:
+            return None
+        hedge = asyncio.ensure_future(self._timed(model, fn))
+        # Released however the hedge ends, cancellation included
+        hedge.add_done_callback(lambda _: self.hedge_slots.release(key))
+        return hedge
+
+    async def _attempts(self, last_error: Callable[[], Optional[BaseException]]) -> AsyncIterator[str]:
+        """Yield the model for each attempt: retries with backoff, then the next model.
+
+        ``last_error`` reports how the previous attempt failed; errors that a
+        retry cannot fix move straight on to the next model.
+        """
+        for model in self.models:
+            stats = self._models[model]
+            if not stats.breaker.allow():
+                stats.short_circuited += 1
+                continue
+            if model != self.models[0]:
+                self.fallbacks += 1
+                logger.warning("Falling back to model %s", model)
+            for attempt in range(self.max_attempts):
+                if attempt:
+                    if not is_retryable(last_error()):
+                        break
+                    await asyncio.sleep(self._backoff(attempt, last_error()))
+                    if not stats.breaker.allow():
+                        break
+                    stats.retries += 1
+                yield model
+
+    def _unavailable(self, error: Optional[BaseException]) -> UpstreamUnavailableError:
+        self.failed_calls += 1
+        retry_after = min(
+            (s.breaker.retry_after() for s in self._models.values() if s.breaker.state == "open"),
+            default=0.0,
+        )
+        detail = f"{type(error).__name__}: {error}" if error is not None else "all circuits are open"
+        return UpstreamUnavailableError(
+            f"LLM upstream unavailable ({detail})",
+            retry_after=max(1.0, retry_after or self.retry_max_delay),
+        )
+
+    async def call(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Run ``fn(model)`` until one attempt succeeds or every option is spent."""
+        self.calls += 1
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        async for model in self._attempts(lambda: error):
+            try:
+                result = await self._attempt(model, fn)
+            except Exception as e:
+                error = e
+                logger.warning("LLM call to %s failed: %s: %s", model, type(e).__name__, e)
+                if not should_fall_back(e):
+                    self.failed_calls += 1
+                    raise
+                continue
+            self.latency.add(time.monotonic() - started)
+            return result
+        raise self._unavailable(error) from error
+
+    async def stream(self, fn: Callable[[str], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Like ``call`` for streams: retries and fallbacks only happen before the first item.
+
+        The attempt deadline applies to the first item; once output has been
+        forwarded the stream is committed to that attempt. Streams are not hedged.
+        """
+        self.calls += 1
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        async for model in self._attempts(lambda: error):
+            iterator = fn(model).__aiter__()
+            try:
+                first = await self._timed(model, lambda _: iterator.__anext__(), first_item=True)
+            except StopAsyncIteration:
+                self.latency.add(time.monotonic() - started)
+                return
+            except Exception as e:
+                error = e
+                await iterator.aclose()
+                logger.warning("LLM stream from %s failed: %s: %s", model, type(e).__name__, e)
+                if not should_fall_back(e):
+                    self.failed_calls += 1
+                    raise
+                continue
+            yield first
+            async for item in iterator:
+                yield item
+            self.latency.add(time.monotonic() - started)
+            return
+        raise self._unavailable(error) from error
+
+    def stats(self) -> dict:
+        return {
+            "models": self.models,
+            "calls": self.calls,
+            "failed_calls": self.failed_calls,
+            "fallbacks": self.fallbacks,
+            "latency": self.latency.summary(),
+            "per_model": {model: stats.to_dict() for model, stats in self._models.items()},
+        }
+
+
+def get_call_policy(request: Request) -> Optional[CallPolicy]:
+    return getattr(request.app.state, "call_policy", None)
@@ -0,0 +1,172 @@
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import asyncio
+import time
+
+
+class _Client:
+    def __init__(self, weight: int):
+        self.weight = weight
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+
+
+class _Slot:
+    def __init__(self, scheduler: "FairScheduler"):
+        self.scheduler = scheduler
+        self.key = None
+
+    async def __aenter__(self):
+        self.key = await self.scheduler.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.scheduler.release(self.key)
+
+
+class FairScheduler:
+    """Share ``capacity`` concurrent slots between clients by weighted round-robin.
+
+    Used as ``async with scheduler.slot():``; the client is read from
+    ``client_of()`` at acquire time. Each client queues FIFO on its own, and
+    when a slot frees the scheduler walks the clients with waiters in turn,
+    granting up to ``weight`` slots to each before moving on. No client
+    holds more than ``per_client_limit`` slots, so a single heavy caller can
+    neither starve the others nor take the whole upstream budget while they
+    are idle.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        client_of: Callable[[], str],
+        per_client_limit: Optional[int] = None,
+        weight_of: Callable[[str], int] = lambda client: 1,
+    ):
+        self.capacity = capacity
+        self.per_client_limit = per_client_limit or capacity
+        self._client_of = client_of
+        self._weight_of = weight_of
+        self._clients: Dict[str, _Client] = {}
+        # Clients with waiters, in round-robin order; the head is being served
+        self._ring: Deque[str] = deque()
+        self._credit = 0
+        self.in_flight = 0
+        self.granted = 0
+        self.queued = 0
+        self.wait_time = 0.0
+
+    def _client(self, key: str) -> _Client:
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = _Client(max(1, self._weight_of(key)))
+        return client
+
+    async def acquire(self, key: Optional[str] = None) -> str:
+        key = key if key is not None else self._client_of()
+        client = self._client(key)
+        started = time.monotonic()
+        if not client.waiters and self.in_flight < self.capacity and client.in_flight < self.per_client_limit:
+            self._grant(client)
+            return key
+
+        self.queued += 1
+        waiter = asyncio.get_running_loop().create_future()
+        client.waiters.append(waiter)
+        if key not in self._ring:
+            self._ring.append(key)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self.release(key)
+            else:
+                client.waiters.remove(waiter)
+                self._dispatch()
+                self._forget_if_idle(key)
+            raise
+        self.wait_time += time.monotonic() - started
+        return key
+
+    def try_acquire(self, key: Optional[str] = None) -> Optional[str]:
+        """Take a slot only if one is free and nobody is queued; returns the key, else None.
+
+        For optional extra work such as hedged requests, which should use
+        spare capacity rather than queue behind (or ahead of) real calls.
+        """
+        key = key if key is not None else self._client_of()
+        if self._ring or self.in_flight >= self.capacity:
+            return None
+        client = self._client(key)
+        if client.in_flight >= self.per_client_limit:
+            self._forget_if_idle(key)
+            return None
+        self._grant(client)
+        return key
+
+    def release(self, key: str):
+        client = self._clients[key]
+        client.in_flight -= 1
+        self.in_flight -= 1
+        self._dispatch()
+        self._forget_if_idle(key)
+
+    def _forget_if_idle(self, key: str):
+        # Idle clients are dropped so the table only holds active callers
+        client = self._clients.get(key)
+        if client is not None and not client.in_flight and not client.waiters and key not in self._ring:
+            del self._clients[key]
+
+    def _grant(self, client: _Client):
+        client.in_flight += 1
+        self.granted += 1
+        self.in_flight += 1
+
+    def _dispatch(self):
+        # Walk the ring until capacity is used up or nobody eligible is waiting
+        skipped = 0
+        while self.in_flight < self.capacity and self._ring and skipped < len(self._ring):
+            key = self._ring[0]
+            client = self._clients[key]
+            if not client.waiters:
+                self._ring.popleft()
+                self._credit = 0
+                skipped = 0
+                self._forget_if_idle(key)
+                continue
+            if client.in_flight >= self.per_client_limit:
+                self._ring.rotate(-1)
+                self._credit = 0
+                skipped += 1
+                continue
+            if self._credit <= 0:
+                self._credit = client.weight
+            waiter = client.waiters.popleft()
+            self._grant(client)
+            waiter.set_result(None)
+            skipped = 0
+            self._credit -= 1
+            if not client.waiters:
+                self._ring.popleft()
+                self._credit = 0
+            elif self._credit <= 0:
+                self._ring.rotate(-1)
+
+    def slot(self) -> _Slot:
+        return _Slot(self)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "granted": self.granted,
+            "queued": self.queued,
+            "mean_queue_wait": self.wait_time / self.queued if self.queued else 0.0,
+            "waiting": sum(len(c.waiters) for c in self._clients.values()),
+            "active_clients": len(self._clients),
+            "clients": {
+                key: {"in_flight": c.in_flight, "waiting": len(c.waiters), "weight": c.weight}
+                for key, c in self._clients.items()
+            },
+        }
@@ -0,0 +1,285 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+import asyncio
+import gzip
+import hashlib
+import threading
+import time
+from fastapi import Request
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+from app.core.config import settings
+from app.core.pagination import keyset_page
+from app.db.base import get_async_session_factory, utcnow
+from app.models.generation import Generation, GenerationArtifact
+from app.schemas.website import WebsiteRequest
+from app.services.prompts import UsageTally, current_usage
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; artifacts are then stored gzip-compressed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+GENERATION_HISTORY_ENABLED = settings.GENERATION_HISTORY_ENABLED
+GENERATION_FLUSH_BATCH = settings.GENERATION_FLUSH_BATCH
+GENERATION_FLUSH_INTERVAL = settings.GENERATION_FLUSH_INTERVAL
+GENERATION_BUFFER_MAX = settings.GENERATION_BUFFER_MAX
+GENERATION_ZSTD_LEVEL = settings.GENERATION_ZSTD_LEVEL
+GENERATION_KNOWN_DIGESTS = settings.GENERATION_KNOWN_DIGESTS
+
+ARTIFACT_KINDS = ("html", "css", "js")
+
+
+def compress(body: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=GENERATION_ZSTD_LEVEL).compress(body)
+    return "gzip", gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed; cannot read zstd artifacts")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+def insert_ignoring_duplicates(dialect: str, model):
+    """INSERT that skips rows whose primary key exists, e.g. written by another worker."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Generation history does not support {dialect}")
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+class GenerationRecorder:
+    """Record generations to the database in batches, off the response path.
+
+    ``record`` only appends to an in-memory buffer; a background task
+    compresses the artifacts on an executor thread and writes each batch in
+    one transaction. Artifact bodies are keyed by the sha256 of their
+    content, so a template served many times is stored once. Buffered
+    generations are lost if the process dies before the next flush.
+    """
+
+    def __init__(
+        self,
+        flush_batch: int = GENERATION_FLUSH_BATCH,
+        flush_interval: float = GENERATION_FLUSH_INTERVAL,
+        buffer_max: int = GENERATION_BUFFER_MAX,
+    ):
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self.buffer_max = buffer_max
+        self._pending: Deque[Tuple[dict, Dict[str, Optional[str]]]] = deque()
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        # _known is read on executor threads and updated on the event loop
+        self._known_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.artifacts_stored = 0
+        self.artifacts_deduplicated = 0
+        self.bytes_in = 0
+        self.bytes_stored = 0
+
+    def record(
+        self,
+        request: WebsiteRequest,
+        result: dict,
+        cache_status: str,
+        latency: float,
+        usage: Optional[UsageTally] = None,
+        model: Optional[str] = None,
+        client: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ):
+        """Queue one generation for the next flush; never blocks or raises."""
+        if len(self._pending) >= self.buffer_max:
+            self.dropped += 1
+            return
+        row = {
+            "user_id": user_id,
+            "client": client,
+            "business_type": request.business_type,
+            "description": request.description,
+            "request": request.model_dump(),
+            "model": usage.model if usage is not None and usage.model else model,
+            "cache_status": cache_status,
+            "partial": bool(result.get("partial")),
+            "llm_calls": usage.calls if usage is not None else 0,
+            "input_tokens": usage.input_tokens if usage is not None else 0,
+            "output_tokens": usage.output_tokens if usage is not None else 0,
+            "latency_ms": latency * 1000,
+            # The time of the generation, not of the flush that writes it
+            "created_at": utcnow(),
+        }
+        self._pending.append((row, {kind: result.get(kind) for kind in ARTIFACT_KINDS}))
+        self.recorded += 1
+        if len(self._pending) >= self.flush_batch:
+            self._wakeup.set()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="generation-recorder")
+
+    async def stop(self):
+        """Stop the background task and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        while self._pending:
+            batch = [self._pending.popleft() for _ in range(min(self.flush_batch, len(self._pending)))]
+            try:
+                await self._write(batch)
+                self.written += len(batch)
+            except Exception as e:
+                # History is best effort: a failing database must not back up generation
+                logger.error("Writing %d generations failed: %s", len(batch), e)
+                self.failed += len(batch)
+            self.flushes += 1
+
+    def _is_known(self, digest: str) -> bool:
+        with self._known_lock:
+            return digest in self._known
+
+    def _remember(self, digests: List[str]):
+        with self._known_lock:
+            for digest in digests:
+                self._known[digest] = None
+                self._known.move_to_end(digest)
+            while len(self._known) > GENERATION_KNOWN_DIGESTS:
+                self._known.popitem(last=False)
+
+    def _prepare(self, batch: List[Tuple[dict, Dict[str, Optional[str]]]]) -> Tuple[List[dict], List[dict]]:
+        """Hash and compress a batch; runs on an executor thread."""
+        artifacts: Dict[str, dict] = {}
+        generations = []
+        for row, bodies in batch:
+            row = dict(row)
+            for kind, text in bodies.items():
+                if not text:
+                    row[f"{kind}_digest"] = None
+                    continue
+                body = text.encode()
+                digest = hashlib.sha256(body).hexdigest()
+                row[f"{kind}_digest"] = digest
+                if digest in artifacts or self._is_known(digest):
+                    self.artifacts_deduplicated += 1
+                    continue
+                encoding, data = compress(body)
+                artifacts[digest] = {
+                    "digest": digest,
+                    "kind": kind,
+                    "encoding": encoding,
+                    "size": len(body),
+                    "compressed_size": len(data),
+                    "body": data,
+                }
+            generations.append(row)
+        return list(artifacts.values()), generations
+
+    async def _write(self, batch):
+        loop = asyncio.get_running_loop()
+        artifacts, generations = await loop.run_in_executor(None, self._prepare, batch)
+        async with get_async_session_factory()() as db:
+            if artifacts:
+                await db.execute(insert_ignoring_duplicates(db.bind.dialect.name, GenerationArtifact), artifacts)
+            await db.execute(insert(Generation), generations)
+            await db.commit()
+        self._remember([artifact["digest"] for artifact in artifacts])
+        self.artifacts_stored += len(artifacts)
+        self.bytes_in += sum(artifact["size"] for artifact in artifacts)
+        self.bytes_stored += sum(artifact["compressed_size"] for artifact in artifacts)
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "artifacts_stored": self.artifacts_stored,
+            "artifacts_deduplicated": self.artifacts_deduplicated,
+            "compression_ratio": self.bytes_in / self.bytes_stored if self.bytes_stored else None,
+            "compression": "zstd" if zstandard is not None else "gzip",
+        }
+
+
+class GenerationTimer:
+    """Measure one generation and collect its token usage for the recorder.
+
+    Used as ``with GenerationTimer() as timer:`` around the generation; the
+    usage tally is active inside the block.
+    """
+
+    def __init__(self):
+        self.usage = UsageTally()
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._token = None
+
+    def __enter__(self) -> "GenerationTimer":
+        self._token = current_usage.set(self.usage)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        current_usage.reset(self._token)
+
+
+async def get_generations_page(
+    db: AsyncSession,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[Generation], Optional[str]]:
+    """One page of the user's generations, newest first."""
+    query = select(Generation).where(Generation.user_id == user_id)
+    return await keyset_page(db, query, Generation, cursor, limit, descending=True)
+
+
+async def get_generation(db: AsyncSession, generation_id: int, user_id: int) -> Optional[Generation]:
+    generation = await db.get(Generation, generation_id)
+    if generation is None or generation.user_id != user_id:
+        return None
+    return generation
+
+
+async def get_artifact(db: AsyncSession, digest: str) -> Optional[GenerationArtifact]:
+    return await db.get(GenerationArtifact, digest)
+
+
+def create_generation_recorder() -> Optional[GenerationRecorder]:
+    return GenerationRecorder() if GENERATION_HISTORY_ENABLED else None
+
+
+def get_generation_recorder(request: Request) -> Optional[GenerationRecorder]:
+    return getattr(request.app.state, "generation_recorder", None)
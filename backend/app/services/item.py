@@ -1,7 +1,10 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from ..models.item import Item
 from ..schemas.item import ItemCreate, ItemUpdate
+from ..core.pagination import keyset_page
 
 def create_item(db: Session, item: ItemCreate, owner_id: int) -> Item:
     db_item = Item(**item.dict(), owner_id=owner_id)
@@ -18,3 +21,56 @@ def get_items(db: Session, skip: int = 0, limit: int = 100) -> List[Item]:
 
 def get_user_items(db: Session, user_id: int) -> List[Item]:
     return db.query(Item).filter(Item.owner_id == user_id).all()
+
+# Async equivalents for endpoints running on AsyncSession
+
+async def create_item_async(db: AsyncSession, item: ItemCreate, owner_id: int) -> Item:
+    db_item = Item(**item.dict(), owner_id=owner_id)
+    db.add(db_item)
+    await db.commit()
+    await db.refresh(db_item)
+    return db_item
+
+async def get_item_async(db: AsyncSession, item_id: int) -> Optional[Item]:
+    return await db.get(Item, item_id)
+
+async def get_user_items_async(db: AsyncSession, user_id: int) -> List[Item]:
+    result = await db.execute(select(Item).where(Item.owner_id == user_id))
+    return list(result.scalars().all())
+
+async def get_items_page_async(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    owner_id: Optional[int] = None
+) -> Tuple[List[Item], Optional[str]]:
+    query = select(Item)
+    if owner_id is not None:
+        query = query.where(Item.owner_id == owner_id)
+    return await keyset_page(db, query, Item, cursor, limit)
+
+async def create_items_bulk_async(db: AsyncSession, items: List[ItemCreate], owner_id: int) -> List[Item]:
+    rows = [{**item.dict(), "owner_id": owner_id} for item in items]
+    # One multi-row INSERT ... RETURNING in a single transaction
+    result = await db.scalars(insert(Item).returning(Item, sort_by_parameter_order=True), rows)
+    db_items = list(result.all())
+    await db.commit()
+    return db_items
+
+async def iter_item_batches_async(
+    db: AsyncSession,
+    owner_id: Optional[int] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[List[Item]]:
+    """Yield items in fixed-size batches from a server-side cursor.
+
+    Owners come from the same query via a many-to-one join, so serializing
+    ``item.owner`` never issues a query per row. The identity map only holds
+    weak references, so each batch is freed once the caller drops it.
+    """
+    query = select(Item).options(joinedload(Item.owner)).order_by(Item.id)
+    if owner_id is not None:
+        query = query.where(Item.owner_id == owner_id)
+    result = await db.stream_scalars(query.execution_options(yield_per=batch_size))
+    async for batch in result.partitions():
+        yield batch
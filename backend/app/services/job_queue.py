@@ -0,0 +1,177 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import time
+import uuid
+from fastapi import HTTPException, Request
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+JOB_MAX_CONCURRENCY = settings.JOB_MAX_CONCURRENCY
+JOB_QUEUE_DEPTH = settings.JOB_QUEUE_DEPTH
+JOB_RESULT_TTL = settings.JOB_RESULT_TTL
+JOB_DRAIN_TIMEOUT = settings.JOB_DRAIN_TIMEOUT
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, fn: Callable[[], Awaitable[Any]], client: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        # Rate limiting client key of the submitter; only they can read the job
+        self.client = client
+        self.status = "queued"
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._fn = fn
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """In-process job queue: a bounded asyncio.Queue drained by a fixed worker pool.
+
+    Needs no external broker, so jobs do not survive a restart and are only
+    visible to the worker process that accepted them.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = JOB_MAX_CONCURRENCY,
+        max_queue_depth: int = JOB_QUEUE_DEPTH,
+        result_ttl: float = JOB_RESULT_TTL,
+        drain_timeout: float = JOB_DRAIN_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.result_ttl = result_ttl
+        self.drain_timeout = drain_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_depth)
+        self._jobs: Dict[str, Job] = {}
+        self._workers = []
+        self._pruner: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.interrupted = 0
+
+    async def start(self):
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+        self._pruner = asyncio.create_task(self._prune_periodically(), name="job-pruner")
+
+    async def stop(self):
+        """Stop taking jobs, give queued and running ones ``drain_timeout`` to finish, fail the rest."""
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Job queue did not drain within %gs; failing unfinished jobs", self.drain_timeout)
+        tasks = self._workers + ([self._pruner] if self._pruner is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._pruner = None
+        # Whatever is still queued never started; record it rather than leave it "queued" for good
+        while not self._queue.empty():
+            self._interrupt(self._queue.get_nowait())
+            self._queue.task_done()
+
+    def submit(self, fn: Callable[[], Awaitable[Any]], client: Optional[str] = None) -> Job:
+        if self._stopping:
+            raise QueueFullError("Job queue is shutting down")
+        self._prune()
+        job = Job(fn, client)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Job queue is full")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str, client: Optional[str] = None) -> Optional[Job]:
+        """The job ``job_id`` if ``client`` submitted it; None otherwise, as if it did not exist."""
+        job = self._jobs.get(job_id)
+        if job is None or job.client != client or self._expired(job, time.time() - self.result_ttl):
+            return None
+        return job
+
+    def stats(self) -> dict:
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            **counts,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self._queue.maxsize,
+            "max_concurrency": self.max_concurrency,
+            "interrupted": self.interrupted,
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await job._fn()
+                job.status = "succeeded"
+            except asyncio.CancelledError:
+                # Shutdown gave up waiting on it
+                self._interrupt(job)
+                raise
+            except HTTPException as e:
+                job.status = "failed"
+                job.error = str(e.detail)
+            except Exception as e:
+                logger.error("Job %s failed: %s", job.id, e)
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                job._fn = None
+                self._queue.task_done()
+
+    def _interrupt(self, job: Job):
+        job.status = "failed"
+        job.error = "Interrupted by server shutdown; submit the job again"
+        job.finished_at = time.time()
+        job._fn = None
+        self.interrupted += 1
+
+    @staticmethod
+    def _expired(job: Job, cutoff: float) -> bool:
+        return job.finished_at is not None and job.finished_at < cutoff
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if self._expired(job, cutoff)]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _prune_periodically(self):
+        # Submissions prune too, but a queue nobody submits to would keep its results forever
+        while True:
+            await asyncio.sleep(min(60.0, self.result_ttl))
+            self._prune()
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
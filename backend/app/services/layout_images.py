@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Tuple
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import math
+import threading
+from fastapi import Request
+from starlette.datastructures import UploadFile
+import logging
+from app.core.config import settings
+from app.services.artifacts import Artifact, ArtifactStore, digest_of, is_digest
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+LAYOUT_IMAGE_MAX_BYTES = settings.LAYOUT_IMAGE_MAX_BYTES
+LAYOUT_IMAGE_MAX_PIXELS = settings.LAYOUT_IMAGE_MAX_PIXELS
+LAYOUT_IMAGE_MAX_EDGE = settings.LAYOUT_IMAGE_MAX_EDGE
+LAYOUT_IMAGE_JPEG_QUALITY = settings.LAYOUT_IMAGE_JPEG_QUALITY
+LAYOUT_IMAGE_DEDUP_DISTANCE = settings.LAYOUT_IMAGE_DEDUP_DISTANCE
+LAYOUT_IMAGE_INDEX_SIZE = settings.LAYOUT_IMAGE_INDEX_SIZE
+
+_READ_CHUNK = 1024 * 1024
+
+
+class LayoutImageError(ValueError):
+    """The upload is not an image we can use."""
+
+
+class LayoutImage:
+    """A layout image prepared for the model: downscaled, re-encoded and content-addressed."""
+
+    def __init__(self, digest: str, kind: str, body: bytes, width: int, height: int):
+        self.digest = digest
+        self.kind = kind
+        self.body = body
+        self.width = width
+        self.height = height
+
+    @property
+    def media_type(self) -> str:
+        return f"image/{self.kind}"
+
+    @property
+    def tokens(self) -> int:
+        # Anthropic's published estimate for image input
+        return (self.width * self.height + 749) // 750
+
+    def content_block(self) -> dict:
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": self.media_type,
+                "data": base64.b64encode(self.body).decode("ascii"),
+            },
+        }
+
+
+def difference_hash(image) -> int:
+    """64-bit dHash: brightness gradients of a 9x8 greyscale thumbnail.
+
+    Survives re-encoding and resizing, so the same screenshot uploaded as a
+    PNG and as a smaller JPEG hashes (nearly) the same.
+    """
+    from PIL import Image
+
+    pixels = list(image.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            value = (value << 1) | (left > pixels[row * 9 + col + 1])
+    return value
+
+
+def prepare_image(source: BinaryIO) -> Tuple[LayoutImage, int]:
+    """Decode, downscale and re-encode an upload; returns the image and its dHash.
+
+    Blocking and CPU-bound; run it in an executor.
+    """
+    # Imported here: only requests with an image pay for Pillow
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        image = Image.open(source)
+    except (UnidentifiedImageError, OSError) as e:
+        raise LayoutImageError("layout_image is not a supported image") from e
+
+    with image:
+        if image.width * image.height > LAYOUT_IMAGE_MAX_PIXELS:
+            raise LayoutImageError(
+                f"layout_image is too large ({image.width}x{image.height}, "
+                f"maximum is {LAYOUT_IMAGE_MAX_PIXELS} pixels)"
+            )
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale, which skips most
+        # of the work and memory for large photos; a no-op for other formats.
+        # The draft never goes below the requested size, so ask for the
+        # downscaled size itself rather than the bounding box
+        scale = min(1.0, LAYOUT_IMAGE_MAX_EDGE / max(image.size))
+        image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        try:
+            image.load()
+        except OSError as e:
+            raise LayoutImageError("layout_image could not be decoded") from e
+
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            # Canvas exports are often transparent; flatten onto white as the page would show it
+            rgba = image.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, (255, 255, 255))
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            prepared = flat
+        else:
+            prepared = image.convert("RGB")
+    prepared.thumbnail((LAYOUT_IMAGE_MAX_EDGE, LAYOUT_IMAGE_MAX_EDGE), Image.LANCZOS)
+
+    out = io.BytesIO()
+    if prepared.getcolors(256) is not None:
+        # Flat wireframes and diagrams: lossless and smaller as a palette PNG
+        prepared.convert("P", palette=Image.ADAPTIVE, colors=256).save(out, "PNG", optimize=True)
+        kind = "png"
+    else:
+        prepared.save(out, "JPEG", quality=LAYOUT_IMAGE_JPEG_QUALITY, optimize=True)
+        kind = "jpeg"
+    body = out.getvalue()
+    return LayoutImage(digest_of(body), kind, body, prepared.width, prepared.height), difference_hash(prepared)
+
+
+def decode_inline(data: str) -> bytes:
+    """Bytes of a base64 string or ``data:`` URL sent in the JSON body."""
+    if data.startswith("data:"):
+        data = data.partition(",")[2]
+    if len(data) * 3 // 4 > LAYOUT_IMAGE_MAX_BYTES:
+        raise LayoutImageError(f"layout_image is larger than {LAYOUT_IMAGE_MAX_BYTES} bytes")
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise LayoutImageError("layout_image is neither an uploaded image id nor valid base64") from e
+
+
+class LayoutImageStore:
+    """Prepare layout images once and keep them in an artifact store.
+
+    The store is their own, not the previews': uploads are not public, so
+    they must not be served at /website/preview/{digest}. Images are addressed by the sha256 of their prepared bytes, so an id
+    returned by the upload endpoint works on every worker sharing the store.
+    Two per-worker indexes skip the decode for repeats: the sha256 of the
+    raw upload, and the perceptual hash of the decoded image, which also
+    catches the same layout re-exported at another size or format.
+    """
+
+    def __init__(self, store: ArtifactStore, index_size: int = LAYOUT_IMAGE_INDEX_SIZE):
+        self.store = store
+        self.index_size = index_size
+        self._by_upload: "OrderedDict[str, str]" = OrderedDict()
+        self._by_hash: "OrderedDict[int, str]" = OrderedDict()
+        # Ingestion runs on executor threads
+        self._lock = threading.Lock()
+        self.ingested = 0
+        self.deduplicated = 0
+        self.source_bytes = 0
+        self.prepared_bytes = 0
+
+    def _remember(self, index: OrderedDict, key, digest: str):
+        with self._lock:
+            index[key] = digest
+            index.move_to_end(key)
+            while len(index) > self.index_size:
+                index.popitem(last=False)
+
+    def _similar(self, phash: int) -> Optional[str]:
+        with self._lock:
+            if LAYOUT_IMAGE_DEDUP_DISTANCE <= 0:
+                return self._by_hash.get(phash)
+            for known, digest in self._by_hash.items():
+                if bin(known ^ phash).count("1") <= LAYOUT_IMAGE_DEDUP_DISTANCE:
+                    return digest
+            return None
+
+    def get(self, digest: str) -> Optional[LayoutImage]:
+        """The stored image ``digest``, or None.
+
+        Blocking: reads the store and decodes the image header. Run it in an executor.
+        """
+        if not is_digest(digest):
+            return None
+        artifact = self.store.get(digest)
+        if artifact is None or artifact.kind not in ("jpeg", "png"):
+            return None
+        from PIL import Image
+
+        with Image.open(io.BytesIO(artifact.body)) as image:
+            width, height = image.size
+        return LayoutImage(digest, artifact.kind, artifact.body, width, height)
+
+    def _known(self, digest: Optional[str]) -> Optional[LayoutImage]:
+        image = self.get(digest) if digest else None
+        if image is not None:
+            self.deduplicated += 1
+        return image
+
+    def _ingest_sync(self, source: BinaryIO, upload_digest: str, size: int) -> Tuple[LayoutImage, bool]:
+        with self._lock:
+            known = self._by_upload.get(upload_digest)
+        image = self._known(known)
+        if image is not None:
+            return image, True
+
+        image, phash = prepare_image(source)
+        similar = self._known(self._similar(phash))
+        if similar is not None:
+            self._remember(self._by_upload, upload_digest, similar.digest)
+            return similar, True
+
+        self.store.put(Artifact(image.digest, image.kind, image.body, {}))
+        self._remember(self._by_upload, upload_digest, image.digest)
+        self._remember(self._by_hash, phash, image.digest)
+        self.ingested += 1
+        self.source_bytes += size
+        self.prepared_bytes += len(image.body)
+        logger.info(
+            "Prepared layout image %s: %d bytes -> %dx%d %s, %d bytes",
+            image.digest[:12], size, image.width, image.height, image.kind, len(image.body)
+        )
+        return image, False
+
+    async def ingest_upload(self, upload: UploadFile) -> Tuple[LayoutImage, bool]:
+        """Hash and size-check a multipart upload chunk by chunk, then prepare it.
+
+        The multipart parser has already spooled the body to a temporary file
+        (in memory only below 1 MB), so the raw upload is never held whole.
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        while chunk := await upload.read(_READ_CHUNK):
+            size += len(chunk)
+            if size > LAYOUT_IMAGE_MAX_BYTES:
+                raise LayoutImageError(f"layout_image is larger than {LAYOUT_IMAGE_MAX_BYTES} bytes")
+            hasher.update(chunk)
+        if size == 0:
+            raise LayoutImageError("layout_image is empty")
+        await upload.seek(0)
+
+        loop = asyncio.get_running_loop()
+        # Decoding and resampling a large image takes tens of milliseconds
+        return await loop.run_in_executor(None, self._ingest_sync, upload.file, hasher.hexdigest(), size)
+
+    async def resolve(self, layout_image: str) -> LayoutImage:
+        """The image for a request's ``layout_image``: an uploaded id or inline base64."""
+        loop = asyncio.get_running_loop()
+        if is_digest(layout_image):
+            image = await loop.run_in_executor(None, self.get, layout_image)
+            if image is None:
+                raise LayoutImageError("Unknown layout_image id; upload the image again")
+            return image
+        data = decode_inline(layout_image)
+        image, _ = await loop.run_in_executor(
+            None, self._ingest_sync, io.BytesIO(data), hashlib.sha256(data).hexdigest(), len(data)
+        )
+        return image
+
+    def stats(self) -> dict:
+        return {
+            "ingested": self.ingested,
+            "deduplicated": self.deduplicated,
+            "source_bytes": self.source_bytes,
+            "prepared_bytes": self.prepared_bytes,
+        }
+
+
+def get_layout_image_store(request: Request) -> Optional[LayoutImageStore]:
+    return getattr(request.app.state, "layout_images", None)
@@ -0,0 +1,68 @@
+from typing import TYPE_CHECKING, Optional
+import logging
+from fastapi import FastAPI
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+LLM_MAX_CONNECTIONS = settings.LLM_MAX_CONNECTIONS
+LLM_MAX_KEEPALIVE_CONNECTIONS = settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+LLM_KEEPALIVE_EXPIRY = settings.LLM_KEEPALIVE_EXPIRY
+LLM_TIMEOUT = settings.LLM_TIMEOUT
+
+
+def load_api_key() -> str:
+    api_key = settings.ANTHROPIC_API_KEY
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
+
+    # Clean the API key (remove quotes and whitespace)
+    api_key = api_key.strip().replace('"', '')
+
+    # Validate API key format
+    if not api_key.startswith('sk-ant-api'):
+        raise ValueError("Invalid API key format. It should start with 'sk-ant-api'")
+
+    return api_key
+
+
+def create_llm_client() -> "AsyncAnthropic":
+    """Build the process-wide Anthropic client on top of a keep-alive httpx pool."""
+    # Imported here: the SDK and httpx are among the slowest imports in the
+    # app and only generation endpoints need them
+    import httpx
+    from anthropic import AsyncAnthropic
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+    )
+    # Retries are owned by the call policy (app.services.call_policy)
+    client = AsyncAnthropic(api_key=load_api_key(), http_client=http_client, max_retries=0)
+    logger.info("Successfully initialized Anthropic client")
+    return client
+
+
+def get_llm_client(app: FastAPI) -> Optional["AsyncAnthropic"]:
+    """The worker's shared client, created on first use instead of at startup.
+
+    A configuration error is remembered in ``app.state.llm_client_error``
+    rather than retried on every request.
+    """
+    state = app.state
+    if getattr(state, "llm_client", None) is None and getattr(state, "llm_client_error", None) is None:
+        try:
+            state.llm_client = create_llm_client()
+        except ValueError as e:
+            logger.error("Failed to initialize Anthropic client: %s", e)
+            state.llm_client = None
+            state.llm_client_error = str(e)
+    return state.llm_client
@@ -0,0 +1,98 @@
+from typing import List
+import re
+from app.core.config import settings
+
+# See app.core.config for what each of these does
+TEMPLATE_MINIFY = settings.TEMPLATE_MINIFY
+
+# Whitespace next to these tags never renders, so it can be dropped entirely
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "dd", "details", "div",
+    "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3",
+    "h4", "h5", "h6", "head", "header", "hr", "html", "li", "link", "main", "meta",
+    "nav", "ol", "option", "p", "script", "section", "select", "style", "summary",
+    "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul", "!doctype",
+}
+
+_CSS_STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+_CSS_COMMENT_RE = re.compile(rf"({_CSS_STRING})|/\*.*?(?:\*/|$)", re.S)
+_CSS_STRING_RE = re.compile(rf"({_CSS_STRING})")
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON_RE = re.compile(r":\s+")
+
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+# Elements whose content is whitespace-sensitive or not HTML
+_HTML_RAW_RE = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)", re.I | re.S)
+_HTML_TAG_RE = re.compile(r"(<[^>]+>)")
+_TAG_NAME_RE = re.compile(r"</?\s*([!\w-]+)")
+_STYLE_BODY_RE = re.compile(r"(<style\b[^>]*>)(.*?)(</style\s*>)", re.I | re.S)
+
+
+def _squeeze_css(css: str) -> str:
+    css = " ".join(css.split())
+    css = _CSS_PUNCTUATION_RE.sub(r"\1", css)
+    return _CSS_COLON_RE.sub(":", css).replace(";}", "}")
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace, leaving string literals untouched."""
+    if not css:
+        return css
+    css = _CSS_COMMENT_RE.sub(lambda m: m.group(1) or " ", css)
+    parts = _CSS_STRING_RE.split(css)
+    # split() with one group alternates plain text and string literals
+    return "".join(
+        part if index % 2 else _squeeze_css(part) for index, part in enumerate(parts)
+    ).strip()
+
+
+def _is_block(tag: str) -> bool:
+    match = _TAG_NAME_RE.match(tag)
+    return bool(match) and match.group(1).lower() in BLOCK_TAGS
+
+
+def _minify_markup(html: str) -> str:
+    tokens: List[str] = _HTML_TAG_RE.split(_HTML_COMMENT_RE.sub("", html))
+    # tokens alternate text, tag, text, ...; text nodes sit at even indexes
+    for index in range(0, len(tokens), 2):
+        text = tokens[index]
+        if not text:
+            continue
+        before = tokens[index - 1] if index else ""
+        after = tokens[index + 1] if index + 1 < len(tokens) else ""
+        collapsed = " ".join(text.split())
+        leading = " " if text[0].isspace() and before and not _is_block(before) else ""
+        trailing = " " if text[-1].isspace() and after and not _is_block(after) else ""
+        if collapsed:
+            tokens[index] = leading + collapsed + trailing
+        else:
+            tokens[index] = " " if leading and trailing else ""
+    return "".join(tokens)
+
+
+def minify_html(html: str) -> str:
+    """Strip comments and collapse whitespace, keeping <pre>, <textarea> and scripts as-is.
+
+    Whitespace between inline content is collapsed to a single space rather
+    than removed, so the rendered text does not change.
+    """
+    if not html:
+        return html
+    parts = _HTML_RAW_RE.split(html)
+    out = []
+    # split() with two groups yields text, raw element, tag name, text, ...
+    for index in range(0, len(parts), 3):
+        out.append(_minify_markup(parts[index]))
+        if index + 1 < len(parts):
+            raw = parts[index + 1]
+            if parts[index + 2].lower() == "style":
+                raw = _STYLE_BODY_RE.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), raw)
+            out.append(raw)
+    return "".join(out).strip()
+
+
+def minify_template(result: dict) -> dict:
+    """Minify the html/css of a generated template; JS is left as generated."""
+    if not TEMPLATE_MINIFY:
+        return result
+    return {**result, "html": minify_html(result["html"]), "css": minify_css(result["css"])}
@@ -0,0 +1,406 @@
+from contextvars import ContextVar
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+import math
+import logging
+from app.core.config import settings
+from app.core.metrics import LLM_TOKENS
+from app.schemas.website import WebsiteRequest
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+OUTPUT_TOKENS_BASE = settings.OUTPUT_TOKENS_BASE
+OUTPUT_TOKENS_PER_FEATURE = settings.OUTPUT_TOKENS_PER_FEATURE
+OUTPUT_TOKENS_MIN = settings.OUTPUT_TOKENS_MIN
+OUTPUT_TOKENS_MAX = settings.OUTPUT_TOKENS_MAX
+MAX_DESCRIPTION_TOKENS = settings.MAX_DESCRIPTION_TOKENS
+MAX_FEATURES = settings.MAX_FEATURES
+OVERSIZE_POLICY = settings.PROMPT_OVERSIZE_POLICY
+
+WEBSITE_REQUEST_PROMPT = """
+Create a modern, responsive website for a {business_type} with the following description:
+{description}
+
+Style preferences: {style_preferences}
+Features requested: {features}
+{layout}{examples}
+"""
+
+# The fixed part of the website prompt; batch generation sends it as a
+# system prompt so it is a prefix shared (and cached upstream) across calls
+WEBSITE_INSTRUCTIONS = """Please include:
+- A clean, modern design
+- Responsive layout using modern CSS (flexbox/grid)
+- Semantic HTML5 elements
+- Interactive elements
+- Proper spacing and typography
+
+Return the complete HTML and CSS code in the following format:
+
+HTML:
+```html
+[Your HTML code here]
+```
+
+CSS:
+```css
+[Your CSS code here]
+```
+"""
+
+WEBSITE_PROMPT = WEBSITE_REQUEST_PROMPT + WEBSITE_INSTRUCTIONS
+
+# Appended after the shared request text for each variant of a batch request
+VARIANT_INSTRUCTION = (
+    "This is design variant {number} of {count}. Choose a visual direction (colour palette, typography, "
+    "layout) clearly different from the other variants while meeting the same brief.\n"
+)
+
+
+REPAIR_PROMPT = """
+The website code below for a {business_type} is incomplete: the {sections} code is missing or was cut off.
+Style preferences: {style_preferences}
+
+Existing code:
+{context}
+
+Return only the complete {sections} code, each in its own fenced block labelled {labels}.
+"""
+
+REPAIR_OUTPUT_TOKENS = settings.REPAIR_OUTPUT_TOKENS
+
+# Sectioned generation: the page shell and each section are separate calls
+SHELL_PROMPT = """
+Create the page shell of a modern, responsive website for a {business_type}:
+{description}
+
+Style preferences: {style_preferences}
+{layout}
+The page will contain these sections, in order: {sections}.
+Write only:
+- The full HTML document: <head>, a header with navigation linking to #{section_ids}, a <main> element whose only content is the comment <!-- SECTIONS -->, and a footer
+- The global CSS: :root custom properties (--color-primary, --color-accent, --color-text, --color-bg, --font-body, --font-heading, --space-unit), base typography, and the header, navigation and footer styles
+
+Return the HTML and CSS in the following format:
+
+HTML:
+```html
+[Your HTML code here]
+```
+
+CSS:
+```css
+[Your CSS code here]
+```
+"""
+
+SECTION_PROMPT = """
+Create only the "{section}" section of a modern, responsive website for a {business_type}:
+{description}
+
+Style preferences: {style_preferences}
+
+Write a single <section id="{section_id}" class="{section_id}"> element with semantic HTML5 content.
+Its CSS must only contain rules scoped under .{section_id} and must use the page's custom properties
+(var(--color-primary), var(--color-accent), var(--color-text), var(--color-bg), var(--font-body),
+var(--font-heading), var(--space-unit)); do not style :root, html, body, header, nav or footer.
+
+Return the HTML and CSS in the following format:
+
+HTML:
+```html
+[Your HTML code here]
+```
+
+CSS:
+```css
+[Your CSS code here]
+```
+"""
+
+# Few-shot context from the similarity index (see app.services.similarity_index)
+EXAMPLES_INSTRUCTION = "\nFor reference, websites generated for similar requests. Reuse their structure and class names where they fit, but write new content:\n"
+EXAMPLE_BLOCK = "```html\n{html}\n```\n```css\n{css}\n```\n"
+
+# Added to the website and shell prompts when the request has a layout image
+LAYOUT_INSTRUCTION = "Follow the layout of the attached image: the arrangement, order and relative size of its sections.\n"
+
+SHELL_OUTPUT_TOKENS = settings.SHELL_OUTPUT_TOKENS
+SECTION_OUTPUT_TOKENS = settings.SECTION_OUTPUT_TOKENS
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters or ~0.75 words per token)."""
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+
+class CompiledPrompt:
+    """A format-style template split once into literal text and field slots."""
+
+    def __init__(self, template: str):
+        self.parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(template)
+        ]
+        self.fields = {field for _, field in self.parts if field}
+        # Tokens contributed by the fixed text, counted once instead of per call
+        self.static_tokens = estimate_tokens("".join(literal for literal, _ in self.parts))
+
+    def render(self, **values: str) -> str:
+        return "".join(
+            literal + (values[field] if field else "")
+            for literal, field in self.parts
+        )
+
+
+_compiled: Dict[str, CompiledPrompt] = {}
+
+
+def compile_prompts():
+    """Compile every prompt template; called once from the app lifespan."""
+    _compiled["website"] = CompiledPrompt(WEBSITE_PROMPT)
+    _compiled["website_request"] = CompiledPrompt(WEBSITE_REQUEST_PROMPT)
+    _compiled["repair"] = CompiledPrompt(REPAIR_PROMPT)
+    _compiled["shell"] = CompiledPrompt(SHELL_PROMPT)
+    _compiled["section"] = CompiledPrompt(SECTION_PROMPT)
+
+
+def get_prompt(name: str) -> CompiledPrompt:
+    if name not in _compiled:
+        compile_prompts()
+    return _compiled[name]
+
+
+class GenerationPlan:
+    def __init__(
+        self,
+        prompt: str,
+        input_tokens: int,
+        max_tokens: int,
+        trimmed: bool = False,
+        system: Optional[str] = None,
+        variant: Optional[str] = None
+    ):
+        self.prompt = prompt
+        self.input_tokens = input_tokens
+        self.max_tokens = max_tokens
+        self.trimmed = trimmed
+        # Batch calls only: the shared system prompt and the per-variant
+        # text sent after ``prompt`` (see TemplateGeneratorService)
+        self.system = system
+        self.variant = variant
+
+
+def _trim_to_tokens(text: str, tokens: int) -> str:
+    # Cut at a word boundary inside the character budget for ``tokens``
+    cut = text[:tokens * 4]
+    return cut.rsplit(" ", 1)[0] if " " in cut else cut
+
+
+def prepare_description(request: WebsiteRequest) -> Tuple[str, int, bool]:
+    """The description as sent upstream: (text, estimated tokens, whether it was trimmed).
+
+    Raises ValueError when it is over MAX_DESCRIPTION_TOKENS, unless the
+    oversize policy is "trim".
+    """
+    description = request.description.strip()
+    description_tokens = estimate_tokens(description)
+    if description_tokens <= MAX_DESCRIPTION_TOKENS:
+        return description, description_tokens, False
+    if OVERSIZE_POLICY != "trim":
+        raise ValueError(
+            f"Description is too long (~{description_tokens} tokens, "
+            f"maximum is {MAX_DESCRIPTION_TOKENS})"
+        )
+    description = _trim_to_tokens(description, MAX_DESCRIPTION_TOKENS)
+    return description, estimate_tokens(description), True
+
+
+def plan_generation(
+    request: WebsiteRequest,
+    examples: Optional[List[Tuple[str, str]]] = None,
+    variant: Optional[Tuple[int, int]] = None
+) -> GenerationPlan:
+    """Render the prompt and size the output budget for one request.
+
+    ``examples`` are (html, css) pairs of similar past templates to include
+    as few-shot context. ``variant`` is (number, count) for batch
+    generation: the fixed instructions then become the plan's system prompt
+    and the variant instruction follows the request text. Raises ValueError
+    for inputs too large to send, unless the oversize policy is "trim", in
+    which case the description is shortened.
+    """
+    features = [f.strip() for f in request.features or [] if f and f.strip()] or ["basic"]
+    if len(features) > MAX_FEATURES:
+        raise ValueError(f"Too many features requested (maximum is {MAX_FEATURES})")
+
+    description, description_tokens, trimmed = prepare_description(request)
+
+    template = get_prompt("website" if variant is None else "website_request")
+    values = {
+        "business_type": request.business_type,
+        "description": description,
+        "style_preferences": request.style_preferences or "",
+        "features": ", ".join(features),
+        "layout": LAYOUT_INSTRUCTION if request.layout_image else "",
+        "examples": EXAMPLES_INSTRUCTION + "".join(
+            EXAMPLE_BLOCK.format(html=html, css=css) for html, css in examples
+        ) if examples else "",
+    }
+    prompt = template.render(**values)
+    input_tokens = template.static_tokens + sum(estimate_tokens(v) for v in values.values())
+
+    # Longer descriptions tend to ask for more copy on the page
+    max_tokens = (
+        OUTPUT_TOKENS_BASE
+        + OUTPUT_TOKENS_PER_FEATURE * len(features)
+        + description_tokens // 2
+    )
+    max_tokens = max(OUTPUT_TOKENS_MIN, min(OUTPUT_TOKENS_MAX, max_tokens))
+    if variant is None:
+        return GenerationPlan(prompt, input_tokens, max_tokens, trimmed)
+
+    number, count = variant
+    variant_text = VARIANT_INSTRUCTION.format(number=number, count=count) if count > 1 else None
+    input_tokens += estimate_tokens(WEBSITE_INSTRUCTIONS) + estimate_tokens(variant_text)
+    return GenerationPlan(prompt, input_tokens, max_tokens, trimmed, WEBSITE_INSTRUCTIONS, variant_text)
+
+
+def plan_repair(request: WebsiteRequest, sections: Dict[str, str], repair: List[str]) -> GenerationPlan:
+    """Plan a follow-up call that regenerates only the ``repair`` sections.
+
+    ``sections`` holds what was already extracted and is sent back as context
+    (the HTML is what the CSS has to style, and vice versa).
+    """
+    context = "\n\n".join(
+        f"```{name}\n{code}\n```" for name, code in sections.items() if name not in repair and code
+    )
+    template = get_prompt("repair")
+    values = {
+        "business_type": request.business_type,
+        "style_preferences": request.style_preferences or "",
+        "sections": " and ".join(name.upper() for name in repair),
+        "labels": ", ".join(f"```{name}" for name in repair),
+        "context": context or "(none)",
+    }
+    prompt = template.render(**values)
+    input_tokens = template.static_tokens + sum(estimate_tokens(v) for v in values.values())
+    return GenerationPlan(prompt, input_tokens, min(REPAIR_OUTPUT_TOKENS, OUTPUT_TOKENS_MAX))
+
+
+def _plan_fixed(name: str, max_tokens: int, values: Dict[str, str], trimmed: bool = False) -> GenerationPlan:
+    template = get_prompt(name)
+    prompt = template.render(**values)
+    input_tokens = template.static_tokens + sum(estimate_tokens(v) for v in values.values())
+    return GenerationPlan(prompt, input_tokens, min(max_tokens, OUTPUT_TOKENS_MAX), trimmed)
+
+
+def plan_shell(request: WebsiteRequest, section_ids: List[str]) -> GenerationPlan:
+    description, _, trimmed = prepare_description(request)
+    return _plan_fixed("shell", SHELL_OUTPUT_TOKENS, {
+        "business_type": request.business_type,
+        "description": description,
+        "style_preferences": request.style_preferences or "",
+        "sections": ", ".join(section_ids),
+        "section_ids": ", #".join(section_ids),
+        "layout": LAYOUT_INSTRUCTION if request.layout_image else "",
+    }, trimmed)
+
+
+def plan_section(request: WebsiteRequest, section: str, section_id: str) -> GenerationPlan:
+    description, _, trimmed = prepare_description(request)
+    return _plan_fixed("section", SECTION_OUTPUT_TOKENS, {
+        "business_type": request.business_type,
+        "description": description,
+        "style_preferences": request.style_preferences or "",
+        "section": section,
+        "section_id": section_id,
+    }, trimmed)
+
+
+class UsageTally:
+    """Token usage of the LLM calls made for one generation (see current_usage)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.model: Optional[str] = None
+
+    def add(self, usage, model: str):
+        self.calls += 1
+        if usage is not None:
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+        # Fallbacks can switch models mid-generation; the last one is reported
+        self.model = model
+
+
+# Set around a generation to collect its usage; sectioned generation's
+# concurrent calls run in copies of the context and all add to the same tally
+current_usage: ContextVar[Optional[UsageTally]] = ContextVar("current_usage", default=None)
+
+
+class TokenUsageStats:
+    """Running totals of planned vs actual token usage reported by the API."""
+
+    def __init__(self):
+        self.calls = 0
+        self.estimated_input_tokens = 0
+        self.actual_input_tokens = 0
+        self.planned_output_tokens = 0
+        self.actual_output_tokens = 0
+        self.truncated = 0  # completions that hit max_tokens
+        # Prompt caching: input tokens written to and read from the upstream cache
+        self.cache_creation_input_tokens = 0
+        self.cache_read_input_tokens = 0
+
+    def record(
+        self,
+        estimated_input_tokens: Optional[int],
+        max_tokens: int,
+        usage,
+        stop_reason: Optional[str],
+        model: str = "unknown"
+    ):
+        self.calls += 1
+        tally = current_usage.get()
+        if tally is not None:
+            tally.add(usage, model)
+        self.estimated_input_tokens += estimated_input_tokens or 0
+        self.planned_output_tokens += max_tokens
+        if usage is not None:
+            self.actual_input_tokens += usage.input_tokens
+            self.actual_output_tokens += usage.output_tokens
+            LLM_TOKENS.labels(model, "input").inc(usage.input_tokens)
+            LLM_TOKENS.labels(model, "output").inc(usage.output_tokens)
+            # Only present when the call used prompt caching
+            cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+            cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+            self.cache_creation_input_tokens += cache_creation
+            self.cache_read_input_tokens += cache_read
+            if cache_creation:
+                LLM_TOKENS.labels(model, "cache_write").inc(cache_creation)
+            if cache_read:
+                LLM_TOKENS.labels(model, "cache_read").inc(cache_read)
+        if stop_reason == "max_tokens":
+            self.truncated += 1
+            logger.warning("Completion hit its max_tokens budget of %d", max_tokens)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "estimated_input_tokens": self.estimated_input_tokens,
+            "actual_input_tokens": self.actual_input_tokens,
+            "planned_output_tokens": self.planned_output_tokens,
+            "actual_output_tokens": self.actual_output_tokens,
+            "unused_output_budget": self.planned_output_tokens - self.actual_output_tokens,
+            "truncated": self.truncated,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+        }
+
+
+token_usage = TokenUsageStats()
@@ -0,0 +1,196 @@
+from typing import List, Optional, Tuple
+import asyncio
+import re
+import logging
+from app.core.config import settings
+from app.schemas.website import WebsiteRequest
+from app.services.layout_images import LayoutImage
+from app.services.prompts import plan_section, plan_shell
+from app.services.template_parser import parse_template
+from app.services.template_service import TemplateGeneratorService
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+SECTION_CONCURRENCY = settings.SECTION_CONCURRENCY
+MAX_SECTIONS = settings.MAX_SECTIONS
+
+SECTIONS_MARKER = "<!-- SECTIONS -->"
+
+# Requested features that map onto a conventional page section
+FEATURE_SECTIONS = {
+    "pricing": "pricing", "plans": "pricing",
+    "testimonials": "testimonials", "reviews": "testimonials",
+    "gallery": "gallery", "portfolio": "portfolio",
+    "team": "team", "about": "about",
+    "faq": "faq", "blog": "blog",
+    "contact": "contact", "contact form": "contact",
+    "menu": "menu", "services": "services",
+}
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+_CSS_SPACING_RE = re.compile(r"\s*([{}:;,>])\s*")
+# Selectors that belong to the shell; sections must not restyle the page
+_GLOBAL_SELECTOR_RE = re.compile(r"^\s*(:root|html|body|\*)\s*(,|$)", re.I)
+
+
+def _slug(text: str) -> str:
+    return _SLUG_RE.sub("-", text.lower()).strip("-")
+
+
+def plan_sections(request: WebsiteRequest) -> List[Tuple[str, str]]:
+    """Ordered (name, id) pairs for the page: a hero, one per feature, then contact.
+
+    Planning is a local heuristic rather than an extra model round trip, so
+    the fan-out starts immediately.
+    """
+    names = ["hero"]
+    for feature in request.features or []:
+        feature = " ".join(feature.lower().split())
+        if not feature or feature == "basic":
+            continue
+        name = FEATURE_SECTIONS.get(feature, feature)
+        if name != "contact":
+            names.append(name)
+    if len(names) == 1:
+        names += ["features", "about"]
+    names.append("contact")
+
+    sections = []
+    seen = set()
+    for name in names:
+        section_id = _slug(name)
+        if section_id and section_id not in seen:
+            seen.add(section_id)
+            sections.append((name, section_id))
+    if len(sections) > MAX_SECTIONS:
+        sections = sections[:MAX_SECTIONS - 1] + [sections[-1]]
+    return sections
+
+
+def split_css_rules(css: str) -> List[str]:
+    """Split a stylesheet into top-level rules (at-rule blocks stay whole)."""
+    rules = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(css):
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:index + 1].strip())
+                start = index + 1
+        elif char == ";" and depth == 0:
+            # Statement at-rules such as @import or @charset
+            rules.append(css[start:index + 1].strip())
+            start = index + 1
+    tail = css[start:].strip()
+    if tail and depth == 0:
+        rules.append(tail)
+    return [rule for rule in rules if rule]
+
+
+def merge_css(shell_css: str, section_css: List[str]) -> str:
+    """Concatenate the shell and section stylesheets, dropping duplicate rules.
+
+    Section stylesheets lose any :root/html/body/* rules so the shell's
+    design tokens stay authoritative.
+    """
+    merged = []
+    seen = set()
+    for index, css in enumerate([shell_css] + section_css):
+        for rule in split_css_rules(css or ""):
+            if index and _GLOBAL_SELECTOR_RE.match(rule.split("{", 1)[0]):
+                continue
+            normalized = _CSS_SPACING_RE.sub(r"\1", " ".join(rule.split())).rstrip(";}")
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            merged.append(rule)
+    # @import/@charset must precede every other rule
+    merged.sort(key=lambda rule: not rule.lower().startswith(("@charset", "@import")))
+    return "\n\n".join(merged)
+
+
+def stitch_html(shell_html: str, sections_html: List[str]) -> str:
+    body = "\n\n".join(sections_html)
+    if SECTIONS_MARKER in shell_html:
+        return shell_html.replace(SECTIONS_MARKER, body, 1)
+    # The shell ignored the placeholder; fall back to the end of <main> or <body>
+    lowered = shell_html.lower()
+    for tag in ("</main>", "</body>"):
+        index = lowered.rfind(tag)
+        if index != -1:
+            return shell_html[:index] + body + "\n" + shell_html[index:]
+    return shell_html + "\n" + body
+
+
+async def generate_sectioned(
+    request: WebsiteRequest,
+    template_service: TemplateGeneratorService,
+    layout_image: Optional[LayoutImage] = None
+) -> Optional[dict]:
+    """Generate the shell and every section concurrently and stitch the page.
+
+    Returns None when the shell itself failed, so the caller can fall back to
+    a single-call generation; section calls still running or queued are
+    cancelled then. Failed sections are dropped and the result is marked
+    partial. The layout image only goes to the shell call, which is
+    the one deciding the page layout.
+    """
+    sections = plan_sections(request)
+    slots = asyncio.Semaphore(SECTION_CONCURRENCY)
+    logger.info("Generating %d sections in parallel: %s", len(sections), [s for _, s in sections])
+
+    async def call(plan, image=None):
+        async with slots:
+            return parse_template(await template_service.generate_template(
+                plan.prompt,
+                max_tokens=plan.max_tokens,
+                estimated_input_tokens=plan.input_tokens + (image.tokens if image else 0),
+                layout_image=image
+            ))
+
+    plans = [plan_shell(request, [section_id for _, section_id in sections])]
+    plans += [plan_section(request, name, section_id) for name, section_id in sections]
+    # The shell is created first so it takes the first slot
+    shell_task = asyncio.ensure_future(call(plans[0], layout_image))
+    section_tasks = [asyncio.ensure_future(call(plan)) for plan in plans[1:]]
+    try:
+        try:
+            shell = await shell_task
+            failure = None if shell.html else "no HTML"
+        except Exception as e:
+            failure = e
+        if failure is not None:
+            # Without a shell the sections are wasted: stop paying for them
+            # before the caller falls back to a single call
+            logger.error("Page shell generation failed: %s", failure)
+            return None
+        parts = await asyncio.gather(*section_tasks, return_exceptions=True)
+    finally:
+        for task in section_tasks:
+            task.cancel()
+        await asyncio.gather(*section_tasks, return_exceptions=True)
+
+    partial = not shell.complete
+    sections_html = []
+    sections_css = []
+    scripts = [shell.js] if shell.js else []
+    for (_, section_id), part in zip(sections, parts):
+        if isinstance(part, BaseException) or not part.html or part.truncated:
+            logger.warning("Dropping section %s: %s", section_id, part if isinstance(part, BaseException) else "incomplete")
+            partial = True
+            continue
+        sections_html.append(part.html)
+        sections_css.append(part.css)
+        if part.js:
+            scripts.append(part.js)
+
+    return {
+        "html": stitch_html(shell.html, sections_html),
+        "css": merge_css(shell.css, sections_css),
+        "js": "\n\n".join(scripts) or None,
+        "partial": partial,
+    }
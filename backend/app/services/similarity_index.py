@@ -0,0 +1,370 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import re
+import tempfile
+import zlib
+from fastapi import Request
+import logging
+import numpy as np
+from app.core.config import settings
+from app.schemas.website import WebsiteRequest
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+SIMILARITY_MODE = settings.SIMILARITY_MODE
+SIMILARITY_SERVE_THRESHOLD = settings.SIMILARITY_SERVE_THRESHOLD
+SIMILARITY_FEW_SHOT_K = settings.SIMILARITY_FEW_SHOT_K
+SIMILARITY_FEW_SHOT_THRESHOLD = settings.SIMILARITY_FEW_SHOT_THRESHOLD
+SIMILARITY_FEW_SHOT_TOKENS = settings.SIMILARITY_FEW_SHOT_TOKENS
+SIMILARITY_DIM = settings.SIMILARITY_DIM
+SIMILARITY_MAX_ENTRIES = settings.SIMILARITY_MAX_ENTRIES
+SIMILARITY_INDEX_PATH = settings.SIMILARITY_INDEX_PATH
+SIMILARITY_SAVE_EVERY = settings.SIMILARITY_SAVE_EVERY
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Rebuild the weighted matrix after this many inserts relative to the size,
+# since every idf weight moves with the document counts
+_REWEIGHT_FRACTION = 0.1
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def request_features(request: WebsiteRequest) -> List[str]:
+    """Word unigrams and bigrams plus in-word character trigrams.
+
+    Trigrams make "bakery" and "bakeries" overlap; bigrams keep some word
+    order. Business type and style get their own namespaces so a "modern"
+    style does not match a description that mentions "modern".
+    """
+    words = _words(request.description)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    features += ["b:" + word for word in _words(request.business_type)]
+    features += ["s:" + word for word in _words(request.style_preferences)]
+    return features
+
+
+def term_frequencies(features: List[str], dim: int) -> np.ndarray:
+    """Signed feature hashing into ``dim`` buckets with sublinear counts.
+
+    crc32 rather than hash(): it has to agree across processes and restarts
+    for a persisted index to stay valid.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+    signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+    np.add.at(vector, hashes & (dim - 1), signs)
+    # Collisions can cancel out; the magnitude is what counts
+    return np.sign(vector) * np.log1p(np.abs(vector))
+
+
+def variant_of(request: WebsiteRequest, model: str) -> int:
+    """Hash of what must match exactly for a stored template to be served.
+
+    Features pick which sections get generated and the model changes the
+    output; neither is worth approximating.
+    """
+    canonical = {
+        "features": sorted({" ".join(_words(f)) for f in request.features or []} - {""}),
+        "sections": request.parallel_sections,
+        "model": model,
+    }
+    return zlib.crc32(json.dumps(canonical, sort_keys=True).encode())
+
+
+class Match:
+    def __init__(self, key: str, score: float):
+        self.key = key
+        self.score = score
+
+
+class SimilarityIndex:
+    """Cosine top-k over hashed TF-IDF vectors of past generation requests.
+
+    Each entry maps a request's vector to its template cache key; the
+    templates themselves stay in the cache, and entries whose template has
+    since been evicted are skipped at lookup. Rows live in one
+    preallocated matrix that doubles as it fills and wraps around at
+    ``max_entries``, so inserts are O(dim) and a query is one matrix-vector
+    product plus ``argpartition``. Both matrices are stored transposed
+    (dim x entries): scoring is then about 1.5x faster than with an
+    entries x dim matrix at 100k entries, and reweighting scales whole
+    contiguous rows.
+    """
+
+    def __init__(self, dim: int = SIMILARITY_DIM, max_entries: int = SIMILARITY_MAX_ENTRIES):
+        if dim & (dim - 1):
+            raise ValueError("SIMILARITY_DIM must be a power of two")
+        self.dim = dim
+        self.max_entries = max_entries
+        # Raw term frequencies, only read to reweight; half precision is plenty
+        capacity = min(1024, max_entries)
+        self._tf = np.zeros((dim, capacity), dtype=np.float16)
+        self._variants = np.zeros(capacity, dtype=np.uint32)
+        self._keys: List[Optional[str]] = [None] * capacity
+        self._rows: Dict[str, int] = {}
+        # Documents containing each bucket, for the idf weights
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._size = 0
+        self._next = 0
+        self._weighted: Optional[np.ndarray] = None
+        self._weighted_inserts = 0
+        self.inserts = 0
+        self.queries = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _idf(self) -> np.ndarray:
+        return np.log((1 + self._size) / (1 + self._df)) + 1
+
+    def _weigh(self, tf: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        weighted = tf * idf
+        norms = np.linalg.norm(weighted, axis=-1, keepdims=True)
+        return weighted / np.maximum(norms, 1e-12)
+
+    def _weigh_columns(self, tf: np.ndarray) -> np.ndarray:
+        # _weigh for a dim x entries matrix, in place on a float32 copy
+        weighted = tf.astype(np.float32)
+        weighted *= self._idf()[:, None]
+        norms = np.sqrt(np.einsum("ij,ij->j", weighted, weighted))
+        weighted /= np.maximum(norms, 1e-12)
+        return weighted
+
+    def _grow(self):
+        capacity = min(len(self._keys) * 2, self.max_entries)
+        tf = np.zeros((self.dim, capacity), dtype=np.float16)
+        tf[:, :self._size] = self._tf[:, :self._size]
+        self._tf = tf
+        self._variants = np.resize(self._variants, capacity)
+        self._keys += [None] * (capacity - len(self._keys))
+        self._weighted = None
+
+    def add(self, key: str, request: WebsiteRequest, model: str):
+        if key in self._rows:
+            return
+        if self._next == len(self._keys) and len(self._keys) < self.max_entries:
+            self._grow()
+        row = self._next % self.max_entries
+        old_key = self._keys[row]
+        if old_key is not None:
+            # Full: the oldest entry makes room
+            del self._rows[old_key]
+            self._df -= self._tf[:, row] != 0
+        else:
+            self._size += 1
+
+        tf = term_frequencies(request_features(request), self.dim)
+        self._tf[:, row] = tf
+        self._variants[row] = variant_of(request, model)
+        self._keys[row] = key
+        self._rows[key] = row
+        self._df += tf != 0
+        self._next = row + 1
+        self.inserts += 1
+        if self._weighted is not None:
+            self._weighted[:, row] = self._weigh(tf, self._idf())
+
+    def _matrix(self) -> np.ndarray:
+        if self._weighted is None or self.inserts - self._weighted_inserts > self._size * _REWEIGHT_FRACTION:
+            self._weighted = self._weigh_columns(self._tf)
+            self._weighted_inserts = self.inserts
+        return self._weighted
+
+    def search(self, request: WebsiteRequest, k: int, model: Optional[str] = None) -> List[Match]:
+        """The ``k`` most similar entries, best first; with ``model``, only exact variants."""
+        if self._size == 0 or k <= 0:
+            return []
+        self.queries += 1
+        query = self._weigh(term_frequencies(request_features(request), self.dim), self._idf())
+        scores = query @ self._matrix()[:, :self._size]
+        if model is not None:
+            scores[self._variants[:self._size] != variant_of(request, model)] = -1.0
+        k = min(k, self._size)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [Match(self._keys[row], float(scores[row])) for row in top if scores[row] > 0]
+
+    def snapshot(self) -> dict:
+        """Copies of the arrays to save, oldest entry first.
+
+        Cheap next to writing them, so the write can happen off the event
+        loop while inserts continue. The idf counts are rebuilt on load.
+        """
+        order = (np.arange(self._size) + self._next) % self._size if self._size else np.arange(0)
+        return {
+            "tf": self._tf[:, order],
+            "variants": self._variants[order],
+            # Template cache keys are sha256 hex digests
+            "keys": np.array([self._keys[row] for row in order], dtype="U64"),
+            "dim": np.array(self.dim),
+        }
+
+    @staticmethod
+    def write(path: str, snapshot: dict):
+        """Write a snapshot atomically, so a crash never leaves a torn file."""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **snapshot)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = SIMILARITY_MAX_ENTRIES) -> "SimilarityIndex":
+        with np.load(path) as data:
+            index = cls(int(data["dim"]), max_entries)
+            # Newest rows last; keep as many as MAX_ENTRIES allows now
+            tf = data["tf"][:, -max_entries:]
+            variants = data["variants"][-max_entries:]
+            keys = [str(key) for key in data["keys"][-max_entries:]]
+        size = len(keys)
+        capacity = max(size, min(1024, max_entries))
+        index._tf = np.zeros((index.dim, capacity), dtype=np.float16)
+        index._tf[:, :size] = tf
+        index._variants = np.zeros(capacity, dtype=np.uint32)
+        index._variants[:size] = variants
+        index._keys = keys + [None] * (capacity - len(keys))
+        index._rows = {key: row for row, key in enumerate(keys)}
+        index._df = np.count_nonzero(tf, axis=1).astype(np.float32)
+        index._size = size
+        index._next = size
+        return index
+
+    def stats(self) -> dict:
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "dim": self.dim,
+            "inserts": self.inserts,
+            "queries": self.queries,
+            "matrix_bytes": self._tf.nbytes + (self._weighted.nbytes if self._weighted is not None else 0),
+        }
+
+
+def compact_example(template: dict, tokens: int) -> Tuple[str, str]:
+    """The html and css of a cached template, cut at a tag or rule boundary to fit ``tokens``."""
+    def cut(text: str, chars: int, boundary: str) -> str:
+        if len(text) <= chars:
+            return text
+        text = text[:chars]
+        end = text.rfind(boundary)
+        return text[:end + 1] if end > 0 else text
+
+    # Roughly 4 characters per token, shared evenly between markup and styles
+    chars = tokens * 2
+    return cut(template.get("html") or "", chars, ">"), cut(template.get("css") or "", chars, "}")
+
+
+class SimilarityLookup:
+    """The similarity index together with the modes it is used in and its counters."""
+
+    def __init__(
+        self,
+        index: SimilarityIndex,
+        modes: List[str],
+        path: str = SIMILARITY_INDEX_PATH,
+        serve_threshold: Optional[float] = SIMILARITY_SERVE_THRESHOLD
+    ):
+        if "serve" in modes and serve_threshold is None:
+            raise ValueError("SIMILARITY_MODE=serve needs a calibrated SIMILARITY_SERVE_THRESHOLD")
+        self.index = index
+        self.serve = "serve" in modes
+        self.serve_threshold = serve_threshold
+        self.few_shot = "few_shot" in modes
+        self.path = path
+        self.served = 0
+        self.examples_used = 0
+        self._unsaved = 0
+
+    def record(self, key: str, request: WebsiteRequest, model: str):
+        """Index a request whose template was just cached under ``key``."""
+        if request.layout_image:
+            # The text says little about a request that comes with a drawing
+            return
+        self.index.add(key, request, model)
+        self._unsaved += 1
+        if self.path and self._unsaved >= SIMILARITY_SAVE_EVERY:
+            self._unsaved = 0
+            # Writing tens of megabytes would stall the event loop
+            snapshot = self.index.snapshot()
+            asyncio.get_running_loop().run_in_executor(None, self._write, snapshot)
+
+    def nearest_cached(self, request: WebsiteRequest, model: str, template_cache) -> Optional[Tuple[dict, Match]]:
+        """A cached template for a near-duplicate request, if one is similar enough."""
+        if not self.serve or request.layout_image or template_cache is None:
+            return None
+        for match in self.index.search(request, 4, model=model):
+            if match.score < self.serve_threshold:
+                break
+            template = template_cache.peek(match.key)
+            if template is not None:
+                self.served += 1
+                return template, match
+        return None
+
+    def examples(self, request: WebsiteRequest, template_cache) -> List[Tuple[str, str]]:
+        """Compact html/css of the nearest cached templates, to use as few-shot context."""
+        if not self.few_shot or template_cache is None:
+            return []
+        examples = []
+        budget = SIMILARITY_FEW_SHOT_TOKENS // max(1, SIMILARITY_FEW_SHOT_K)
+        # A few spare candidates in case some have been evicted from the cache
+        for match in self.index.search(request, SIMILARITY_FEW_SHOT_K + 2):
+            if match.score < SIMILARITY_FEW_SHOT_THRESHOLD or len(examples) == SIMILARITY_FEW_SHOT_K:
+                break
+            template = template_cache.peek(match.key)
+            if template is not None:
+                examples.append(compact_example(template, budget))
+        self.examples_used += len(examples)
+        return examples
+
+    def _write(self, snapshot: dict):
+        try:
+            SimilarityIndex.write(self.path, snapshot)
+        except OSError as e:
+            logger.error("Saving the similarity index failed: %s", e)
+
+    def save(self):
+        """Save now; called from the app lifespan at shutdown."""
+        if self.path:
+            self._write(self.index.snapshot())
+            self._unsaved = 0
+
+    def stats(self) -> dict:
+        return {
+            **self.index.stats(),
+            "serve": self.serve,
+            "serve_threshold": self.serve_threshold,
+            "few_shot": self.few_shot,
+            "served": self.served,
+            "examples_used": self.examples_used,
+        }
+
+
+def create_similarity_lookup() -> Optional[SimilarityLookup]:
+    modes = [mode.strip() for mode in SIMILARITY_MODE.split(",") if mode.strip() not in ("", "off")]
+    unknown = set(modes) - {"serve", "few_shot"}
+    if unknown:
+        raise ValueError(f"Unknown SIMILARITY_MODE: {', '.join(sorted(unknown))}")
+    if not modes:
+        return None
+    index = None
+    if SIMILARITY_INDEX_PATH and os.path.exists(SIMILARITY_INDEX_PATH):
+        try:
+            index = SimilarityIndex.load(SIMILARITY_INDEX_PATH)
+            logger.info("Loaded %d similarity index entries from %s", len(index), SIMILARITY_INDEX_PATH)
+        except Exception as e:
+            logger.error("Loading the similarity index failed, starting empty: %s", e)
+    return SimilarityLookup(index or SimilarityIndex(), modes)
+
+
+def get_similarity_lookup(request: Request) -> Optional[SimilarityLookup]:
+    return getattr(request.app.state, "similarity_lookup", None)
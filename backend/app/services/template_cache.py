@@ -0,0 +1,256 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from fastapi import Request
+import logging
+from app.core.config import settings
+from app.schemas.website import WebsiteRequest
+
+logger = logging.getLogger(__name__)
+
+# See app.core.config for what each of these does
+TEMPLATE_CACHE_BACKEND = settings.TEMPLATE_CACHE_BACKEND
+TEMPLATE_CACHE_TTL = settings.TEMPLATE_CACHE_TTL
+TEMPLATE_CACHE_MAX_BYTES = settings.TEMPLATE_CACHE_MAX_BYTES
+TEMPLATE_CACHE_PATH = settings.TEMPLATE_CACHE_PATH
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def cache_key(request: WebsiteRequest, model: str, temperature: float) -> str:
+    """Content hash of the request fields that influence the generated template."""
+    canonical = {
+        "description": _normalize(request.description),
+        "business_type": _normalize(request.business_type),
+        "style_preferences": _normalize(request.style_preferences),
+        "features": sorted({_normalize(f) for f in request.features or []} - {""}),
+        "layout_image": hashlib.sha256((request.layout_image or "").encode()).hexdigest(),
+        "model": model,
+        "temperature": temperature,
+    }
+    if request.parallel_sections:
+        canonical["mode"] = "sections"
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Storage interface for cached templates; values are JSON-serializable dicts."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: dict) -> None:
+        ...
+
+    @abstractmethod
+    def size_bytes(self) -> int:
+        ...
+
+
+class MemoryLRUCache(CacheBackend):
+    def __init__(self, max_bytes: int = TEMPLATE_CACHE_MAX_BYTES, ttl: float = TEMPLATE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: dict) -> None:
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class SQLiteCache(CacheBackend):
+    """Disk-backed cache shared by every worker on the host.
+
+    Each operation is a single indexed statement against a local file, so it
+    is run inline rather than offloaded to a thread.
+    """
+
+    def __init__(
+        self,
+        path: str = TEMPLATE_CACHE_PATH,
+        max_bytes: int = TEMPLATE_CACHE_MAX_BYTES,
+        ttl: float = TEMPLATE_CACHE_TTL,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS template_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_template_cache_accessed_at"
+            " ON template_cache (accessed_at)"
+        )
+        # Last total seen by this worker (at start and on each of its writes),
+        # so stats and metrics scrapes do not sum the table on the event loop
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM template_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM template_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM template_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE template_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict) -> None:
+        payload = json.dumps(value)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO template_cache VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now + self.ttl, now),
+            )
+            self._evict()
+
+    def size_bytes(self) -> int:
+        """The table's size as of this worker's last write; other workers' writes show up on its next one."""
+        return self._size
+
+    def close(self):
+        self._conn.close()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM template_cache WHERE expires_at < ?", (time.time(),))
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM template_cache"
+        ).fetchone()[0]
+        self._size = total
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until we are back under budget
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM template_cache ORDER BY accessed_at"
+        ):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM template_cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+        self._size = total - freed
+
+
+class TemplateCache:
+    """Front for a CacheBackend that keeps hit/miss/bypass counters."""
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.error("Template cache read failed: %s", e)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[dict]:
+        """Read without counting a hit or miss, for lookups that are not a request's own key."""
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.error("Template cache read failed: %s", e)
+            return None
+
+    def set(self, key: str, value: dict) -> None:
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.error("Template cache write failed: %s", e)
+
+    def record_bypass(self):
+        self.bypasses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "size_bytes": self.backend.size_bytes(),
+        }
+
+    def close(self):
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            close()
+
+
+def create_template_cache() -> Optional[TemplateCache]:
+    if TEMPLATE_CACHE_BACKEND == "none":
+        return None
+    if TEMPLATE_CACHE_BACKEND == "sqlite":
+        return TemplateCache(SQLiteCache())
+    if TEMPLATE_CACHE_BACKEND == "memory":
+        return TemplateCache(MemoryLRUCache())
+    raise ValueError(f"Unknown TEMPLATE_CACHE_BACKEND: {TEMPLATE_CACHE_BACKEND}")
+
+def get_template_cache(request: Request) -> Optional[TemplateCache]:
+    return getattr(request.app.state, "template_cache", None)
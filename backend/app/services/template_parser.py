@@ -0,0 +1,205 @@
+from typing import Dict, List, Optional, Tuple
+import re
+
+FENCE = "```"
+
+# Info strings the model uses for each block kind, lower-cased
+LANGUAGE_ALIASES = {
+    "html": "html", "htm": "html", "xhtml": "html", "html5": "html",
+    "css": "css", "css3": "css",
+    "js": "js", "javascript": "js", "jsx": "js", "ecmascript": "js",
+}
+
+# Fence languages we forward to the client, mapped to the SSE event name
+CHUNK_EVENTS = {
+    "html": "html_chunk",
+    "css": "css_chunk",
+    "js": "js_chunk",
+}
+
+REQUIRED_SECTIONS = ("html", "css")
+
+# Fences only count at the start of a line, not inline code mid-sentence
+_FENCE_RE = re.compile(r"(?m)^```([^\n`]*)")
+_CSS_RULE_RE = re.compile(r"[\w\-.#:*\[\]=\"' >+~,()]+\{[^{}]*:[^{}]*\}")
+_STYLE_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.I | re.S)
+_SCRIPT_RE = re.compile(r"<script(?![^>]*\bsrc=)[^>]*>(.*?)</script>", re.I | re.S)
+_DOCUMENT_RE = re.compile(r"<!doctype html|<html[\s>]", re.I)
+
+
+def normalize_language(info: str) -> Optional[str]:
+    words = info.strip().lower().split()
+    return LANGUAGE_ALIASES.get(words[0]) if words else None
+
+
+def _sniff_language(content: str) -> Optional[str]:
+    stripped = content.lstrip()
+    if stripped.startswith("<"):
+        return "html"
+    if _CSS_RULE_RE.search(stripped[:2000]):
+        return "css"
+    return None
+
+
+class ParsedTemplate:
+    def __init__(self):
+        self.sections: Dict[str, str] = {}
+        # Sections cut off by an unterminated fence (e.g. a max_tokens stop)
+        self.truncated: List[str] = []
+
+    @property
+    def html(self) -> str:
+        return self.sections.get("html", "")
+
+    @property
+    def css(self) -> str:
+        return self.sections.get("css", "")
+
+    @property
+    def js(self) -> Optional[str]:
+        return self.sections.get("js")
+
+    def missing(self) -> List[str]:
+        return [name for name in REQUIRED_SECTIONS if not self.sections.get(name)]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing() and not self.truncated
+
+    def _add(self, language: str, content: str):
+        content = content.strip()
+        if not content:
+            return
+        if language == "html":
+            # A second html block is usually a fragment repeated for illustration
+            self.sections.setdefault("html", content)
+        elif language in self.sections:
+            self.sections[language] += "\n\n" + content
+        else:
+            self.sections[language] = content
+
+
+def parse_template(text: str) -> ParsedTemplate:
+    """Extract html/css/js blocks from a completion in a single scan.
+
+    Fence languages are matched case-insensitively with common aliases,
+    unlabeled fences are classified by their content, an unterminated final
+    fence is kept as a truncated section, and a bare HTML document with no
+    fences at all is still recovered. Inline <style>/<script> contents fill
+    in css/js when the model left them out as separate blocks.
+    """
+    parsed = ParsedTemplate()
+    position = 0
+    open_language = None
+    open_start = None
+
+    for match in _FENCE_RE.finditer(text):
+        if open_start is None:
+            newline = text.find("\n", match.end())
+            if newline == -1:
+                break
+            open_language = normalize_language(match.group(1)) or ""
+            open_start = newline + 1
+        else:
+            if match.start() < open_start:
+                continue
+            content = text[open_start:match.start()]
+            parsed._add(open_language or _sniff_language(content) or "", content)
+            open_start = None
+            position = match.end()
+
+    if open_start is not None:
+        content = text[open_start:]
+        language = open_language or _sniff_language(content)
+        if language:
+            parsed._add(language, content)
+            parsed.truncated.append(language)
+    parsed.sections.pop("", None)
+
+    if "html" not in parsed.sections and position == 0 and open_start is None:
+        document = _DOCUMENT_RE.search(text)
+        if document:
+            end = text.lower().rfind("</html>")
+            parsed._add("html", text[document.start():end + 7 if end != -1 else len(text)])
+
+    html = parsed.sections.get("html")
+    if html:
+        if "css" not in parsed.sections:
+            parsed._add("css", "\n\n".join(_STYLE_RE.findall(html)))
+        if "js" not in parsed.sections:
+            parsed._add("js", "\n\n".join(_SCRIPT_RE.findall(html)))
+    return parsed
+
+
+class IncrementalFenceParser:
+    """Split a streamed completion into html/css/js chunks as fences go by.
+
+    Text is fed in arbitrary pieces; anything that might be the start of a
+    fence is held back until the next piece disambiguates it, so a ``` split
+    across two tokens is still detected. As in parse_template, only a ```
+    at the start of a line is a fence.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._language = None  # language of the open fence, None when outside
+        self._reading_info = False  # between an opening ``` and its newline
+        self._at_line_start = True  # whether the buffer starts a line
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        self._buffer += text
+        events = []
+
+        while self._buffer:
+            if self._reading_info:
+                newline = self._buffer.find("\n")
+                if newline == -1:
+                    break
+                self._language = normalize_language(self._buffer[:newline]) or ""
+                self._buffer = self._buffer[newline + 1:]
+                self._reading_info = False
+                self._at_line_start = True
+                continue
+
+            fence = self._find_fence()
+            if fence == -1:
+                # Keep trailing backticks that start a line: they may be the start of a fence
+                start = len(self._buffer.rstrip("`"))
+                at_line_start = self._buffer[start - 1] == "\n" if start else self._at_line_start
+                keep = len(self._buffer) - start if at_line_start else 0
+                self._emit(events, self._buffer[:len(self._buffer) - keep])
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+
+            self._emit(events, self._buffer[:fence])
+            self._buffer = self._buffer[fence + len(FENCE):]
+            self._at_line_start = False
+            if self._language is None:
+                self._reading_info = True
+            else:
+                self._language = None
+
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush whatever is still buffered once the stream has ended."""
+        events = []
+        if not self._reading_info:
+            self._emit(events, self._buffer)
+        self._buffer = ""
+        return events
+
+    def _find_fence(self) -> int:
+        """Index of the first ``` in the buffer that starts a line, or -1."""
+        if self._at_line_start and self._buffer.startswith(FENCE):
+            return 0
+        newline = self._buffer.find("\n" + FENCE)
+        return newline + 1 if newline != -1 else -1
+
+    def _emit(self, events: List[Tuple[str, str]], text: str):
+        if not text:
+            return
+        self._at_line_start = text.endswith("\n")
+        event = CHUNK_EVENTS.get(self._language)
+        if event:
+            events.append((event, text))
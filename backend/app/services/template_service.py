@@ -1,59 +1,191 @@
-from anthropic import Anthropic
-import os
-from fastapi import HTTPException
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+from fastapi import HTTPException, Request
 import logging
+from app.core.config import settings
+from app.core.rate_limit import current_client
+from app.services.call_policy import CallPolicy, UpstreamUnavailableError
+from app.services.fair_scheduler import FairScheduler
+from app.services.layout_images import LayoutImage
+from app.services.llm_client import get_llm_client
+from app.services.prompts import token_usage
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+# Handlers and format are configured once by app.core.observability.configure_logging
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+LLM_MAX_CONCURRENCY = settings.LLM_MAX_CONCURRENCY
+
+def client_weight(client: str) -> int:
+    if client.startswith("user:"):
+        return settings.LLM_SCHEDULER_USER_WEIGHT
+    return settings.LLM_SCHEDULER_IP_WEIGHT
+
+# Slots are shared out per client (see app.core.rate_limit.current_client)
+# so one busy caller cannot queue everybody else behind it
+_generation_slots = FairScheduler(
+    LLM_MAX_CONCURRENCY,
+    client_of=current_client.get,
+    per_client_limit=settings.LLM_CLIENT_MAX_CONCURRENCY,
+    weight_of=client_weight,
+)
+
+# Generation parameters; these also form part of the template cache key
+LLM_MODEL = settings.LLM_MODEL
+LLM_MAX_TOKENS = 4000
+LLM_TEMPERATURE = 0.7
+
+# Prompt caching on batch calls (see settings.LLM_PROMPT_CACHING)
+LLM_PROMPT_CACHING = settings.LLM_PROMPT_CACHING
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
+def create_call_policy() -> CallPolicy:
+    """Call policy for LLM_MODEL followed by the configured fallback models."""
+    return CallPolicy([LLM_MODEL] + settings.LLM_FALLBACK_MODELS, hedge_slots=_generation_slots)
+
+def unavailable(e: UpstreamUnavailableError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(int(e.retry_after + 0.5))}
+    )
+
+def message_content(description: str, layout_image: Optional[LayoutImage]):
+    """The user turn: the prompt text, preceded by the layout image if there is one."""
+    if layout_image is None:
+        return description
+    # Images before the text they are referred to from, as Anthropic recommends
+    return [layout_image.content_block(), {"type": "text", "text": description}]
+
+def request_params(
+    description: str,
+    layout_image: Optional[LayoutImage],
+    system: Optional[str] = None,
+    variant: Optional[str] = None
+) -> dict:
+    """Messages API arguments for a prompt, with cache breakpoints for batch calls.
+
+    With prompt caching the system prompt is one cached prefix (shared by the
+    whole batch) and the request text another (shared by its variants); the
+    variant text comes after both so it does not break them.
+    """
+    if system is None and variant is None:
+        return {"messages": [{"role": "user", "content": message_content(description, layout_image)}]}
+    if not LLM_PROMPT_CACHING:
+        text = description + (variant or "")
+        params = {"messages": [{"role": "user", "content": message_content(text, layout_image)}]}
+        if system is not None:
+            params["system"] = system
+        return params
+
+    ephemeral = {"type": "ephemeral"}
+    content = [layout_image.content_block()] if layout_image is not None else []
+    content.append({"type": "text", "text": description, **({"cache_control": ephemeral} if variant else {})})
+    if variant:
+        content.append({"type": "text", "text": variant})
+    params = {
+        "messages": [{"role": "user", "content": content}],
+        "extra_headers": {"anthropic-beta": PROMPT_CACHING_BETA},
+    }
+    if system is not None:
+        params["system"] = [{"type": "text", "text": system, "cache_control": ephemeral}]
+    return params
 
 class TemplateGeneratorService:
-    def __init__(self):
-        try:
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if not api_key:
-                raise ValueError("ANTHROPIC_API_KEY environment variable is not set")
-            
-            # Clean the API key (remove quotes and whitespace)
-            api_key = api_key.strip().replace('"', '')
-            
-            # Validate API key format
-            if not api_key.startswith('sk-ant-api'):
-                raise ValueError("Invalid API key format. It should start with 'sk-ant-api'")
-                
-            self.client = Anthropic(api_key=api_key)
-            logger.info("Successfully initialized Anthropic client")
-        except Exception as e:
-            logger.error(f"Failed to initialize Anthropic client: {str(e)}")
-            raise
+    def __init__(self, client: "AsyncAnthropic", policy: CallPolicy):
+        # The client (and its connection pool) is owned by the app lifespan
+        self.client = client
+        # Shared per worker so circuit state and latency history span requests
+        self.policy = policy
+
+    async def generate_template(
+        self,
+        description: str,
+        max_tokens: int = LLM_MAX_TOKENS,
+        estimated_input_tokens: Optional[int] = None,
+        layout_image: Optional[LayoutImage] = None,
+        system: Optional[str] = None,
+        variant: Optional[str] = None
+    ):
+        params = request_params(description, layout_image, system, variant)
+
+        async def attempt(model: str):
+            return await self.client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=LLM_TEMPERATURE,
+                **params
+            )
 
-    async def generate_template(self, description: str):
         try:
             logger.info("Starting template generation with Claude")
-            message = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=4000,
-                temperature=0.7,
-                messages=[{
-                    "role": "user",
-                    "content": description
-                }]
-            )
-            
+            # Awaiting the async client keeps the event loop free while the
+            # completion decodes; the semaphore caps in-flight upstream calls.
+            async with _generation_slots.slot():
+                message = await self.policy.call(attempt)
+
             logger.info("Successfully received response from Claude")
             if not message or not hasattr(message, 'content'):
                 raise ValueError("No content received from Claude API")
-                
+
+            token_usage.record(estimated_input_tokens, max_tokens, message.usage, message.stop_reason, message.model)
+
             return message.content[0].text
-            
+
+        except UpstreamUnavailableError as e:
+            logger.error("Error in template generation: %s", e)
+            raise unavailable(e)
         except Exception as e:
-            logger.error(f"Error in template generation: {str(e)}")
-            logger.error(f"Error type: {type(e)}")
+            logger.error("Error in template generation: %s (%s)", e, type(e).__name__)
             raise HTTPException(
                 status_code=500,
                 detail=f"Template generation failed: {str(e)}"
-            ) 
\ No newline at end of file
+            )
+
+    async def stream_template(
+        self,
+        description: str,
+        max_tokens: int = LLM_MAX_TOKENS,
+        estimated_input_tokens: Optional[int] = None,
+        layout_image: Optional[LayoutImage] = None,
+        system: Optional[str] = None,
+        variant: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield completion text as it is decoded instead of waiting for the end."""
+        params = request_params(description, layout_image, system, variant)
+
+        async def attempt(model: str) -> AsyncIterator[str]:
+            async with self.client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=LLM_TEMPERATURE,
+                **params
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                message = await stream.get_final_message()
+            token_usage.record(estimated_input_tokens, max_tokens, message.usage, message.stop_reason, message.model)
+
+        logger.info("Starting streaming template generation with Claude")
+        async with _generation_slots.slot():
+            try:
+                async for text in self.policy.stream(attempt):
+                    yield text
+            except UpstreamUnavailableError as e:
+                logger.error("Error in streaming template generation: %s", e)
+                raise unavailable(e)
+        logger.info("Finished streaming response from Claude")
+
+def scheduler_stats() -> dict:
+    return _generation_slots.stats()
+
+def get_template_service(request: Request) -> TemplateGeneratorService:
+    client = get_llm_client(request.app)
+    if client is None:
+        error = getattr(request.app.state, "llm_client_error", None)
+        raise HTTPException(
+            status_code=503,
+            detail=error or "Anthropic client is not initialized"
+        )
+    return TemplateGeneratorService(client, request.app.state.call_policy)
@@ -1,16 +1,21 @@
-from typing import Optional
+from typing import List, Optional, Tuple
+import asyncio
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
-from ..core.security import get_password_hash
+from ..core.security import get_password_hash, get_password_hash_async
+from ..core.principal_cache import principal_cache
+from ..core.pagination import keyset_page
 
 def create_user(db: Session, user: UserCreate) -> User:
     hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
-        is_active=user.is_active,
-        is_superuser=user.is_superuser
+        is_active=True,
+        is_superuser=False
     )
     db.add(db_user)
     db.commit()
@@ -24,7 +29,7 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).filter(User.email == email).first()
 
 def update_user(db: Session, user: User, user_update: UserUpdate) -> User:
-    update_data = user_update.dict(exclude_unset=True)
+    update_data = user_update.dict(exclude_unset=True, exclude_none=True)
     if "password" in update_data:
         update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
     
@@ -34,4 +39,75 @@ def update_user(db: Session, user: User, user_update: UserUpdate) -> User:
     db.add(user)
     db.commit()
     db.refresh(user)
+    # Never serve a cached principal that predates this change
+    principal_cache.invalidate_user(user.id)
+    return user
+
+# Async equivalents for endpoints running on AsyncSession
+
+async def create_user_async(db: AsyncSession, user: UserCreate) -> User:
+    hashed_password = await get_password_hash_async(user.password)
+    db_user = User(
+        email=user.email,
+        hashed_password=hashed_password,
+        is_active=True,
+        is_superuser=False
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def get_user_async(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def get_users_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+    result = await db.execute(select(User).order_by(User.id).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+async def get_users_page_async(
+    db: AsyncSession, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[User], Optional[str]]:
+    return await keyset_page(db, select(User), User, cursor, limit)
+
+async def get_existing_emails_async(db: AsyncSession, emails: List[str]) -> List[str]:
+    result = await db.execute(select(User.email).where(User.email.in_(emails)))
+    return list(result.scalars().all())
+
+async def create_users_bulk_async(db: AsyncSession, users: List[UserCreate]) -> List[User]:
+    hashed_passwords = await asyncio.gather(
+        *(get_password_hash_async(user.password) for user in users)
+    )
+    rows = [
+        {
+            "email": user.email,
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "is_superuser": False,
+        }
+        for user, hashed_password in zip(users, hashed_passwords)
+    ]
+    # One multi-row INSERT ... RETURNING in a single transaction
+    result = await db.scalars(insert(User).returning(User, sort_by_parameter_order=True), rows)
+    db_users = list(result.all())
+    await db.commit()
+    return db_users
+
+async def update_user_async(db: AsyncSession, user: User, user_update: UserUpdate) -> User:
+    update_data = user_update.dict(exclude_unset=True, exclude_none=True)
+    if "password" in update_data:
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+    
+    for field, value in update_data.items():
+        setattr(user, field, value)
+    
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    # Never serve a cached principal that predates this change
+    principal_cache.invalidate_user(user.id)
     return user
@@ -0,0 +1,22 @@
+import logging
+from uvicorn.workers import UvicornWorker
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """Gunicorn worker running uvicorn on uvloop and httptools.
+
+    Pinned rather than left on "auto" so a missing extra fails the deploy
+    instead of silently falling back to the pure-Python loop and parser.
+    Lifespan is required: the app's shared clients and caches live there.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # UvicornWorker hands uvicorn's loggers to gunicorn's handlers; send
+        # them back through the app's JSON handler so every line has one format
+        for name in ("uvicorn.error", "uvicorn.access"):
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers = []
+            uvicorn_logger.propagate = True
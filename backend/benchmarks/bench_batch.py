@@ -0,0 +1,120 @@
+"""Batch and variant generation against independent calls, with prompt caching.
+
+    python -m benchmarks.bench_batch --variants 5 --campaign 20
+
+Two workloads against the stub, which emulates prompt caching (prefixes of
+1024+ tokens) and charges ``--prefill`` seconds per 1000 uncached input
+tokens before the first token:
+
+- variants: ``--variants`` designs of one request with a detailed brief,
+  as one /generate-batch call and as concurrent /generate-template calls
+- campaign: ``--campaign`` short requests for different businesses
+
+Input cost is in uncached-token equivalents at Anthropic's prices (cache
+writes 1.25x, cache reads 0.1x).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from .load_generate_template import PAYLOAD
+from .stub_llm import create_stub_app
+from .utils import AppProcess, BackgroundServer, configure_env
+
+API = "/api/v1/website"
+BUSINESSES = ["bakery", "law firm", "yoga studio", "restaurant", "photographer", "dentist", "garage", "tutor",
+              "florist", "architect", "gym", "hotel", "brewery", "salon", "plumber", "bookshop"]
+
+
+def detailed_brief() -> str:
+    """A ~1200 token brief: long enough for its prefix to be cached upstream."""
+    pages = ["home", "menu", "catering", "wholesale", "about", "careers", "contact", "journal"]
+    lines = [f"The {page} page should feature seasonal bakes, opening hours by weekday, allergen notes, "
+             f"a short founder story, local sourcing partners and a clear call to order ahead." for page in pages]
+    return "A family bakery in the old town with three shops and a market stall. " + " ".join(lines * 4)
+
+
+def billed(before: dict, after: dict) -> float:
+    delta = {key: after[key] - before[key] for key in after}
+    return (delta["input_tokens"] + 1.25 * delta["cache_creation_input_tokens"]
+            + 0.1 * delta["cache_read_input_tokens"])
+
+
+async def independent(client: httpx.AsyncClient, payloads: list, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    first = None
+
+    async def one(payload):
+        nonlocal first
+        async with slots:
+            response = await client.post(f"{API}/generate-template", json=payload)
+            response.raise_for_status()
+            first = first or time.perf_counter() - started
+
+    await asyncio.gather(*(one(payload) for payload in payloads))
+    return first, time.perf_counter() - started
+
+
+async def batched(client: httpx.AsyncClient, payloads: list, variants: int):
+    started = time.perf_counter()
+    first = None
+    async with client.stream("POST", f"{API}/generate-batch",
+                             json={"requests": payloads, "variants": variants}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line:
+                assert json.loads(line)["status"] == "succeeded", line
+                first = first or time.perf_counter() - started
+    return first, time.perf_counter() - started
+
+
+async def compare(url: str, stub_app, name: str, payloads: list, variants: int, concurrency: int):
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        print(f"{name}:")
+        # Independently requested variants must differ, or single flight would coalesce them
+        repeated = [
+            {**payload, "description": payload["description"] + (f" Variant {v + 1}." if variants > 1 else ""),
+             "bypass_cache": True}
+            for payload in payloads for v in range(variants)
+        ]
+        for label, run in (
+            ("independent calls", lambda: independent(client, repeated, concurrency)),
+            ("generate-batch", lambda: batched(client, [{**p, "bypass_cache": True} for p in payloads], variants)),
+        ):
+            # Counted by the stub: the app's own token stats are per worker
+            before = dict(stub_app.state.prompt_cache.totals)
+            first, total = await run()
+            after = dict(stub_app.state.prompt_cache.totals)
+            print(f"  {label:<18} first result {first:5.2f}s   all {len(repeated)} {total:5.2f}s"
+                  f"   input cost {billed(before, after):8.0f} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", type=int, default=5)
+    parser.add_argument("--campaign", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub time to first token")
+    parser.add_argument("--prefill", type=float, default=0.3, help="stub seconds per 1000 uncached input tokens")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    args = parser.parse_args()
+
+    configure_env()
+    env = {"LOG_LEVEL": "WARNING", "RATE_LIMIT_ENABLED": "false", "ARTIFACT_STORE_BACKEND": "memory",
+           "GENERATION_HISTORY_ENABLED": "false", "BATCH_CONCURRENCY": "4"}
+    stub_app = create_stub_app(args.latency, token_delay=args.token_delay, prefill_delay=args.prefill)
+    with BackgroundServer(stub_app) as stub:
+        env["ANTHROPIC_BASE_URL"] = stub.url
+        with AppProcess(env=env) as app:
+            brief = [{**PAYLOAD, "description": detailed_brief()}]
+            asyncio.run(compare(app.url, stub_app, f"{args.variants} variants of a detailed brief", brief, args.variants, 4))
+            campaign = [{**PAYLOAD, "business_type": BUSINESSES[i % len(BUSINESSES)],
+                         "description": f"{PAYLOAD['description']} (location {i})"} for i in range(args.campaign)]
+            asyncio.run(compare(app.url, stub_app, f"campaign of {args.campaign} businesses", campaign, 1, 4))
+
+
+if __name__ == "__main__":
+    main()
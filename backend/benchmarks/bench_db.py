@@ -0,0 +1,103 @@
+"""Throughput of user/item reads on the sync Session path vs the AsyncSession path.
+
+    python -m benchmarks.bench_db --users 2000 --concurrency 50 --requests 2000
+
+Both variants serve the same queries from the same SQLite file through a
+real uvicorn server; the sync variant runs in FastAPI's threadpool exactly
+like the old get_db endpoints did.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from .utils import BackgroundServer, configure_env
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    from app.db.session import get_async_db, get_db
+    from app.schemas.item import Item
+    from app.schemas.user import User
+    from app.services import item as item_service
+    from app.services import user as user_service
+
+    app = FastAPI()
+
+    @app.get("/sync/users/{user_id}", response_model=User)
+    def sync_user(user_id: int, db: Session = Depends(get_db)):
+        return user_service.get_user(db, user_id)
+
+    @app.get("/sync/users/{user_id}/items", response_model=list[Item])
+    def sync_items(user_id: int, db: Session = Depends(get_db)):
+        return item_service.get_user_items(db, user_id)
+
+    @app.get("/async/users/{user_id}", response_model=User)
+    async def async_user(user_id: int, db=Depends(get_async_db)):
+        return await user_service.get_user_async(db, user_id)
+
+    @app.get("/async/users/{user_id}/items", response_model=list[Item])
+    async def async_items(user_id: int, db=Depends(get_async_db)):
+        return await item_service.get_user_items_async(db, user_id)
+
+    return app
+
+
+def seed(n_users: int, items_per_user: int):
+    from app.db.base import Base, engine
+    from app.models import Item, User
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"email": f"user{i}@example.com", "hashed_password": "x"} for i in range(1, n_users + 1)
+        ])
+        conn.execute(Item.__table__.insert(), [
+            {"title": f"item {i}-{j}", "owner_id": i}
+            for i in range(1, n_users + 1) for j in range(items_per_user)
+        ])
+
+
+async def load(base_url: str, prefix: str, n_users: int, concurrency: int, requests: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        async def one(i: int):
+            user_id = random.randint(1, n_users)
+            path = f"/{prefix}/users/{user_id}" + ("/items" if i % 2 else "")
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--items-per-user", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        seed(args.users, args.items_per_user)
+        with BackgroundServer(build_app()) as server:
+            for prefix in ("sync", "async"):
+                rps = asyncio.run(load(server.url, prefix, args.users, args.concurrency, args.requests))
+                print(f"{prefix:<6} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Peak memory of the NDJSON item export vs loading every item with .all().
+
+    python -m benchmarks.bench_export --items 500000
+
+The streaming export is consumed over HTTP from a real server in this
+process; afterwards the old pattern (``.all()`` plus lazy ``item.owner``)
+runs for comparison. Resident memory is sampled while each one runs and
+reported as the growth over the level before it started (Linux only).
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from .fixtures import LOGIN_EMAIL, LOGIN_PASSWORD
+from .utils import BackgroundServer, configure_env
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def seed(n_items: int, n_users: int = 1000, chunk: int = 50000):
+    from app.core.security import get_password_hash
+    from app.db.base import Base, engine
+    from app.models import Item, User
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"email": f"user{i}@example.com", "hashed_password": "x"} for i in range(1, n_users + 1)
+        ])
+        # Exporting every owner's items takes a superuser
+        conn.execute(User.__table__.insert(), [
+            {"email": LOGIN_EMAIL, "hashed_password": get_password_hash(LOGIN_PASSWORD), "is_superuser": True}
+        ])
+        for offset in range(0, n_items, chunk):
+            conn.execute(Item.__table__.insert(), [
+                {"title": f"item {i}", "description": "x" * 64, "owner_id": i % n_users + 1}
+                for i in range(offset, min(offset + chunk, n_items))
+            ])
+
+
+async def stream_export(base_url: str):
+    lines, peak = 0, rss_mb()
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        login = await client.post("/api/v1/auth/token", data={"username": LOGIN_EMAIL, "password": LOGIN_PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        async with client.stream("GET", "/api/v1/items/export", headers=headers) as response:
+            response.raise_for_status()
+            async for _ in response.aiter_lines():
+                lines += 1
+                if lines % 10000 == 0:
+                    peak = max(peak, rss_mb())
+    return lines, peak
+
+
+def load_all() -> int:
+    from app.db.base import SessionLocal
+    from app.schemas.item import ItemWithOwner
+    from app.services import item as item_service
+
+    with SessionLocal() as db:
+        items = item_service.get_items(db, limit=None)
+        lines = [ItemWithOwner.model_validate(item).model_dump_json() for item in items]
+        return len(lines), rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        seed(args.items)
+        from app.main import app
+
+        with BackgroundServer(app) as server:
+            baseline = rss_mb()
+            started = time.perf_counter()
+            exported, peak = asyncio.run(stream_export(server.url))
+            print(
+                f"streaming export: {exported:,} rows in {time.perf_counter() - started:.1f}s,"
+                f" RSS +{peak - baseline:.0f} MB"
+            )
+
+        baseline = rss_mb()
+        started = time.perf_counter()
+        loaded, peak = load_all()
+        print(
+            f".all() + lazy owner: {loaded:,} rows in {time.perf_counter() - started:.1f}s,"
+            f" RSS +{peak - baseline:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
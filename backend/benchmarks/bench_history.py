@@ -0,0 +1,139 @@
+"""Generation history: cost on the request path, flush throughput and storage.
+
+    python -m benchmarks.bench_history --generations 2000 --repeat 0.5
+
+Runs in-process against a throwaway SQLite database. ``--repeat`` is the
+share of generations that return an earlier template (cache hits and
+similar-request serves), which deduplication stores once. Compares the
+batched recorder, with zstd and with the gzip fallback, against writing
+each generation uncompressed in its own transaction as it completes.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+
+from .fixtures import reset_database
+from .utils import configure_env
+
+SECTIONS = ["about", "services", "team", "pricing", "testimonials", "gallery", "faq", "contact"]
+WORDS = ("family owned local modern classic organic artisan premium friendly affordable downtown booking "
+         "gallery menu reviews team pricing services contact location hours events delivery catering").split()
+
+
+def synthetic_template(rng: random.Random) -> dict:
+    """A generated site of realistic size: ~15 KB of html, ~6 KB of css."""
+    sections = []
+    for name in rng.sample(SECTIONS, 6):
+        paragraphs = "".join(
+            f"<p class=\"{name}-text\">{' '.join(rng.choices(WORDS, k=40))}</p>" for _ in range(4)
+        )
+        sections.append(f"<section id=\"{name}\" class=\"section {name}\"><h2>{name.title()}</h2>{paragraphs}</section>")
+    html = ("<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>Site</title></head><body>"
+            "<header class=\"site-header\"><nav>" + "".join(f"<a href=\"#{s}\">{s}</a>" for s in SECTIONS) +
+            "</nav></header><main>" + "".join(sections) + "</main><footer>&copy; 2024</footer></body></html>")
+    css = "".join(
+        f".{name}{{padding:{rng.randint(2, 6)}rem 1rem;background:#{rng.randrange(0xffffff):06x}}}"
+        f".{name}-text{{color:#{rng.randrange(0xffffff):06x};line-height:1.{rng.randint(4, 8)};max-width:60ch}}"
+        f".{name} h2{{font-size:{rng.randint(18, 32)}px;margin:0 0 1rem;letter-spacing:.02em}}"
+        for name in SECTIONS for _ in range(6)
+    )
+    return {"html": html, "css": css, "js": None, "partial": False}
+
+
+def workload(n: int, repeat: float, seed: int):
+    from app.schemas.website import WebsiteRequest
+
+    rng = random.Random(seed)
+    generated = []
+    for i in range(n):
+        request = WebsiteRequest(description=f"site number {i} " + " ".join(rng.choices(WORDS, k=12)),
+                                 business_type=rng.choice(["bakery", "salon", "gym", "hotel"]))
+        if generated and rng.random() < repeat:
+            generated.append((request, rng.choice(generated)[1], "HIT"))
+        else:
+            generated.append((request, synthetic_template(rng), "MISS"))
+    return generated
+
+
+async def run_recorder(generations, label: str):
+    from app.db.base import dispose_engines
+    from app.services.generation_history import GenerationRecorder
+    from app.services.prompts import UsageTally
+
+    reset_database()
+    recorder = GenerationRecorder(flush_batch=200, flush_interval=3600, buffer_max=len(generations))
+    usage = UsageTally()
+    started = time.perf_counter()
+    for request, result, status in generations:
+        recorder.record(request, result, status, 1.5, usage, "model", "127.0.0.1")
+    per_record = (time.perf_counter() - started) / len(generations)
+
+    started = time.perf_counter()
+    await recorder.flush()
+    flushed = time.perf_counter() - started
+    stats = recorder.stats()
+    await dispose_engines()
+    print(f"  {label:<22} record() {per_record * 1e6:6.1f}us   flush {len(generations) / flushed:7.0f} gen/s"
+          f"   stored {stats['artifacts_stored']} artifacts, {recorder.bytes_stored / 2**20:6.2f} MB"
+          f" (ratio {stats['compression_ratio']:.1f}x)")
+
+
+async def run_inline(generations):
+    """Uncompressed artifacts and the generation committed per request, as a naive endpoint would."""
+    from app.db.base import dispose_engines, get_async_session_factory
+    from app.models.generation import Generation, GenerationArtifact
+    from app.services.generation_history import insert_ignoring_duplicates
+
+    reset_database()
+    latencies = []
+    stored = 0
+    factory = get_async_session_factory()
+    for request, result, status in generations:
+        started = time.perf_counter()
+        async with factory() as db:
+            digests = {}
+            for kind in ("html", "css", "js"):
+                if result.get(kind):
+                    body = result[kind].encode()
+                    digests[f"{kind}_digest"] = hashlib.sha256(body).hexdigest()
+                    await db.execute(insert_ignoring_duplicates(db.bind.dialect.name, GenerationArtifact), [{
+                        "digest": digests[f"{kind}_digest"], "kind": kind, "encoding": "identity",
+                        "size": len(body), "compressed_size": len(body), "body": body,
+                    }])
+                    stored += len(body) if status == "MISS" else 0
+            db.add(Generation(client="127.0.0.1", business_type=request.business_type, description=request.description,
+                              request=request.model_dump(), cache_status=status, **digests))
+            await db.commit()
+        latencies.append(time.perf_counter() - started)
+    await dispose_engines()
+    print(f"  {'inline, uncompressed':<22} +{statistics.median(latencies) * 1000:5.2f}ms per request (p50)"
+          f"   {len(generations) / sum(latencies):7.0f} gen/s   stored {stored / 2**20:6.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generations", type=int, default=2000)
+    parser.add_argument("--repeat", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    configure_env("sqlite:///./benchmark_history.sqlite3")
+    from app.services import generation_history
+
+    generations = workload(args.generations, args.repeat, args.seed)
+    raw = sum(len(result["html"]) + len(result["css"]) for _, result, _ in generations)
+    print(f"{args.generations} generations, {args.repeat:.0%} repeats, {raw / 2**20:.1f} MB of html/css served")
+
+    asyncio.run(run_inline(generations))
+    if generation_history.zstandard is not None:
+        asyncio.run(run_recorder(generations, "batched, zstd"))
+    # The fallback used when zstandard is not installed
+    generation_history.zstandard = None
+    asyncio.run(run_recorder(generations, "batched, gzip"))
+
+
+if __name__ == "__main__":
+    main()
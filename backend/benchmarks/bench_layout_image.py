@@ -0,0 +1,109 @@
+"""Cost of ingesting ~10 MB layout images: latency and server memory.
+
+    python -m benchmarks.bench_layout_image --runs 3
+
+Compares the multipart upload (spooled to disk, hashed in chunks) with the
+same image sent inline as base64 in the JSON body, and the repeat upload
+that deduplication answers without decoding. The inline case goes through
+/generate-template, so it also includes a (stubbed, instant) generation.
+Each case runs against a fresh server process; memory is the growth of
+its peak RSS (Linux only).
+"""
+import argparse
+import base64
+import io
+import random
+import statistics
+import time
+
+import httpx
+
+from .load_generate_template import PAYLOAD
+from .stub_llm import create_stub_app
+from .utils import AppProcess, BackgroundServer, configure_env
+
+API = "/api/v1/website"
+
+
+def noise_image(kind: str, target_bytes: int, seed: int) -> bytes:
+    """A random-noise image of roughly ``target_bytes``; noise defeats compression."""
+    from PIL import Image
+
+    # PNG stores noise at ~3 bytes per pixel, JPEG at high quality ~1.2
+    pixels = target_bytes // (3 if kind == "png" else 1.2)
+    width = int((pixels * 4 / 3) ** 0.5)
+    height = int(pixels // width)
+    image = Image.frombytes("RGB", (width, height), random.Random(seed).randbytes(width * height * 3))
+    out = io.BytesIO()
+    if kind == "png":
+        image.save(out, "PNG", compress_level=1)
+    else:
+        image.save(out, "JPEG", quality=95)
+    return out.getvalue()
+
+
+def peak_rss(pid: int) -> int:
+    """High-water resident set size of ``pid`` in bytes."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def upload(client: httpx.Client, body: bytes, kind: str) -> dict:
+    response = client.post(f"{API}/layout-images", files={"file": (f"layout.{kind}", body, f"image/{kind}")})
+    response.raise_for_status()
+    return response.json()
+
+
+def inline(client: httpx.Client, body: bytes, kind: str) -> dict:
+    data = f"data:image/{kind};base64,{base64.b64encode(body).decode()}"
+    response = client.post(f"{API}/generate-template", json={**PAYLOAD, "layout_image": data, "bypass_cache": True})
+    response.raise_for_status()
+    return response.json()
+
+
+def run_case(name: str, send, images: list, kind: str, env: dict):
+    latencies, growth, repeats = [], [], []
+    for body in images:
+        with AppProcess(env=env) as app, httpx.Client(base_url=app.url, timeout=120) as client:
+            # One small request so the idle baseline includes the lazily set up clients
+            client.post(f"{API}/generate-template", json=PAYLOAD).raise_for_status()
+            before = peak_rss(app.process.pid)
+            started = time.perf_counter()
+            send(client, body, kind)
+            latencies.append(time.perf_counter() - started)
+            growth.append(peak_rss(app.process.pid) - before)
+            started = time.perf_counter()
+            send(client, body, kind)
+            repeats.append(time.perf_counter() - started)
+    print(
+        f"  {name:<18} first {statistics.median(latencies) * 1000:7.0f}ms"
+        f"   repeat {statistics.median(repeats) * 1000:6.0f}ms"
+        f"   peak RSS +{statistics.median(growth) / 2**20:6.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--megabytes", type=float, default=10)
+    args = parser.parse_args()
+
+    configure_env()
+    target = int(args.megabytes * 2**20)
+    env = {"LOG_LEVEL": "WARNING", "RATE_LIMIT_ENABLED": "false", "ARTIFACT_STORE_BACKEND": "memory"}
+
+    with BackgroundServer(create_stub_app(0.0)) as stub:
+        env["ANTHROPIC_BASE_URL"] = stub.url
+        for kind in ("png", "jpeg"):
+            images = [noise_image(kind, target, seed) for seed in range(args.runs)]
+            sizes = statistics.median(len(image) for image in images) / 2**20
+            print(f"{kind}: {sizes:.1f} MB source")
+            run_case("multipart upload", upload, images, kind, env)
+            run_case("inline base64", inline, images, kind, env)
+
+
+if __name__ == "__main__":
+    main()
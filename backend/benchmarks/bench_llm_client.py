@@ -0,0 +1,71 @@
+"""Per-request overhead of building an Anthropic client per call vs the shared pooled client.
+
+    python -m benchmarks.bench_llm_client --requests 200
+
+Runs against the zero-latency stub server so the numbers are dominated by
+client construction and connection setup rather than generation time.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from anthropic import AsyncAnthropic
+
+from .stub_llm import create_stub_app
+from .utils import BackgroundServer, configure_env
+
+MESSAGE = {"role": "user", "content": "ping"}
+
+
+async def call(client: AsyncAnthropic):
+    await client.messages.create(model="stub", max_tokens=16, messages=[MESSAGE])
+
+
+async def per_request(n: int, base_url: str) -> list:
+    timings = []
+    for _ in range(n):
+        started = time.perf_counter()
+        client = AsyncAnthropic(api_key="sk-ant-api-stub", base_url=base_url)
+        await call(client)
+        await client.close()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def pooled(n: int) -> list:
+    from app.services.llm_client import create_llm_client
+
+    client = create_llm_client()
+    timings = []
+    try:
+        for _ in range(n):
+            started = time.perf_counter()
+            await call(client)
+            timings.append(time.perf_counter() - started)
+    finally:
+        await client.close()
+    return timings
+
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<12} mean={statistics.mean(timings) * 1000:7.2f}ms  p95={p95 * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with BackgroundServer(create_stub_app(latency=0)) as stub:
+        configure_env()
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        report("per-request", asyncio.run(per_request(args.requests, stub.url)))
+        report("pooled", asyncio.run(pooled(args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Login latency under concurrency with bcrypt inline on the event loop vs offloaded.
+
+    python -m benchmarks.bench_login --concurrency 20 --requests 100 --rounds 12
+
+"inline" reproduces the old handler, which called verify_password directly
+from an async endpoint; "offloaded" is the real /auth/token endpoint. While
+the logins run, a probe hits a trivial /ping route to show how long every
+other request on the worker is stalled. Login latency itself only improves
+with PASSWORD_HASH_WORKERS > 1 on a multi-core host.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+
+from .utils import BackgroundServer, configure_env, percentile
+
+EMAIL = "bench@example.com"
+PASSWORD = "correct horse battery staple"
+
+
+def build_app():
+    from fastapi import Depends, FastAPI, HTTPException
+    from fastapi.security import OAuth2PasswordRequestForm
+
+    from app.api.v1.endpoints import auth
+    from app.core.security import verify_password
+    from app.db.session import get_async_db
+    from app.services import user as user_service
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/offloaded")
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    @app.post("/inline/token")
+    async def inline_login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_async_db)):
+        user = await user_service.get_user_by_email_async(db, form_data.username)
+        if not user or not verify_password(form_data.password, user.hashed_password):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    return app
+
+
+def seed():
+    from app.core.security import get_password_hash
+    from app.db.base import Base, engine
+    from app.models import User
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"email": EMAIL, "hashed_password": get_password_hash(PASSWORD)}
+        ])
+
+
+async def load(base_url: str, path: str, concurrency: int, requests: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    form = {"username": EMAIL, "password": PASSWORD}
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def one() -> float:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(path, data=form)
+                response.raise_for_status()
+                return time.perf_counter() - started
+
+        async def probe() -> list:
+            timings = []
+            while not done.is_set():
+                started = time.perf_counter()
+                (await client.get("/ping")).raise_for_status()
+                timings.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+            return timings
+
+        probe_task = asyncio.create_task(probe())
+        logins = await asyncio.gather(*(one() for _ in range(requests)))
+        done.set()
+        return logins, await probe_task
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+        seed()
+        with BackgroundServer(build_app()) as server:
+            for label, path in (("inline", "/inline/token"), ("offloaded", "/offloaded/token")):
+                logins, pings = asyncio.run(load(server.url, path, args.concurrency, args.requests))
+                print(
+                    f"{label:<10} login p50={percentile(logins, 50) * 1000:7.1f}ms"
+                    f" p99={percentile(logins, 99) * 1000:7.1f}ms"
+                    f" | ping p99={percentile(pings, 99) * 1000:7.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Page latency by depth: OFFSET pagination vs keyset cursors on (created_at, id).
+
+    python -m benchmarks.bench_pagination --rows 1000000 --page-size 100
+
+Seeds a SQLite users table, then times fetching one page at increasing
+depths. OFFSET grows linearly with depth; the keyset page should stay flat.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from .utils import configure_env
+
+DEPTHS = (0, 0.1, 0.25, 0.5, 0.9)
+
+
+def seed(rows: int, chunk: int = 50000):
+    from app.db.base import Base, engine
+    from app.models import User
+
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        for offset in range(0, rows, chunk):
+            conn.execute(User.__table__.insert(), [
+                {
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "x",
+                    # Several rows share a timestamp so the id tiebreak is exercised
+                    "created_at": start + timedelta(seconds=i // 4),
+                }
+                for i in range(offset, min(offset + chunk, rows))
+            ])
+
+
+async def measure(rows: int, page_size: int, repeats: int):
+    from sqlalchemy import select
+
+    from app.core.pagination import encode_cursor
+    from app.db.base import AsyncSessionLocal
+    from app.models import User
+    from app.services import user as user_service
+
+    async with AsyncSessionLocal() as db:
+        for depth in DEPTHS:
+            skip = int(rows * depth)
+            anchor = None
+            if skip:
+                anchor = (await db.execute(
+                    select(User.created_at, User.id).order_by(User.created_at, User.id).offset(skip - 1).limit(1)
+                )).one()
+            cursor = encode_cursor(*anchor) if anchor else None
+
+            offset_times, keyset_times = [], []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                await user_service.get_users_async(db, skip=skip, limit=page_size)
+                offset_times.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                await user_service.get_users_page_async(db, cursor=cursor, limit=page_size)
+                keyset_times.append(time.perf_counter() - started)
+                db.expunge_all()
+
+            print(
+                f"skip={skip:>9,}  offset={statistics.median(offset_times) * 1000:8.2f}ms"
+                f"  keyset={statistics.median(keyset_times) * 1000:8.2f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_env(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f"seeded {args.rows:,} users in {time.perf_counter() - started:.1f}s")
+        asyncio.run(measure(args.rows, args.page_size, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Fuzz and benchmark the completion parsers over a corpus of responses.
+
+    python -m benchmarks.bench_parser [--corpus responses.jsonl] [--fuzz 2000]
+
+The corpus is JSONL with the completion text under "text", "completion",
+"content" or "response"; without one, a synthetic corpus is built from the
+stub completion. Every entry is also expanded into the variants that broke
+the old split-based parsing (upper-case fences, extra JS blocks, unlabeled
+or missing fences, CRLF, truncation). The report compares the old chained
+split() extraction with parse_template, then fuzzes parse_template and the
+streaming parser with random mutations and chunkings: neither may raise,
+and both must agree on the HTML of well-formed inputs.
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services.template_parser import IncrementalFenceParser, parse_template
+
+from .stub_llm import SAMPLE_COMPLETION
+
+TEXT_FIELDS = ("text", "completion", "content", "response")
+
+
+def load_corpus(path: str) -> list:
+    corpus = []
+    with open(path) as handle:
+        for line in handle:
+            record = json.loads(line)
+            text = next((record[f] for f in TEXT_FIELDS if isinstance(record.get(f), str)), None)
+            if text:
+                corpus.append(text)
+    return corpus
+
+
+def synthetic_corpus(size_kb: int = 12) -> list:
+    section = "<section class=\"feature\"><h2>Feature</h2><p>" + "Lorem ipsum " * 20 + "</p></section>\n"
+    html = SAMPLE_COMPLETION.split("```html")[1].split("```")[0]
+    body = html.replace("</body>", section * (size_kb * 1024 // len(section)) + "</body>")
+    return [SAMPLE_COMPLETION.replace(html, body)]
+
+
+def variants(text: str) -> dict:
+    return {
+        "original": text,
+        "upper_fences": text.replace("```html", "```HTML").replace("```css", "```CSS"),
+        "javascript_block": text + "\nJS:\n```javascript\ndocument.body.classList.add('ready');\n```\n",
+        "unlabeled_fences": text.replace("```html", "```").replace("```css", "```"),
+        "crlf": text.replace("\n", "\r\n"),
+        "truncated": text[: int(len(text) * 0.9)],
+        "no_fences": text.split("```html")[1].split("```")[0],
+        "prose_around": "Sure! Here is your site.\n\n" + text + "\n\nLet me know if you need changes.",
+    }
+
+
+def old_parse(text: str):
+    html = text.split("```html")[1].split("```")[0].strip()
+    css = text.split("```css")[1].split("```")[0].strip()
+    return html, css
+
+
+def time_per_call(fn, texts: list, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            try:
+                fn(text)
+            except Exception:
+                pass
+    return (time.perf_counter() - started) / (repeats * len(texts)) * 1e6
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    for _ in range(rng.randint(1, 5)):
+        position = rng.randrange(len(text) + 1)
+        choice = rng.random()
+        if choice < 0.4:
+            text = text[:position] + rng.choice(["`", "``", "```", "```css\n", "\n```\n", "<style>"]) + text[position:]
+        elif choice < 0.8:
+            end = min(len(text), position + rng.randint(1, 50))
+            text = text[:position] + text[end:]
+        else:
+            text = text[:position]
+    return text
+
+
+def stream_html(text: str, rng: random.Random) -> str:
+    parser = IncrementalFenceParser()
+    html = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 16)
+        for event, chunk in parser.feed(text[position:position + size]):
+            if event == "html_chunk":
+                html.append(chunk)
+        position += size
+    html.extend(chunk for event, chunk in parser.close() if event == "html_chunk")
+    return "".join(html).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="JSONL file of recorded completions")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--fuzz", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    rng = random.Random(args.seed)
+
+    print(f"{'variant':<18} {'old ok':>7} {'new ok':>7} {'old us':>9} {'new us':>9}")
+    for name in variants(corpus[0]):
+        texts = [variants(text)[name] for text in corpus]
+        old_ok = new_ok = 0
+        for text in texts:
+            try:
+                html, css = old_parse(text)
+                old_ok += bool(html and css)
+            except IndexError:
+                pass
+            new_ok += not parse_template(text).missing()
+        print(
+            f"{name:<18} {old_ok:>4}/{len(texts):<2} {new_ok:>4}/{len(texts):<2}"
+            f" {time_per_call(old_parse, texts, args.repeats):9.1f}"
+            f" {time_per_call(parse_template, texts, args.repeats):9.1f}"
+        )
+
+    disagreements = 0
+    for _ in range(args.fuzz):
+        text = mutate(rng.choice(corpus), rng)
+        parse_template(text)
+        stream_html(text, rng)
+    for text in corpus:
+        if stream_html(text, rng) != parse_template(text).html:
+            disagreements += 1
+    print(f"fuzzed {args.fuzz} mutations without exceptions; stream/batch html disagreements: {disagreements}")
+
+
+if __name__ == "__main__":
+    main()
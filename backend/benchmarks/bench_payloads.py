@@ -0,0 +1,118 @@
+"""Bytes on the wire for generated templates and their previews.
+
+    python -m benchmarks.bench_payloads --sections 12
+
+Compares the JSON response with and without gzip, the preview document
+as raw/gzip/brotli, and the cost of a conditional re-fetch (304).
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from .load_generate_template import PAYLOAD
+from .stub_llm import create_stub_app
+from .utils import BackgroundServer, configure_env
+
+SECTION = """
+    <!-- {name} section -->
+    <section id="{name}" class="{name}">
+        <div class="container">
+            <h2 class="section-title">Our {name}</h2>
+            <p class="section-lead">
+                Freshly baked every morning with locally sourced flour,
+                butter and seasonal fruit from farms around the city.
+            </p>
+            <div class="grid">
+                <article class="card"><h3>Sourdough</h3><p>Slow fermented for 36 hours.</p></article>
+                <article class="card"><h3>Croissants</h3><p>Laminated by hand with French butter.</p></article>
+                <article class="card"><h3>Seasonal tarts</h3><p>Whatever the orchard gives us this week.</p></article>
+            </div>
+        </div>
+    </section>
+"""
+
+SECTION_CSS = """
+/* {name} */
+.{name} {{
+    padding: 4rem 1rem;
+    background-color: var(--color-bg);
+}}
+
+.{name} .grid {{
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(220px, 1fr));
+    gap: 1.5rem;
+}}
+
+.{name} .card {{
+    border-radius: 8px;
+    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
+}}
+"""
+
+
+def completion(sections: int) -> str:
+    names = [f"section{i}" for i in range(sections)]
+    html = (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="utf-8">\n'
+        "    <title>Bakery</title>\n</head>\n<body>\n    <main>"
+        + "".join(SECTION.format(name=n) for n in names)
+        + "    </main>\n</body>\n</html>"
+    )
+    css = ":root {\n    --color-bg: #fffaf3;\n}\n" + "".join(SECTION_CSS.format(name=n) for n in names)
+    return f"HTML:\n```html\n{html}\n```\n\nCSS:\n```css\n{css}\n```\n"
+
+
+async def run(base_url: str, raw_size: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        identity = await client.post(
+            "/api/v1/website/generate-template", json=PAYLOAD, headers={"Accept-Encoding": "identity"}
+        )
+        identity.raise_for_status()
+        gzipped = await client.post(
+            "/api/v1/website/generate-template", json=PAYLOAD, headers={"Accept-Encoding": "gzip"}
+        )
+        body = gzipped.json()
+        minified = len(body["html"]) + len(body["css"])
+        print(f"completion html+css:  {raw_size:>7}B raw, {minified:>7}B minified")
+        print(f"JSON response:        {identity.num_bytes_downloaded:>7}B identity, "
+              f"{gzipped.num_bytes_downloaded:>7}B gzip")
+
+        preview = body["preview"]
+        for encoding in ("identity", "gzip", "br"):
+            response = await client.get(preview, headers={"Accept-Encoding": encoding})
+            response.raise_for_status()
+            print(f"preview ({encoding:<8}):  {response.num_bytes_downloaded:>7}B "
+                  f"content-encoding={response.headers.get('content-encoding', '-')}")
+
+        etag = response.headers["etag"]
+        rounds = 200
+        started = time.perf_counter()
+        for _ in range(rounds):
+            revalidated = await client.get(preview, headers={"If-None-Match": etag, "Accept-Encoding": "br"})
+        elapsed = (time.perf_counter() - started) / rounds
+        print(f"conditional re-fetch: status={revalidated.status_code} "
+              f"{revalidated.num_bytes_downloaded}B body, {elapsed * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=12)
+    args = parser.parse_args()
+
+    configure_env()
+    text = completion(args.sections)
+    raw_size = len(text.split("```html\n")[1].split("\n```")[0]) + len(text.split("```css\n")[1].split("\n```")[0])
+    with BackgroundServer(create_stub_app(latency=0, completion=text)) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        from app.main import app
+
+        with BackgroundServer(app) as api:
+            asyncio.run(run(api.url, raw_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Success rate and tail latency of LLM calls under injected upstream faults.
+
+    python -m benchmarks.bench_resilience --calls 200
+
+Each scenario runs the same workload through TemplateGeneratorService
+twice against the fault-injecting stub: once with a bare policy (one
+attempt, no hedging, no fallback) and once with the resilience features
+the scenario exercises.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from .stub_llm import FaultInjector, create_stub_app
+from .utils import BackgroundServer, configure_env, percentile
+
+PRIMARY = "stub-primary"
+FALLBACK = "stub-fallback"
+
+
+async def workload(service, calls: int, concurrency: int, stream: bool):
+    from fastapi import HTTPException
+
+    slots = asyncio.Semaphore(concurrency)
+    timings = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with slots:
+            started = time.perf_counter()
+            try:
+                if stream:
+                    async for _ in service.stream_template("ping", max_tokens=64):
+                        pass
+                else:
+                    await service.generate_template("ping", max_tokens=64)
+            except HTTPException:
+                failures += 1
+                return
+            timings.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return timings, failures
+
+
+async def run_scenario(stub_app, name, faults, policies, calls, concurrency, stream=False):
+    from app.services.llm_client import create_llm_client
+    from app.services.template_service import TemplateGeneratorService
+
+    print(f"\n{name}")
+    for label, policy in policies:
+        stub_app.state.faults = faults()
+        client = create_llm_client()
+        try:
+            service = TemplateGeneratorService(client, policy)
+            if policy.hedge:
+                # Warm the latency window so hedging has a p95 to work from
+                await workload(service, policy.hedge_min_samples, concurrency, stream)
+                stub_app.state.faults = faults()
+            timings, failures = await workload(service, calls, concurrency, stream)
+        finally:
+            await client.close()
+        upstream = stub_app.state.faults.calls_by_model
+        line = f"  {label:<22} ok={len(timings) / calls:6.1%}"
+        if timings:
+            line += (
+                f"  p50={percentile(timings, 50) * 1000:6.0f}ms  p95={percentile(timings, 95) * 1000:6.0f}ms"
+                f"  p99={percentile(timings, 99) * 1000:6.0f}ms"
+            )
+        print(f"{line}  upstream calls={dict(upstream)}")
+
+
+async def run(stub_app, calls: int, concurrency: int):
+    from app.services.call_policy import CallPolicy
+
+    bare = dict(max_attempts=1, hedge=False, attempt_timeout=30)
+    await run_scenario(
+        stub_app, "slow tail (3% of calls +2s)",
+        lambda: FaultInjector(slow_rate=0.03, slow_latency=2.0, seed=1),
+        [
+            ("single attempt", CallPolicy([PRIMARY], **bare)),
+            ("hedged after p95", CallPolicy([PRIMARY], hedge=True, hedge_min_samples=20, hedge_min_delay=0.05)),
+        ],
+        calls, concurrency,
+    )
+    await run_scenario(
+        stub_app, "overloaded (20% of calls 529)",
+        lambda: FaultInjector(error_rate=0.2, seed=2),
+        [
+            ("single attempt", CallPolicy([PRIMARY], **bare)),
+            ("3 jittered attempts", CallPolicy([PRIMARY], max_attempts=3, retry_base_delay=0.05)),
+        ],
+        calls, concurrency,
+    )
+    await run_scenario(
+        stub_app, "deadline (10% of calls hang 5s)",
+        lambda: FaultInjector(slow_rate=0.1, slow_latency=5.0, seed=3),
+        [
+            ("30s deadline", CallPolicy([PRIMARY], **bare)),
+            ("0.5s deadline + retry", CallPolicy([PRIMARY], attempt_timeout=0.5, retry_base_delay=0.05)),
+        ],
+        calls, concurrency,
+    )
+    await run_scenario(
+        stub_app, "primary model down",
+        lambda: FaultInjector(failing_models=[PRIMARY]),
+        [
+            ("no fallback", CallPolicy([PRIMARY], **bare)),
+            ("breaker + fallback", CallPolicy(
+                [PRIMARY, FALLBACK], retry_base_delay=0.05, breaker_window=10, breaker_reset_timeout=60
+            )),
+        ],
+        calls, concurrency,
+    )
+    await run_scenario(
+        stub_app, "streaming, overloaded (30% of calls 529)",
+        lambda: FaultInjector(error_rate=0.3, seed=4),
+        [
+            ("single attempt", CallPolicy([PRIMARY], **bare)),
+            ("retry before 1st token", CallPolicy([PRIMARY], max_attempts=3, retry_base_delay=0.05)),
+        ],
+        calls, concurrency, stream=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    configure_env()
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency * 2)
+    stub_app = create_stub_app(args.latency)
+    with BackgroundServer(stub_app) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        asyncio.run(run(stub_app, args.calls, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
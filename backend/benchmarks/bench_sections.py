@@ -0,0 +1,100 @@
+"""Wall-clock of one full-page completion vs parallel per-section generation.
+
+    python -m benchmarks.bench_sections --token-delay 0.002 --features menu gallery team faq
+
+The stub decodes every reply at ``token_delay`` seconds per ~4 character
+token, so a single call pays for the whole page while the sectioned mode
+should approach the slowest of its concurrent calls.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from .stub_llm import create_stub_app
+from .utils import BackgroundServer, configure_env
+
+SECTION_HTML = '<section id="{id}" class="{id}"><h2>{id}</h2>' + "<p>Lorem ipsum dolor sit amet.</p>" * 20 + "</section>"
+SECTION_CSS = ".{id} {{ padding: var(--space-unit); }}\n.{id} h2 {{ color: var(--color-primary); }}\n"
+SHELL_HTML = (
+    '<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8"><title>Stub</title></head>\n'
+    "<body><header><nav>" + "<a href=\"#\">Link</a>" * 10 + "</nav></header>\n"
+    "<main><!-- SECTIONS --></main>\n<footer>Stub footer</footer></body>\n</html>"
+)
+SHELL_CSS = ":root { --color-primary: #333; --space-unit: 1rem; }\nbody { margin: 0; }\n" * 5
+
+
+def _reply(html: str, css: str) -> str:
+    return f"HTML:\n```html\n{html}\n```\n\nCSS:\n```css\n{css}\n```\n"
+
+
+def completion(sections: list):
+    """Reply to the shell, section and single-call prompts with matching sizes."""
+    def reply(body: dict) -> str:
+        prompt = body["messages"][0]["content"]
+        if "page shell" in prompt:
+            return _reply(SHELL_HTML, SHELL_CSS)
+        if "Create only the" in prompt:
+            section_id = prompt.split('<section id="', 1)[1].split('"', 1)[0]
+            return _reply(SECTION_HTML.format(id=section_id), SECTION_CSS.format(id=section_id))
+        body_html = "\n".join(SECTION_HTML.format(id=s) for s in sections)
+        return _reply(
+            SHELL_HTML.replace("<!-- SECTIONS -->", body_html),
+            SHELL_CSS + "".join(SECTION_CSS.format(id=s) for s in sections),
+        )
+    return reply
+
+
+async def run(payload: dict, rounds: int):
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            for parallel in (False, True):
+                timings = []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    response = await client.post(
+                        "/api/v1/website/generate-template",
+                        json={**payload, "parallel_sections": parallel, "bypass_cache": True},
+                    )
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                body = response.json()
+                label = "sectioned" if parallel else "single call"
+                print(
+                    f"{label:<12} best={min(timings):.2f}s  mean={sum(timings) / len(timings):.2f}s"
+                    f"  html={len(body['html'])}B css={len(body['css'])}B partial={body['partial']}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--features", nargs="*", default=["menu", "gallery", "team", "faq"])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    configure_env()
+    from app.services.sectioned_generation import plan_sections
+
+    payload = {
+        "description": "A neighbourhood bakery with online ordering",
+        "business_type": "bakery",
+        "features": args.features,
+    }
+    from app.schemas.website import WebsiteRequest
+    sections = [section_id for _, section_id in plan_sections(WebsiteRequest(**payload))]
+    stub_app = create_stub_app(args.latency, completion(sections), args.token_delay)
+    with BackgroundServer(stub_app) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        asyncio.run(run(payload, args.rounds))
+        print(f"stub calls: {stub_app.state.calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Response serialization cost for the website, users and items schemas.
+
+    python -m benchmarks.bench_serialization --rows 1000
+
+Serializes representative payloads the way FastAPI does for a
+``response_model`` endpoint (validate, dump to Python, render with the
+stdlib encoder), then through the app's FastJSONResponse and, for ORM
+listings, the trusted-row path. Reports CPU time per response, the peak of
+memory allocated while serializing (tracemalloc) and the body size.
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List
+
+from .utils import configure_env
+
+configure_env()
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.core import serialization  # noqa: E402
+from app.core.serialization import FastJSONResponse, page_response, serialize_rows, serializer_for  # noqa: E402
+from app.models.item import Item as ItemRow  # noqa: E402
+from app.models.user import User as UserRow  # noqa: E402
+from app.schemas.item import Item, ItemWithOwner  # noqa: E402
+from app.schemas.pagination import Page  # noqa: E402
+from app.schemas.user import User  # noqa: E402
+from app.schemas.website import WebsiteResponse  # noqa: E402
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def website_payload(rng: random.Random) -> dict:
+    """A generated template of typical size: ~40 KB html, ~20 KB css."""
+    words = "modern bakery sourdough seasonal menu order contact gallery team hours".split()
+    html = "".join(f"<section class=\"s{i}\"><h2>{rng.choice(words)}</h2><p>{' '.join(rng.choices(words, k=60))}</p>"
+                   f"</section>" for i in range(90))
+    css = "".join(f".s{i}{{padding:{i % 5}rem;color:#{rng.randrange(0xffffff):06x};display:grid;gap:1rem}}"
+                  for i in range(350))
+    return {"html": html, "css": css, "js": None, "partial": False, "preview": "/api/v1/website/preview/" + "a" * 64}
+
+
+def user_rows(n: int) -> list:
+    return [UserRow(id=i, email=f"user{i}@example.com", hashed_password="x", is_active=True, is_superuser=False,
+                    created_at=EPOCH + timedelta(seconds=i), updated_at=None) for i in range(n)]
+
+
+def item_rows(n: int, owners: list) -> list:
+    return [ItemRow(id=i, title=f"Item {i}", description="A description of the item " * 3,
+                    owner_id=owners[i % len(owners)].id, owner=owners[i % len(owners)],
+                    created_at=EPOCH + timedelta(seconds=i), updated_at=None) for i in range(n)]
+
+
+@lru_cache(maxsize=None)
+def response_field(response_model):
+    # FastAPI builds this once per route
+    return create_response_field(name="response", type_=response_model)
+
+
+def fastapi_default(response_model, content, response_class=JSONResponse) -> bytes:
+    """What a response_model endpoint returning ``content`` costs."""
+    coroutine = serialize_response(field=response_field(response_model), response_content=content)
+    # Nothing in it suspends for a coroutine endpoint; run it without an event loop
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        encoded = done.value
+    return response_class(encoded).body
+
+
+def measure(fn, runs: int):
+    body = fn()
+    timings = []
+    for _ in range(runs):
+        started = time.process_time()
+        fn()
+        timings.append(time.process_time() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak, len(body)
+
+
+def report(name: str, cases: list, runs: int):
+    print(name)
+    baseline = None
+    for label, fn in cases:
+        cpu, peak, size = measure(fn, runs)
+        baseline = baseline or cpu
+        print(f"  {label:<36} {cpu * 1000:8.2f}ms cpu ({baseline / cpu:5.1f}x)"
+              f"   {peak / 2**20:6.2f} MB peak alloc   {size / 1024:7.1f} KB body")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    if serialization.orjson is None:
+        print("orjson is not installed: FastJSONResponse falls back to the stdlib encoder")
+
+    website = website_payload(random.Random(1))
+    report("WebsiteResponse (one generated template)", [
+        ("FastAPI default (stdlib json)", lambda: fastapi_default(WebsiteResponse, website)),
+        ("FastAPI default + FastJSONResponse", lambda: fastapi_default(WebsiteResponse, website, FastJSONResponse)),
+        ("FastJSONResponse returned directly", lambda: FastJSONResponse(website).body),
+    ], args.runs)
+
+    users = user_rows(args.rows)
+    report(f"Page[User] ({args.rows} ORM rows)", [
+        ("FastAPI default (stdlib json)", lambda: fastapi_default(Page[User], {"items": users, "next_cursor": "c"})),
+        ("FastAPI default + FastJSONResponse",
+         lambda: fastapi_default(Page[User], {"items": users, "next_cursor": "c"}, FastJSONResponse)),
+        ("trusted rows (page_response)", lambda: page_response(User, users, "c").body),
+    ], args.runs)
+
+    items = item_rows(args.rows, users[:50])
+    report(f"Page[Item] ({args.rows} ORM rows)", [
+        ("FastAPI default (stdlib json)", lambda: fastapi_default(Page[Item], {"items": items, "next_cursor": "c"})),
+        ("FastAPI default + FastJSONResponse",
+         lambda: fastapi_default(Page[Item], {"items": items, "next_cursor": "c"}, FastJSONResponse)),
+        ("trusted rows (page_response)", lambda: page_response(Item, items, "c").body),
+    ], args.runs)
+
+    export = serializer_for(ItemWithOwner)
+    report(f"List[ItemWithOwner] export batch ({args.rows} rows)", [
+        ("model_validate + model_dump_json",
+         lambda: "".join(ItemWithOwner.model_validate(item).model_dump_json() + "\n" for item in items).encode()),
+        ("trusted rows, one line each",
+         lambda: b"".join(serialization.dumps(export.dump(item)) + b"\n" for item in items)),
+    ], args.runs)
+
+    # Same content either way; only the route taken differs
+    default = fastapi_default(List[User], users, FastJSONResponse)
+    assert default == FastJSONResponse(serialize_rows(User, users)).body, "trusted output differs from the default"
+
+
+if __name__ == "__main__":
+    main()
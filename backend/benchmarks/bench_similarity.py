@@ -0,0 +1,118 @@
+"""Similarity index at scale: insert rate, top-k query latency, save and load.
+
+    python -m benchmarks.bench_similarity --entries 100000
+
+Fills the index with synthetic requests drawn from a small vocabulary (so
+neighbours are plentiful), then times queries for paraphrases of stored
+requests and checks the original comes back first.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.schemas.website import WebsiteRequest
+from app.services.similarity_index import SimilarityIndex
+
+BUSINESSES = ["bakery", "law firm", "yoga studio", "restaurant", "photographer", "dentist", "garage", "tutor",
+              "florist", "architect", "gym", "hotel", "brewery", "salon", "plumber", "bookshop"]
+WORDS = ("family owned local modern classic organic artisan premium friendly affordable downtown online "
+         "booking gallery menu reviews team pricing services contact location hours events delivery catering "
+         "weddings portraits classes coaching repairs consultations bread coffee wine pizza flowers books "
+         "craft beer rooms suites spa hair nails pipes heating kitchen").split()
+
+
+def synthetic_request(rng: random.Random) -> WebsiteRequest:
+    business = rng.choice(BUSINESSES)
+    words = rng.sample(WORDS, rng.randint(8, 16))
+    return WebsiteRequest(description=f"{business} " + " ".join(words), business_type=business)
+
+
+def paraphrase(request: WebsiteRequest, rng: random.Random) -> WebsiteRequest:
+    """Drop one word and swap two, as a reworded repeat would."""
+    words = request.description.split()
+    words.pop(rng.randrange(1, len(words)))
+    i, j = rng.sample(range(1, len(words)), 2)
+    words[i], words[j] = words[j], words[i]
+    return WebsiteRequest(description=" ".join(words), business_type=request.business_type)
+
+
+def timed(fn, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requests = [synthetic_request(rng) for _ in range(args.entries)]
+    index = SimilarityIndex(dim=args.dim, max_entries=args.entries)
+
+    started = time.perf_counter()
+    for i, request in enumerate(requests):
+        index.add(f"{i:064x}", request, "model")
+    elapsed = time.perf_counter() - started
+    print(f"insert:   {elapsed / args.entries * 1e6:7.1f}us per entry  ({args.entries} entries, dim {args.dim})")
+
+    # The first query builds the weighted matrix; later ones reuse it
+    started = time.perf_counter()
+    index.search(requests[0], 1)
+    print(f"reweight: {(time.perf_counter() - started) * 1000:7.1f}ms  (once per {int(args.entries * 0.1)} inserts)")
+
+    targets = [rng.randrange(args.entries) for _ in range(args.queries)]
+    queries = [paraphrase(requests[t], rng) for t in targets]
+    for k, model in ((1, None), (5, None), (5, "model")):
+        it = iter(queries)
+        timings = timed(lambda: index.search(next(it), k, model=model), args.queries)
+        label = f"top-{k}" + (" + variant filter" if model else "")
+        print(f"{label:<24} p50 {statistics.median(timings) * 1000:6.2f}ms  "
+              f"p99 {sorted(timings)[int(len(timings) * 0.99)] * 1000:6.2f}ms")
+
+    # The scoring step alone: the index's dim x entries layout against
+    # entries x dim, and argpartition against a full sort
+    transposed = index._matrix()[:, :len(index)]
+    rows = np.ascontiguousarray(transposed.T)
+    query = rows[0].copy()
+    cases = (
+        ("dim x entries, argpartition", lambda: np.argpartition(query @ transposed, -5)[-5:]),
+        ("entries x dim, argpartition", lambda: np.argpartition(rows @ query, -5)[-5:]),
+        ("dim x entries, argsort", lambda: np.argsort(query @ transposed)[-5:]),
+    )
+    for name, fn in cases:
+        print(f"  {name:<28} p50 {statistics.median(timed(fn, 50)) * 1000:6.2f}ms")
+
+    found = sum(
+        1 for target, query in zip(targets, queries)
+        if (results := index.search(query, 1)) and results[0].key == f"{target:064x}"
+    )
+    scores = [index.search(query, 1)[0].score for query in queries[:100]]
+    print(f"recall@1 for paraphrases: {found / len(queries):.1%}  (median similarity {statistics.median(scores):.3f})")
+
+    path = os.path.join(tempfile.mkdtemp(), "index.npz")
+    started = time.perf_counter()
+    SimilarityIndex.write(path, index.snapshot())
+    saved = time.perf_counter() - started
+    started = time.perf_counter()
+    SimilarityIndex.load(path, max_entries=args.entries)
+    loaded = time.perf_counter() - started
+    print(f"save {saved * 1000:.0f}ms, load {loaded * 1000:.0f}ms, {os.path.getsize(path) / 2**20:.1f} MB on disk; "
+          f"{index.stats()['matrix_bytes'] / 2**20:.1f} MB in memory")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Cold-start cost: importing the app, booting a server, and the first generation.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --server gunicorn --top 15
+
+Each run is a fresh interpreter, as on a deploy or a worker restart.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .load_generate_template import PAYLOAD
+from .stub_llm import create_stub_app
+from .utils import AppProcess, BackgroundServer, configure_env
+
+
+def import_time() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True)
+    return time.perf_counter() - started
+
+
+def slowest_imports(top: int):
+    """Modules with the largest cumulative import time, from ``python -X importtime``."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def boot(server: str):
+    """Seconds until the first 200 from GET /, then until the first generation completes."""
+    started = time.perf_counter()
+    with AppProcess(server) as app:
+        ready = time.perf_counter() - started
+        with httpx.Client(base_url=app.url, timeout=30) as client:
+            generation_started = time.perf_counter()
+            client.post("/api/v1/website/generate-template", json=PAYLOAD).raise_for_status()
+            first_generation = time.perf_counter() - generation_started
+    return ready, first_generation
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    configure_env()
+    # Quiet, and in-memory caches so runs do not warm each other through disk
+    os.environ["LOG_LEVEL"] = "WARNING"
+    os.environ["TEMPLATE_CACHE_BACKEND"] = "memory"
+    os.environ["ARTIFACT_STORE_BACKEND"] = "memory"
+
+    imports = [import_time() for _ in range(args.runs)]
+    print(f"import app.main:       median {statistics.median(imports) * 1000:6.0f}ms  (min {min(imports) * 1000:.0f}ms)")
+    for micros, module in slowest_imports(args.top):
+        print(f"    {micros / 1000:7.1f}ms  {module}")
+
+    # The stub answers instantly, so the first generation measures the work
+    # deferred to first use (SDK import, client and pool setup)
+    with BackgroundServer(create_stub_app(0.0)) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        boots = [boot(args.server) for _ in range(args.runs)]
+    ready = [r for r, _ in boots]
+    first = [f for _, f in boots]
+    print(f"{args.server} ready:         median {statistics.median(ready) * 1000:6.0f}ms  (min {min(ready) * 1000:.0f}ms)")
+    print(f"first generation:      median {statistics.median(first) * 1000:6.0f}ms  (min {min(first) * 1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Time-to-first-byte of the SSE endpoint vs the blocking generate-template endpoint.
+
+    python -m benchmarks.bench_streaming --latency 0.5 --token-delay 0.01
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from .load_generate_template import PAYLOAD
+from .stub_llm import create_stub_app
+from .utils import BackgroundServer, configure_env
+
+
+async def run(base_url: str):
+    # A real server is needed here: httpx's ASGI transport buffers whole responses
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        started = time.perf_counter()
+        response = await client.post("/api/v1/website/generate-template", json=PAYLOAD)
+        response.raise_for_status()
+        blocking = time.perf_counter() - started
+
+        started = time.perf_counter()
+        first_byte = first_html = None
+        async with client.stream("POST", "/api/v1/website/generate-template/stream", json=PAYLOAD) as stream:
+            async for line in stream.aiter_lines():
+                now = time.perf_counter() - started
+                first_byte = first_byte or now
+                if line == "event: html_chunk" and first_html is None:
+                    first_html = now
+        total = time.perf_counter() - started
+
+    print(f"blocking:  full response after {blocking:.2f}s")
+    print(f"streaming: first byte {first_byte:.3f}s, first html_chunk {first_html:.2f}s, done {total:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    configure_env()
+    with BackgroundServer(create_stub_app(args.latency, token_delay=args.token_delay)) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        from app.main import app
+
+        with BackgroundServer(app) as api:
+            asyncio.run(run(api.url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Seed data shared by the benchmark suite.
+
+Rows are written with Core bulk inserts on the sync engine, which loads a
+few hundred thousand rows into SQLite in seconds. Call ``configure_env``
+first so the engine points at a throwaway database.
+"""
+from datetime import datetime, timedelta, timezone
+
+LOGIN_EMAIL = "bench@example.com"
+LOGIN_PASSWORD = "correct horse battery staple"
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def reset_database():
+    from app.db.base import Base, engine
+    import app.models  # noqa: F401  registers the tables on Base
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def seed_users(n_users: int, chunk: int = 50000):
+    """Insert ``n_users`` users plus one login superuser with a real password hash.
+
+    Bulk users get a placeholder hash: hashing each one would take minutes at
+    production bcrypt cost and nothing logs in as them.
+    """
+    from app.core.security import get_password_hash
+    from app.db.base import engine
+    from app.models import User
+
+    with engine.begin() as conn:
+        for offset in range(0, n_users, chunk):
+            conn.execute(User.__table__.insert(), [
+                {
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "x",
+                    # Several rows share a timestamp so keyset pagination's id tiebreak is exercised
+                    "created_at": _EPOCH + timedelta(seconds=i // 4),
+                }
+                for i in range(offset + 1, min(offset + chunk, n_users) + 1)
+            ])
+        conn.execute(User.__table__.insert(), [
+            {"email": LOGIN_EMAIL, "hashed_password": get_password_hash(LOGIN_PASSWORD), "is_superuser": True}
+        ])
+
+
+def seed_items(n_items: int, n_users: int, chunk: int = 50000):
+    """Insert ``n_items`` items spread round-robin over the first ``n_users`` users."""
+    from app.db.base import engine
+    from app.models import Item
+
+    with engine.begin() as conn:
+        for offset in range(0, n_items, chunk):
+            conn.execute(Item.__table__.insert(), [
+                {
+                    "title": f"item {i}",
+                    "description": "x" * 64,
+                    "owner_id": i % n_users + 1,
+                    "created_at": _EPOCH + timedelta(seconds=i // 4),
+                }
+                for i in range(offset, min(offset + chunk, n_items))
+            ])
+
+
+def seed_database(n_users: int, n_items: int):
+    reset_database()
+    seed_users(n_users)
+    seed_items(n_items, n_users)
@@ -0,0 +1,63 @@
+"""Concurrent load test for /api/v1/website/generate-template against the stub LLM.
+
+    python -m benchmarks.load_generate_template --concurrency 20 --latency 1
+
+With a non-blocking generation path, N concurrent requests should finish in
+roughly the time of one (as long as N <= LLM_MAX_CONCURRENCY).
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from .stub_llm import create_stub_app
+from .utils import BackgroundServer, configure_env
+
+PAYLOAD = {
+    "description": "A neighbourhood bakery with online ordering",
+    "business_type": "bakery",
+    "features": ["menu", "contact"],
+}
+
+
+async def fire(client: httpx.AsyncClient, n: int) -> float:
+    started = time.perf_counter()
+    responses = await asyncio.gather(
+        *(client.post("/api/v1/website/generate-template", json=PAYLOAD) for _ in range(n))
+    )
+    elapsed = time.perf_counter() - started
+    failed = [r.status_code for r in responses if r.status_code != 200]
+    if failed:
+        raise SystemExit(f"{len(failed)} requests failed: {failed[:5]}")
+    return elapsed
+
+
+async def run(concurrency: int):
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            single = await fire(client, 1)
+            burst = await fire(client, concurrency)
+    print(f"1 request:          {single:.2f}s")
+    print(f"{concurrency} concurrent requests: {burst:.2f}s ({burst / single:.2f}x single)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    configure_env()
+    with BackgroundServer(create_stub_app(args.latency)) as stub:
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.concurrency))
+        asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Local stand-in for the Anthropic Messages API used by the benchmarks.
+
+Run it with ``python -m benchmarks.stub_llm --latency 2`` and point the
+backend at it with ``ANTHROPIC_BASE_URL=http://127.0.0.1:8765``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_COMPLETION = """HTML:
+```html
+<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Stub</title></head>
+<body><header class="hero"><h1>Stub Business</h1></header></body>
+</html>
+```
+
+CSS:
+```css
+body { margin: 0; font-family: sans-serif; }
+.hero { display: flex; padding: 4rem; }
+```
+"""
+
+
+ERROR_TYPES = {429: "rate_limit_error", 500: "api_error", 529: "overloaded_error", 404: "not_found_error"}
+
+
+class FaultInjector:
+    """Decide per request whether the stub fails or answers slowly.
+
+    ``error_rate`` of requests get ``error_status``; ``slow_rate`` of the
+    rest take ``slow_latency`` extra seconds; every request for a model in
+    ``failing_models`` fails.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.0,
+        error_status: int = 529,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0,
+        failing_models=(),
+        seed: int = None,
+    ):
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.failing_models = set(failing_models)
+        self.random = random.Random(seed)
+        self.errors = 0
+        self.calls_by_model = {}
+
+    def draw(self, model: str):
+        """Return (error status or None, extra latency) for one request."""
+        self.calls_by_model[model] = self.calls_by_model.get(model, 0) + 1
+        if model in self.failing_models:
+            return self.error_status, 0.0
+        roll = self.random.random()
+        if roll < self.error_rate:
+            return self.error_status, 0.0
+        if roll < self.error_rate + self.slow_rate:
+            return None, self.slow_latency
+        return None, 0.0
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _tokens(text: str, size: int = 4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _prompt_blocks(body: dict) -> list:
+    """The request's system and message content blocks, in prompt order."""
+    system = body.get("system") or []
+    blocks = [{"type": "text", "text": system}] if isinstance(system, str) else list(system)
+    for message in body.get("messages", []):
+        content = message.get("content")
+        blocks += [{"type": "text", "text": content}] if isinstance(content, str) else content
+    return blocks
+
+
+def _block_tokens(block: dict) -> int:
+    if block.get("type") == "image":
+        return 1500
+    return max(1, len(block.get("text", "")) // 4)
+
+
+class PromptCache:
+    """Emulate Anthropic prompt caching for the stub.
+
+    Prefixes ending at a block with ``cache_control`` are cached once they are
+    at least ``min_tokens`` long; a later request with the same prefix reports
+    it as cache_read_input_tokens instead of input_tokens. Entries never expire.
+    ``totals`` sums the usage reported across all requests.
+    """
+
+    def __init__(self, min_tokens: int = 1024):
+        self.min_tokens = min_tokens
+        self.prefixes = set()
+        self.totals = {"input_tokens": 0, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+
+    def usage(self, body: dict) -> dict:
+        blocks = _prompt_blocks(body)
+        total = sum(_block_tokens(block) for block in blocks)
+        read = written = 0
+        prefix_tokens = 0
+        for index, block in enumerate(blocks):
+            prefix_tokens += _block_tokens(block)
+            if "cache_control" not in block or prefix_tokens < self.min_tokens:
+                continue
+            key = json.dumps(blocks[:index + 1], sort_keys=True)
+            if key in self.prefixes:
+                read = prefix_tokens
+                written = 0
+            else:
+                self.prefixes.add(key)
+                written = prefix_tokens - read
+        usage = {
+            "input_tokens": total - read - written,
+            "cache_creation_input_tokens": written,
+            "cache_read_input_tokens": read,
+        }
+        for key, value in usage.items():
+            self.totals[key] += value
+        return usage
+
+
+def create_stub_app(
+    latency: float = 1.0,
+    completion: str = SAMPLE_COMPLETION,
+    token_delay: float = 0.0,
+    faults: "FaultInjector" = None,
+    prompt_cache: "PromptCache" = None,
+    prefill_delay: float = 0.0,
+) -> FastAPI:
+    """Build the stub app.
+
+    ``latency`` is the time before the first token; ``token_delay`` is the
+    pause between streamed ~4 character tokens (and is added per token to
+    non-streaming responses so both modes take the same total time).
+    ``completion`` may also be a callable taking the request body, to vary
+    the reply per prompt. ``faults`` injects errors and slow responses.
+    Input tokens are estimated from the prompt; ``prefill_delay`` adds that
+    many seconds per 1000 input tokens not read from ``prompt_cache``.
+    """
+    app = FastAPI()
+    app.state.latency = latency
+    app.state.completion = completion
+    app.state.token_delay = token_delay
+    app.state.calls = 0
+    app.state.faults = faults or FaultInjector()
+    app.state.prompt_cache = prompt_cache or PromptCache()
+    app.state.prefill_delay = prefill_delay
+
+    def message(body: dict, text: str, usage: dict = None) -> dict:
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {**(usage or {"input_tokens": 0}), "output_tokens": len(_tokens(text))},
+        }
+
+    async def stream(body: dict, text: str, usage: dict):
+        start = message(body, "", usage)
+        start["content"] = []
+        start["usage"]["output_tokens"] = 0
+        yield _sse("message_start", {"type": "message_start", "message": start})
+        yield _sse("content_block_start", {
+            "type": "content_block_start", "index": 0,
+            "content_block": {"type": "text", "text": ""},
+        })
+        for token in _tokens(text):
+            await asyncio.sleep(app.state.token_delay)
+            yield _sse("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": token},
+            })
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _sse("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(_tokens(text))},
+        })
+        yield _sse("message_stop", {"type": "message_stop"})
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        status, extra_latency = app.state.faults.draw(body.get("model", ""))
+        usage = app.state.prompt_cache.usage(body)
+        uncached = usage["input_tokens"] + usage["cache_creation_input_tokens"]
+        await asyncio.sleep(app.state.latency + extra_latency + app.state.prefill_delay * uncached / 1000)
+        if status:
+            app.state.faults.errors += 1
+            return JSONResponse(
+                {"type": "error", "error": {"type": ERROR_TYPES.get(status, "api_error"), "message": "injected"}},
+                status_code=status,
+            )
+        text = app.state.completion
+        if callable(text):
+            text = text(body)
+        if body.get("stream"):
+            return StreamingResponse(stream(body, text, usage), media_type="text/event-stream")
+        await asyncio.sleep(app.state.token_delay * len(_tokens(text)))
+        return message(body, text, usage)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that are slow")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="extra seconds for slow requests")
+    parser.add_argument("--failing-model", action="append", default=[], help="model that always fails")
+    args = parser.parse_args()
+    faults = FaultInjector(
+        args.error_rate, args.error_status, args.slow_rate, args.slow_latency, args.failing_model
+    )
+    app = create_stub_app(args.latency, token_delay=args.token_delay, faults=faults)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
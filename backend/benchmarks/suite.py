@@ -0,0 +1,259 @@
+"""End-to-end load suite: every main endpoint against a seeded database and the stub LLM.
+
+    python -m benchmarks.suite                      # run and compare with benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline      # record a new baseline
+    python -m benchmarks.suite --scenarios login users.list --fail-on-regression
+
+Runs fully offline: a throwaway SQLite database is seeded with users and
+items, the stub LLM stands in for Anthropic, and the app is served by a
+separate uvicorn (or gunicorn) process. Each scenario sends a fixed number
+of requests from ``--concurrency`` closed-loop clients and reports
+throughput and p50/p95/p99 latency.
+
+Baselines are only comparable on the same machine and arguments; the
+baseline records both and the comparison warns when they differ.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+
+from .fixtures import LOGIN_EMAIL, LOGIN_PASSWORD, seed_database
+from .load_generate_template import PAYLOAD
+from .stub_llm import create_stub_app
+from .utils import AppProcess, BackgroundServer, configure_env, percentile
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+API = "/api/v1"
+
+# Arguments that change the numbers; a baseline taken with different ones is not comparable
+COMPARABLE_ARGS = ("users", "items", "concurrency", "latency", "tokens_per_second", "server", "workers")
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Builds one request: (method, path, keyword arguments for httpx)
+    request: Callable[[random.Random], tuple]
+    # Requests per run at the default --scale
+    requests: int
+
+
+def build_scenarios(args) -> list:
+    def generate_miss(rng):
+        # Unique, uncached descriptions so every request reaches the (stub) LLM
+        payload = {**PAYLOAD, "description": f"{PAYLOAD['description']} #{rng.getrandbits(64)}", "bypass_cache": True}
+        return "POST", f"{API}/website/generate-template", {"json": payload}
+
+    def generate_hit(rng):
+        return "POST", f"{API}/website/generate-template", {"json": PAYLOAD}
+
+    def login(rng):
+        form = {"username": LOGIN_EMAIL, "password": LOGIN_PASSWORD}
+        return "POST", f"{API}/auth/token", {"data": form}
+
+    def users_list(rng):
+        return "GET", f"{API}/users/", {"params": {"limit": 100}}
+
+    def user_get(rng):
+        return "GET", f"{API}/users/{rng.randint(1, args.users)}", {}
+
+    def items_by_owner(rng):
+        return "GET", f"{API}/items/", {"params": {"owner_id": rng.randint(1, args.users), "limit": 50}}
+
+    def item_get(rng):
+        return "GET", f"{API}/items/{rng.randint(1, args.items)}", {}
+
+    return [
+        Scenario("generate.miss", generate_miss, 200),
+        Scenario("generate.hit", generate_hit, 1000),
+        # bcrypt dominates; a few dozen logins already take seconds
+        Scenario("login", login, 40),
+        Scenario("users.list", users_list, 1000),
+        Scenario("users.get", user_get, 2000),
+        Scenario("items.by_owner", items_by_owner, 1000),
+        Scenario("items.get", item_get, 2000),
+    ]
+
+
+def login_headers(base_url: str) -> dict:
+    """Bearer token of the seeded login superuser, for the authenticated routes."""
+    form = {"username": LOGIN_EMAIL, "password": LOGIN_PASSWORD}
+    response = httpx.post(f"{base_url}{API}/auth/token", data=form, timeout=60)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run_scenario(
+    base_url: str, scenario: Scenario, requests: int, concurrency: int, seed: int, headers: dict
+) -> dict:
+    rng = random.Random(seed)
+    timings = []
+    errors = {}
+    remaining = requests
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers, timeout=60) as client:
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                method, path, kwargs = scenario.request(rng)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if isinstance(status, int) and status < 400:
+                    timings.append(time.perf_counter() - started)
+                else:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+
+        # One untimed request per scenario so lazy setup is not charged to it
+        method, path, kwargs = scenario.request(rng)
+        await client.request(method, path, **kwargs)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {"requests": requests, "errors": errors, "throughput": len(timings) / elapsed}
+    if timings:
+        result.update({f"p{pct}": percentile(timings, pct) for pct in (50, 95, 99)})
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print each scenario against the baseline and return the ones that regressed."""
+    regressions = []
+    previous = baseline.get("results", {})
+    for name, result in results.items():
+        before = previous.get(name)
+        if not before or "p95" not in result or "p95" not in before:
+            continue
+        throughput = result["throughput"] / before["throughput"] - 1
+        p95 = result["p95"] / before["p95"] - 1
+        regressed = throughput < -tolerance or p95 > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<16} throughput {throughput:+7.1%}   p95 {p95:+7.1%}{'   REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def report(results: dict):
+    print(f"\n  {'scenario':<16} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}  errors")
+    for name, result in results.items():
+        line = f"  {name:<16} {result['throughput']:8.1f}"
+        if "p50" in result:
+            line += "".join(f" {result[f'p{pct}'] * 1000:7.1f}ms" for pct in (50, 95, 99))
+        else:
+            line += f" {'-':>9}" * 3
+        print(f"{line}  {result['errors'] or ''}")
+
+
+def run_suite(args, scenarios: list, workdir: str) -> dict:
+    configure_env(f"sqlite:///{os.path.join(workdir, 'suite.sqlite3')}")
+    started = time.perf_counter()
+    seed_database(args.users, args.items)
+    print(f"seeded {args.users} users and {args.items} items in {time.perf_counter() - started:.1f}s")
+
+    server_env = {
+        "LOG_LEVEL": "WARNING",
+        # One load generator is one client: it must not be throttled or held
+        # to a single client's share of the LLM slots
+        "RATE_LIMIT_ENABLED": "false",
+        "LLM_CLIENT_MAX_CONCURRENCY": os.getenv("LLM_MAX_CONCURRENCY", "8"),
+        "TEMPLATE_CACHE_BACKEND": "memory",
+        "ARTIFACT_STORE_BACKEND": "memory",
+        # The scenarios do not poll jobs or fetch previews, so per-worker state is fine
+        "ALLOW_MULTIPLE_WORKERS": "true",
+    }
+    token_delay = 1 / args.tokens_per_second if args.tokens_per_second else 0.0
+    results = {}
+    with BackgroundServer(create_stub_app(args.latency, token_delay=token_delay)) as stub:
+        server_env["ANTHROPIC_BASE_URL"] = stub.url
+        with AppProcess(args.server, args.workers, env=server_env) as app:
+            headers = login_headers(app.url)
+            for i, scenario in enumerate(scenarios):
+                requests = max(1, int(scenario.requests * args.scale))
+                print(f"running {scenario.name} ({requests} requests)...", flush=True)
+                results[scenario.name] = asyncio.run(
+                    run_scenario(app.url, scenario, requests, args.concurrency, args.seed + i, headers)
+                )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="*", help="subset to run (default: all)")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on each scenario's request count")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="stub LLM output rate (0: instant)")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative change before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a scenario regressed")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args)
+    if args.scenarios:
+        unknown = set(args.scenarios) - {s.name for s in scenarios}
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in scenarios if s.name in args.scenarios]
+
+    workdir = tempfile.mkdtemp(prefix="alchemix-bench-")
+    try:
+        results = run_suite(args, scenarios, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report(results)
+    run = {
+        "args": {name: getattr(args, name) for name in COMPARABLE_ARGS},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nbaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        if baseline.get("args") != run["args"] or baseline.get("machine") != run["machine"]:
+            print("  warning: baseline was taken with other arguments or on another machine")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions and args.fail_on_regression:
+            exit_code = 1
+    else:
+        print(f"\nno baseline at {args.baseline}; record one with --save-baseline")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
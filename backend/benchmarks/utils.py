@@ -0,0 +1,99 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+
+def configure_env(database_url: str = "sqlite:///./benchmark.sqlite3"):
+    """Set the settings app.core.config requires, pointing at a throwaway database."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+    os.environ.setdefault("OPENAI_API_KEY", "unused")
+    os.environ["ANTHROPIC_API_KEY"] = "sk-ant-api-stub"
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a daemon thread for the duration of a benchmark."""
+
+    def __init__(self, app, port: int = None):
+        self.port = port or free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+class AppProcess:
+    """Serve ``app.main:app`` from a separate process, as in production.
+
+    Keeps the load generator off the server's interpreter (and its GIL).
+    ``env`` is layered over the current environment; entering blocks until
+    ``GET /`` answers 200.
+    """
+
+    def __init__(self, server: str = "uvicorn", workers: int = 1, env: dict = None, port: int = None):
+        self.port = port or free_port()
+        self.env = {**os.environ, **(env or {})}
+        if server == "gunicorn":
+            self.command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+                            "--bind", f"127.0.0.1:{self.port}", "app.main:app"]
+        else:
+            self.command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port),
+                            "--workers", str(workers), "--log-level", "warning"]
+        self.process = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            self.command, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        with httpx.Client(base_url=self.url, timeout=30) as client:
+            while True:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"{self.command[2]} exited with status {self.process.returncode}")
+                try:
+                    if client.get("/").status_code == 200:
+                        return self
+                except httpx.TransportError:
+                    time.sleep(0.01)
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
@@ -0,0 +1,53 @@
+# Production server settings: gunicorn supervises uvicorn workers.
+#
+#     gunicorn -c gunicorn.conf.py app.main:app
+#
+# Every value can be overridden from the environment so the same file
+# serves small Render/Railway instances and larger hosts.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# One worker by default: background jobs, the in-memory artifact store,
+# principal cache invalidation and /metrics all live in a worker's memory,
+# so with several workers a job polled on another worker is not found, a
+# preview published on one 404s on the others, a revoked user stays cached
+# elsewhere and each scrape sees one worker. The API is I/O bound, so one
+# event loop carries a lot; see on_starting for running more
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Set once those features are on shared backends (or their per-worker
+# behaviour is acceptable, e.g. for benchmarks) to allow workers > 1
+allow_multiple_workers = os.getenv("ALLOW_MULTIPLE_WORKERS", "false").lower() in ("1", "true", "yes")
+worker_class = os.getenv("WORKER_CLASS", "app.workers.ProductionUvicornWorker")
+
+# Import the app once in the master and fork it into the workers: cold start
+# pays for the imports once and workers share those pages copy-on-write.
+# Safe because nothing opens a socket or pool at import (see app.main.create_app)
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+
+# Generations can legitimately take a minute or more; a worker is only killed
+# when its event loop stops heartbeating for this long
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Longer than the load balancer's idle timeout so it never reuses a closed connection
+keepalive = int(os.getenv("KEEPALIVE", "75"))
+
+# Recycle workers now and then to bound slow leaks; the jitter keeps them
+# from all restarting at once
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Request and error logs go through the app's JSON handler (see app.workers);
+# this only covers gunicorn's own master process messages
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def on_starting(server):
+    # Checked here rather than above so --workers on the command line is covered too
+    if server.cfg.workers > 1 and not allow_multiple_workers:
+        raise RuntimeError(
+            f"Refusing to start {server.cfg.workers} workers: jobs, the memory artifact store, principal "
+            "cache invalidation and metrics are per worker. Set ALLOW_MULTIPLE_WORKERS=true once they are "
+            "on shared backends (e.g. ARTIFACT_STORE_BACKEND=disk on a shared volume)."
+        )
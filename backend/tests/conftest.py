@@ -0,0 +1,74 @@
+"""Settings for a throwaway SQLite database, and an app client per test.
+
+The environment is set before anything imports app.core.config, which
+reads it once at import.
+"""
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="alchemix-tests-")
+# Always overridden: the tables are dropped between tests
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.sqlite3')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+# Never a real key or endpoint: tests that generate start the stub_llm fixture
+os.environ["ANTHROPIC_API_KEY"] = "sk-ant-api-test"
+os.environ["ANTHROPIC_BASE_URL"] = "http://127.0.0.1:9"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@pytest.fixture
+def database():
+    from app.core.principal_cache import principal_cache
+    from app.db.base import Base, engine
+    import app.models  # noqa: F401  registers the tables on Base
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    principal_cache.clear()
+    yield engine
+
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def anyio_backend():
+    # The app runs on asyncio (aiosqlite, asyncpg)
+    return "asyncio"
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Start the benchmarks' stub Anthropic server; call with create_stub_app's arguments.
+
+    Returns the stub app (its state counts calls and prompt cache usage).
+    The app under test builds its LLM client on first use, so it picks up
+    the stub's URL as long as it is started inside the test.
+    """
+    from benchmarks.stub_llm import create_stub_app
+    from benchmarks.utils import BackgroundServer
+
+    servers = []
+
+    def start(**kwargs):
+        stub_app = create_stub_app(**kwargs)
+        server = BackgroundServer(stub_app).__enter__()
+        servers.append(server)
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+        return stub_app
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from app.services.artifacts import Artifact, DiskArtifactStore, digest_of
+
+from .test_layout_images import png_base64
+from .utils import API, app_client, running_app
+
+
+def artifact(text: str) -> Artifact:
+    body = text.encode()
+    return Artifact(digest_of(body), "html", body, {})
+
+
+def stored_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def test_disk_store_evicts_least_recently_used_beyond_its_budget(tmp_path):
+    store = DiskArtifactStore(str(tmp_path), max_bytes=250)
+    first, second, third = (artifact(letter * 100) for letter in "abc")
+    store.put(first)
+    store.put(second)
+    assert store.get(first.digest) is not None  # now the most recently used
+    store.put(third)
+
+    assert store.get(second.digest) is None
+    assert store.get(first.digest) is not None and store.get(third.digest) is not None
+    assert store.evictions == 1
+    assert store.size_bytes() == stored_bytes(str(tmp_path)) == 200
+
+    # A restarted worker picks up what is on disk, and the budget with it
+    reopened = DiskArtifactStore(str(tmp_path), max_bytes=150)
+    assert reopened.size_bytes() == stored_bytes(str(tmp_path)) == 100
+
+
+@pytest.mark.anyio
+async def test_previews_run_their_scripts_sandboxed_and_do_not_serve_layout_images(database):
+    async with running_app() as app, app_client(app) as client:
+        preview = await app.state.artifact_publisher.publish({"html": "<p>Hi</p>", "css": "", "js": "alert(1)"})
+        response = await client.get(preview)
+        assert response.status_code == 200
+        assert response.headers["content-security-policy"] == "sandbox allow-scripts"
+
+        image = await app.state.layout_images.resolve(png_base64())
+        assert (await client.get(f"{API}/website/preview/{image.digest}")).status_code == 404
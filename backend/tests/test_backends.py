@@ -0,0 +1,14 @@
+import pytest
+
+from app.core.rate_limit import RateLimitBackend
+from app.services.artifacts import ArtifactStore
+from app.services.template_cache import CacheBackend
+
+
+@pytest.mark.parametrize("interface", [RateLimitBackend, CacheBackend, ArtifactStore])
+def test_incomplete_backend_fails_when_instantiated(interface):
+    class Incomplete(interface):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
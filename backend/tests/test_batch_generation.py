@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from benchmarks.bench_batch import detailed_brief
+
+from .utils import API, app_client, running_app
+
+PAYLOAD = {"description": detailed_brief(), "business_type": "bakery", "bypass_cache": True}
+
+
+async def run_batch(client, payload: dict) -> list:
+    lines = []
+    async with client.stream("POST", f"{API}/website/generate-batch", json=payload) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        async for line in response.aiter_lines():
+            if line:
+                lines.append(json.loads(line))
+    return lines
+
+
+@pytest.mark.anyio
+async def test_variants_share_the_cached_prompt_prefix(database, stub_llm):
+    stub = stub_llm(latency=0.2, prefill_delay=0.3)
+    async with running_app() as app, app_client(app) as client:
+        results = await run_batch(client, {"requests": [PAYLOAD], "variants": 3})
+
+    assert sorted(result["variant"] for result in results) == [0, 1, 2]
+    assert all(result["status"] == "succeeded" and result["result"]["html"] for result in results)
+    assert stub.state.calls == 3
+    totals = stub.state.prompt_cache.totals
+    # The leader writes the shared prefix once and both followers read it
+    assert totals["cache_creation_input_tokens"] > 0
+    assert totals["cache_read_input_tokens"] >= 2 * totals["cache_creation_input_tokens"]
+
+
+@pytest.mark.anyio
+async def test_batch_of_requests_streams_one_line_each(database, stub_llm):
+    stub_llm(latency=0.1)
+    requests = [{**PAYLOAD, "description": f"A {business} in the old town"} for business in ("bakery", "gym", "florist")]
+    async with running_app() as app, app_client(app) as client:
+        results = await run_batch(client, {"requests": requests})
+
+    assert sorted(result["request_index"] for result in results) == [0, 1, 2]
+    assert all(result["status"] == "succeeded" and result["cache"] == "MISS" for result in results)
+
+
+@pytest.mark.anyio
+async def test_oversized_batch_is_rejected_before_any_upstream_call(database, stub_llm):
+    stub = stub_llm(latency=0.1)
+    async with running_app() as app, app_client(app) as client:
+        response = await client.post(f"{API}/website/generate-batch", json={"requests": [PAYLOAD], "variants": 99})
+
+    assert response.status_code == 400
+    assert stub.state.calls == 0
@@ -0,0 +1,115 @@
+"""Hedging and circuit breaking in CallPolicy.
+
+The caller holds one slot of the generation scheduler for the call; a hedge
+is a second request in flight, so it must count against the same cap or be
+skipped. A half-open circuit's probe must settle however it ends.
+"""
+import asyncio
+import time
+
+import anthropic
+import httpx
+import pytest
+
+from app.services.call_policy import CallPolicy
+from app.services.fair_scheduler import FairScheduler
+
+MODEL = "test-model"
+
+
+def hedging_policy(scheduler: FairScheduler) -> CallPolicy:
+    policy = CallPolicy([MODEL], attempt_timeout=5, max_attempts=1, hedge=True, hedge_min_samples=1,
+                        hedge_min_delay=0.01, hedge_slots=scheduler)
+    # One fast call on record so the next slow one is hedged after hedge_min_delay
+    policy._models[MODEL].latency.add(0.001)
+    return policy
+
+
+@pytest.mark.anyio
+async def test_hedge_holds_a_slot_while_it_runs():
+    scheduler = FairScheduler(capacity=2, client_of=lambda: "user:a")
+    policy = hedging_policy(scheduler)
+    in_flight = []
+    calls = 0
+
+    async def call(model: str) -> str:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.2)
+            return "first"
+        in_flight.append(scheduler.in_flight)
+        await asyncio.sleep(0.01)
+        return "hedge"
+
+    async with scheduler.slot():
+        assert await policy.call(call) == "hedge"
+    assert in_flight == [2]
+    stats = policy._models[MODEL]
+    assert (stats.hedges, stats.hedge_wins, stats.hedges_skipped) == (1, 1, 0)
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.anyio
+async def test_hedge_skipped_when_no_slot_is_free():
+    scheduler = FairScheduler(capacity=1, client_of=lambda: "user:a")
+    policy = hedging_policy(scheduler)
+    calls = 0
+
+    async def call(model: str) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "first"
+
+    async with scheduler.slot():
+        assert await policy.call(call) == "first"
+    assert calls == 1
+    stats = policy._models[MODEL]
+    assert (stats.hedges, stats.hedges_skipped) == (0, 1)
+    assert scheduler.in_flight == 0
+
+
+def half_open_policy() -> CallPolicy:
+    policy = CallPolicy([MODEL], attempt_timeout=5, max_attempts=1, hedge=False, breaker_reset_timeout=1)
+    breaker = policy._models[MODEL].breaker
+    breaker.state = "open"
+    breaker.opened_at = time.monotonic() - 2
+    return policy
+
+
+@pytest.mark.anyio
+async def test_probe_answered_with_a_client_error_closes_the_circuit():
+    policy = half_open_policy()
+    response = httpx.Response(400, request=httpx.Request("POST", "http://upstream/v1/messages"))
+
+    async def bad_request(model: str) -> str:
+        raise anthropic.BadRequestError("bad request", response=response, body=None)
+
+    with pytest.raises(anthropic.BadRequestError):
+        await policy.call(bad_request)
+    assert policy._models[MODEL].breaker.state == "closed"
+
+    async def ok(model: str) -> str:
+        return "ok"
+
+    assert await policy.call(ok) == "ok"
+
+
+@pytest.mark.anyio
+async def test_cancelled_probe_lets_the_next_call_probe():
+    policy = half_open_policy()
+    started = asyncio.Event()
+
+    async def hang(model: str) -> str:
+        started.set()
+        await asyncio.sleep(10)
+
+    probe = asyncio.ensure_future(policy.call(hang))
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    breaker = policy._models[MODEL].breaker
+    assert breaker.state == "half_open"
+    assert breaker.allow()
@@ -0,0 +1,130 @@
+"""Fairness of the LLM slot scheduler and the rate limiter under skewed load.
+
+One anonymous client dumps a burst of generations while a few signed-in
+users trickle in requests. Behind a FIFO semaphore the light users queue
+behind the whole burst; with FairScheduler they wait about one service time.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.rate_limit import RateLimitMiddleware, RateLimitRule
+from app.services.fair_scheduler import FairScheduler
+
+CAPACITY = 4
+SERVICE = 0.02  # seconds a generation holds its slot
+HEAVY = 100  # burst size of the flooding client
+LIGHT_USERS = 4
+LIGHT_EACH = 5
+INTERVAL = 0.05  # seconds between a light user's requests
+
+
+class SchedulerSlot:
+    def __init__(self, scheduler: FairScheduler, client: str):
+        self.scheduler = scheduler
+        self.client = client
+
+    async def __aenter__(self):
+        await self.scheduler.acquire(self.client)
+
+    async def __aexit__(self, *exc):
+        self.scheduler.release(self.client)
+
+
+async def simulate(make_slot) -> tuple:
+    """Run the skewed load; returns each client's waits for a slot and its peak slots held."""
+    waits = {}
+    held = {}
+    peak = {}
+
+    async def request(client: str):
+        started = time.perf_counter()
+        async with make_slot(client):
+            waits.setdefault(client, []).append(time.perf_counter() - started)
+            held[client] = held.get(client, 0) + 1
+            peak[client] = max(peak.get(client, 0), held[client])
+            await asyncio.sleep(SERVICE)
+            held[client] -= 1
+
+    async def trickle(client: str):
+        tasks = []
+        for _ in range(LIGHT_EACH):
+            tasks.append(asyncio.ensure_future(request(client)))
+            await asyncio.sleep(INTERVAL)
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(
+        *(request("ip:flooder") for _ in range(HEAVY)),
+        *(trickle(f"user:light{i}") for i in range(LIGHT_USERS)),
+    )
+    return waits, peak
+
+
+def light_waits(waits: dict) -> list:
+    return [wait for client, values in waits.items() if client != "ip:flooder" for wait in values]
+
+
+def fair_scheduler(per_client_limit: int) -> FairScheduler:
+    return FairScheduler(
+        CAPACITY,
+        client_of=lambda: "anonymous",
+        per_client_limit=per_client_limit,
+        weight_of=lambda client: 2 if client.startswith("user:") else 1,
+    )
+
+
+@pytest.mark.anyio
+async def test_fifo_semaphore_queues_light_users_behind_the_burst():
+    semaphore = asyncio.Semaphore(CAPACITY)
+    waits, _ = await simulate(lambda client: semaphore)
+    # The whole burst is ahead of them: HEAVY / CAPACITY service times
+    assert max(light_waits(waits)) > HEAVY / CAPACITY * SERVICE / 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("per_client_limit", [CAPACITY, 2])
+async def test_fair_scheduler_serves_light_users_promptly(per_client_limit):
+    scheduler = fair_scheduler(per_client_limit)
+    waits, peak = await simulate(lambda client: SchedulerSlot(scheduler, client))
+    assert len(waits["ip:flooder"]) == HEAVY
+    assert len(light_waits(waits)) == LIGHT_USERS * LIGHT_EACH
+    # At most a slot's worth of waiting, with slack for a loaded machine
+    assert max(light_waits(waits)) < 5 * SERVICE
+    # Without a per-client cap the flooder takes every idle slot; with one it is held to its quota
+    assert peak["ip:flooder"] == per_client_limit
+
+
+@pytest.mark.anyio
+async def test_rate_limiter_only_turns_away_the_flooder():
+    app = FastAPI()
+
+    @app.post("/api/v1/website/generate-template")
+    async def generate():
+        return {}
+
+    # 60/minute with a burst of 5
+    app.add_middleware(
+        RateLimitMiddleware, rules=[RateLimitRule("generate", 60, 5, ["/api/v1/website/generate-template"])], enabled=True
+    )
+
+    async def send(address: str, n: int, pause: float):
+        transport = httpx.ASGITransport(app=app, client=(address, 1234))
+        responses = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for _ in range(n):
+                responses.append(await client.post("/api/v1/website/generate-template"))
+                await asyncio.sleep(pause)
+        return responses
+
+    flood, polite = await asyncio.gather(send("10.0.0.1", 100, 0.01), send("10.0.0.2", 3, 0.3))
+
+    flood_statuses = [response.status_code for response in flood]
+    # The burst plus about one refill over the ~1s the flood lasts
+    assert 5 <= flood_statuses.count(200) <= 8
+    assert flood_statuses.count(429) == 100 - flood_statuses.count(200)
+    rejected = next(response for response in flood if response.status_code == 429)
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert [response.status_code for response in polite] == [200, 200, 200]
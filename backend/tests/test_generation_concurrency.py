@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+import pytest
+
+from .utils import API, app_client, running_app
+
+LATENCY = 0.5
+PAYLOAD = {"description": "A neighbourhood bakery with online ordering", "business_type": "bakery"}
+
+
+async def generate(app, n: int, address: str) -> float:
+    """Time ``n`` concurrent, distinct generations from ``address``."""
+    async with app_client(app, address) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post(f"{API}/website/generate-template",
+                        json={**PAYLOAD, "description": f"{PAYLOAD['description']} #{address} {i}"})
+            for i in range(n)
+        ))
+        elapsed = time.perf_counter() - started
+    assert [response.status_code for response in responses] == [200] * n
+    assert all("<h1>Stub Business</h1>" in response.json()["html"] for response in responses)
+    return elapsed
+
+
+@pytest.mark.anyio
+async def test_concurrent_generations_take_about_as_long_as_one(database, stub_llm):
+    stub = stub_llm(latency=LATENCY)
+    async with running_app() as app:
+        single = await generate(app, 1, "10.0.0.1")
+        # Four clients (a client may hold up to four of the eight slots)
+        timings = await asyncio.gather(*(generate(app, 2, f"10.0.1.{i}") for i in range(4)))
+
+    assert stub.state.calls == 9
+    # Serialized on a blocked event loop this would take 8x LATENCY
+    assert max(timings) < single + LATENCY
@@ -0,0 +1,58 @@
+import pytest
+
+from .utils import API, app_client, create_user, running_app
+
+PAYLOAD = {"description": "A family bakery in the old town", "business_type": "bakery", "bypass_cache": True}
+
+
+async def login(client, email: str) -> dict:
+    response = await client.post(f"{API}/auth/token", data={"username": email, "password": "secret"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.mark.anyio
+async def test_history_is_kept_per_signed_in_user_only(database, stub_llm):
+    stub_llm(latency=0.01)
+    create_user(database, "alice@example.com")
+    create_user(database, "bob@example.com")
+    async with running_app() as app, app_client(app) as client:
+        alice = await login(client, "alice@example.com")
+        bob = await login(client, "bob@example.com")
+        for headers in (alice, {}):
+            response = await client.post(f"{API}/website/generate-template", json=PAYLOAD, headers=headers)
+            assert response.status_code == 200, response.text
+        recorder = app.state.generation_recorder
+        await recorder.flush()
+        # The anonymous generation is keyed by address, so it is not recorded
+        assert recorder.written == 1
+
+        assert (await client.get(f"{API}/generations/")).status_code == 401
+        page = (await client.get(f"{API}/generations/", headers=alice)).json()
+        assert [generation["business_type"] for generation in page["items"]] == ["bakery"]
+        generation_id = page["items"][0]["id"]
+        assert (await client.get(f"{API}/generations/{generation_id}", headers=alice)).status_code == 200
+        assert (await client.get(f"{API}/generations/", headers=bob)).json()["items"] == []
+        assert (await client.get(f"{API}/generations/{generation_id}", headers=bob)).status_code == 404
+        artifact = await client.get(f"{API}/generations/{generation_id}/artifacts/html", headers=bob)
+        assert artifact.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_history_follows_the_user_not_their_email(database, stub_llm):
+    stub_llm(latency=0.01)
+    alice_id = create_user(database, "alice@example.com")
+    async with running_app() as app, app_client(app) as client:
+        alice = await login(client, "alice@example.com")
+        response = await client.post(f"{API}/website/generate-template", json=PAYLOAD, headers=alice)
+        assert response.status_code == 200, response.text
+        await app.state.generation_recorder.flush()
+
+        response = await client.put(f"{API}/users/{alice_id}", json={"email": "alice@new.example.com"}, headers=alice)
+        assert response.status_code == 200, response.text
+        create_user(database, "alice@example.com")
+
+        renamed = await login(client, "alice@new.example.com")
+        assert len((await client.get(f"{API}/generations/", headers=renamed)).json()["items"]) == 1
+        newcomer = await login(client, "alice@example.com")
+        assert (await client.get(f"{API}/generations/", headers=newcomer)).json()["items"] == []
@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from .utils import API, app_client, running_app
+
+PAYLOAD = {"description": "A family bakery in the old town", "business_type": "bakery", "bypass_cache": True}
+
+
+@pytest.mark.anyio
+async def test_job_is_only_visible_to_its_submitter(database, stub_llm):
+    stub_llm(latency=0.01)
+    async with running_app() as app, app_client(app, "10.0.0.1") as owner, app_client(app, "10.0.0.2") as other:
+        response = await owner.post(f"{API}/website/jobs", json=PAYLOAD)
+        assert response.status_code == 202, response.text
+        job_id = response.json()["job_id"]
+
+        assert (await other.get(f"{API}/website/jobs/{job_id}")).status_code == 404
+        for _ in range(100):
+            job = (await owner.get(f"{API}/website/jobs/{job_id}")).json()
+            if job["status"] not in ("queued", "running"):
+                break
+            await asyncio.sleep(0.05)
+        assert job["status"] == "succeeded"
+        assert job["result"]["html"]
+        # Still hidden once it holds a result
+        assert (await other.get(f"{API}/website/jobs/{job_id}")).status_code == 404
@@ -0,0 +1,27 @@
+from .utils import API, auth_headers, create_user
+
+
+def test_items_are_only_readable_by_their_owner_or_a_superuser(client, database):
+    alice = create_user(database, "alice@example.com")
+    bob = create_user(database, "bob@example.com")
+    create_user(database, "admin@example.com", is_superuser=True)
+    alice_headers = auth_headers(client, "alice@example.com")
+    bob_headers = auth_headers(client, "bob@example.com")
+    admin_headers = auth_headers(client, "admin@example.com")
+    item = client.post(f"{API}/items/", json={"title": "Alice's"}, headers=alice_headers).json()
+    client.post(f"{API}/items/", json={"title": "Bob's"}, headers=bob_headers)
+
+    assert client.get(f"{API}/items/").status_code == 401
+    assert client.get(f"{API}/items/{item['id']}").status_code == 401
+
+    own = client.get(f"{API}/items/", headers=alice_headers).json()["items"]
+    assert [row["owner_id"] for row in own] == [alice]
+    assert client.get(f"{API}/items/", params={"owner_id": alice}, headers=bob_headers).status_code == 403
+    assert client.get(f"{API}/items/{item['id']}", headers=bob_headers).status_code == 404
+    assert client.get(f"{API}/items/{item['id']}", headers=alice_headers).status_code == 200
+
+    everyone = client.get(f"{API}/items/", headers=admin_headers).json()["items"]
+    assert sorted(row["owner_id"] for row in everyone) == sorted([alice, bob])
+    filtered = client.get(f"{API}/items/", params={"owner_id": bob}, headers=admin_headers).json()["items"]
+    assert [row["owner_id"] for row in filtered] == [bob]
+    assert client.get(f"{API}/items/{item['id']}", headers=admin_headers).status_code == 200
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.services.job_queue import JobQueue, QueueFullError
+
+
+def sleeper(seconds: float, result: str = "done"):
+    async def run():
+        await asyncio.sleep(seconds)
+        return result
+
+    return run
+
+
+@pytest.mark.anyio
+async def test_stop_drains_queued_and_running_jobs():
+    queue = JobQueue(max_concurrency=1, drain_timeout=5)
+    await queue.start()
+    jobs = [queue.submit(sleeper(0.05)), queue.submit(sleeper(0.05))]
+    await queue.stop()
+
+    assert [(job.status, job.result) for job in jobs] == [("succeeded", "done")] * 2
+    with pytest.raises(QueueFullError):
+        queue.submit(sleeper(0))
+
+
+@pytest.mark.anyio
+async def test_jobs_unfinished_at_the_drain_timeout_are_failed():
+    queue = JobQueue(max_concurrency=1, drain_timeout=0.05)
+    await queue.start()
+    running, queued = queue.submit(sleeper(10)), queue.submit(sleeper(10))
+    await asyncio.sleep(0.01)
+    await queue.stop()
+
+    for job in (running, queued):
+        assert job.status == "failed"
+        assert "shutdown" in job.error
+        assert job.finished_at is not None
+    assert queue.stats()["interrupted"] == 2
+
+
+@pytest.mark.anyio
+async def test_finished_jobs_expire_without_new_submissions():
+    queue = JobQueue(max_concurrency=1, result_ttl=0.05)
+    await queue.start()
+    job = queue.submit(sleeper(0))
+    await asyncio.sleep(0.01)
+    assert queue.get(job.id).status == "succeeded"
+
+    await asyncio.sleep(0.2)
+    assert queue.get(job.id) is None
+    assert queue.stats()["succeeded"] == 0
+    await queue.stop()
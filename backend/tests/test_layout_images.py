@@ -0,0 +1,34 @@
+import base64
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from app.services.artifacts import MemoryArtifactStore
+from app.services.layout_images import LayoutImageStore
+
+
+def png_base64(size=(64, 48)) -> str:
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(out, "PNG")
+    return base64.b64encode(out.getvalue()).decode("ascii")
+
+
+@pytest.mark.anyio
+async def test_resolving_an_uploaded_id_decodes_off_the_event_loop():
+    images = LayoutImageStore(MemoryArtifactStore())
+    uploaded = await images.resolve(png_base64())
+
+    threads = []
+    read = images.store.get
+
+    def recording_get(digest):
+        threads.append(threading.current_thread())
+        return read(digest)
+
+    images.store.get = recording_get
+    image = await images.resolve(uploaded.digest)
+
+    assert (image.digest, image.width, image.height) == (uploaded.digest, 64, 48)
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,84 @@
+import time
+
+from app.core import security
+from app.core.principal_cache import PrincipalCache, principal_cache
+
+from .utils import API, auth_headers, create_user
+
+
+def test_repeat_requests_are_served_from_the_cache(client, database):
+    create_user(database, "alice@example.com")
+    headers = auth_headers(client, "alice@example.com")
+
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 200
+    hits = principal_cache.stats()["hits"]
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 200
+    assert principal_cache.stats()["hits"] == hits + 1
+
+
+def test_deactivated_user_is_not_served_from_the_cache(client, database):
+    alice = create_user(database, "alice@example.com")
+    create_user(database, "admin@example.com", is_superuser=True)
+    headers = auth_headers(client, "alice@example.com")
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 200
+
+    admin = auth_headers(client, "admin@example.com")
+    response = client.put(f"{API}/users/{alice}", json={"is_active": False}, headers=admin)
+    assert response.status_code == 200
+
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 401
+
+
+def test_updated_user_is_not_served_from_the_cache(client, database):
+    alice = create_user(database, "alice@example.com")
+    headers = auth_headers(client, "alice@example.com")
+    cached = client.get(f"{API}/users/me", headers=headers).json()
+    assert cached["updated_at"] is None
+
+    response = client.put(f"{API}/users/{alice}", json={"password": "new secret"}, headers=headers)
+    assert response.status_code == 200
+
+    current = client.get(f"{API}/users/me", headers=headers).json()
+    assert current["updated_at"] is not None
+    assert current["updated_at"] == response.json()["updated_at"]
+
+
+def test_cache_entries_expire_with_the_token():
+    principal_cache.set("token", 1, "principal", token_exp=0)
+    assert principal_cache.get("token") is None
+
+
+def test_lookup_racing_an_invalidation_is_not_cached():
+    cache = PrincipalCache(max_entries=10, ttl=300)
+    generation = cache.generation()
+    # The user is updated while their lookup is still awaiting the database
+    cache.invalidate_user(1)
+    cache.set("token", 1, "stale", time.time() + 60, generation)
+    assert cache.get("token") is None
+
+    # Other users' lookups are unaffected
+    cache.set("other", 2, "fresh", time.time() + 60, generation)
+    assert cache.get("other") == "fresh"
+
+
+def test_forgotten_invalidations_still_void_older_lookups():
+    cache = PrincipalCache(max_entries=2, ttl=300)
+    generation = cache.generation()
+    for user_id in (1, 2, 3):
+        cache.invalidate_user(user_id)
+    cache.set("token", 1, "stale", time.time() + 60, generation)
+    assert cache.get("token") is None
+
+
+def test_token_is_decoded_at_most_once_per_request(client, database, monkeypatch):
+    create_user(database, "alice@example.com")
+    headers = auth_headers(client, "alice@example.com")
+    decodes = []
+    decode = security.decode_access_token
+    monkeypatch.setattr(security, "decode_access_token", lambda token: decodes.append(token) or decode(token))
+
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 200
+    assert len(decodes) == 1
+    # Cached from here on: neither rate limiting nor auth decodes it again
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 200
+    assert len(decodes) == 1
@@ -0,0 +1,51 @@
+"""Per-generation charging of generate-batch with rate limiting enabled."""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.rate_limit import RateLimitMiddleware, charge_rate_limit, default_rules
+from app.services.batch_generation import BATCH_MAX_ITEMS
+
+from .utils import API
+
+
+def batch_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post(f"{API}/website/generate-batch")
+    async def generate_batch(items: int):
+        await charge_rate_limit(items)
+        return {"items": items}
+
+    @app.post(f"{API}/website/generate-template")
+    async def generate_template():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, rules=default_rules(), enabled=True)
+    return app
+
+
+async def post(client: httpx.AsyncClient, path: str, **params) -> httpx.Response:
+    return await client.post(f"{API}/website/{path}", params=params)
+
+
+@pytest.mark.anyio
+async def test_largest_batch_fits_and_leaves_single_generations_alone():
+    transport = httpx.ASGITransport(app=batch_app(), client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await post(client, "generate-batch", items=BATCH_MAX_ITEMS)).status_code == 200
+        # Batches draw on their own bucket
+        assert (await post(client, "generate-template")).status_code == 200
+
+        response = await post(client, "generate-batch", items=BATCH_MAX_ITEMS)
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) > 0
+
+
+@pytest.mark.anyio
+async def test_batch_larger_than_the_bucket_is_rejected_as_too_large():
+    transport = httpx.ASGITransport(app=batch_app(), client=("10.0.0.1", 1234))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await post(client, "generate-batch", items=10_000)
+    assert response.status_code == 413
+    assert "retry-after" not in response.headers
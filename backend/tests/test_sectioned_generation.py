@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from app.schemas.website import WebsiteRequest
+from app.services.sectioned_generation import plan_sections
+from benchmarks.bench_sections import completion
+
+from .utils import API, app_client, running_app
+
+PAYLOAD = {
+    "description": "A neighbourhood bakery with online ordering",
+    "business_type": "bakery",
+    "features": ["menu", "gallery", "team", "faq"],
+    "bypass_cache": True,
+}
+
+
+async def generate(client, parallel: bool) -> tuple:
+    started = time.perf_counter()
+    response = await client.post(f"{API}/website/generate-template", json={**PAYLOAD, "parallel_sections": parallel})
+    assert response.status_code == 200, response.text
+    return response.json(), time.perf_counter() - started
+
+
+@pytest.mark.anyio
+async def test_sections_are_generated_concurrently_and_stitched(database, stub_llm):
+    sections = [section_id for _, section_id in plan_sections(WebsiteRequest(**PAYLOAD))]
+    # Slow decoding, so the time goes to output tokens as with a real model
+    stub = stub_llm(latency=0.1, completion=completion(sections), token_delay=0.002)
+    async with running_app() as app, app_client(app) as client:
+        single, single_time = await generate(client, parallel=False)
+        calls = stub.state.calls
+        sectioned, sectioned_time = await generate(client, parallel=True)
+
+    # A shell call plus one per section, run side by side
+    assert stub.state.calls - calls == len(sections) + 1
+    assert not sectioned["partial"]
+    for section_id in sections:
+        assert f'id="{section_id}"' in sectioned["html"]
+        assert f".{section_id}" in sectioned["css"]
+    # Shared rules repeated by every section reply are kept once
+    assert sectioned["css"].count(":root") == 1
+    # Shell then the slowest section, instead of the whole page in one call
+    assert sectioned_time < single_time * 0.8
+
+
+@pytest.mark.anyio
+async def test_failed_shell_cancels_the_outstanding_sections():
+    from app.services.sectioned_generation import generate_sectioned
+
+    class FailingShell:
+        def __init__(self):
+            self.sections_started = 0
+            self.sections_cancelled = 0
+
+        async def generate_template(self, prompt: str, **kwargs) -> str:
+            if "page shell" in prompt:
+                await asyncio.sleep(0.05)
+                raise RuntimeError("upstream failed")
+            self.sections_started += 1
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.sections_cancelled += 1
+                raise
+            return ""
+
+    service = FailingShell()
+    started = time.perf_counter()
+    assert await generate_sectioned(WebsiteRequest(**PAYLOAD), service) is None
+    assert time.perf_counter() - started < 1
+    assert service.sections_started > 0
+    assert service.sections_cancelled == service.sections_started
@@ -0,0 +1,23 @@
+import sqlite3
+
+from app.services.template_cache import SQLiteCache
+
+
+def table_size(path: str) -> int:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM template_cache").fetchone()[0]
+
+
+def test_sqlite_cache_size_is_tracked_without_querying(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, max_bytes=250, ttl=60)
+    for i in range(4):
+        cache.set(f"key{i}", {"html": "x" * 80})
+    assert cache.evictions > 0
+    assert cache.size_bytes() == table_size(path) <= 250
+    cache.close()
+
+    # A new worker starts from what is already stored
+    reopened = SQLiteCache(path, max_bytes=250, ttl=60)
+    assert reopened.size_bytes() == table_size(path)
+    reopened.close()
@@ -0,0 +1,39 @@
+from contextlib import asynccontextmanager
+
+import httpx
+
+from app.core.security import get_password_hash
+
+API = "/api/v1"
+
+
+def create_user(engine, email: str, password: str = "secret", is_superuser: bool = False) -> int:
+    """Insert a user directly, e.g. a superuser the API cannot create; returns its id."""
+    from app.models import User
+
+    with engine.begin() as conn:
+        result = conn.execute(User.__table__.insert().values(
+            email=email, hashed_password=get_password_hash(password), is_active=True, is_superuser=is_superuser
+        ))
+        return result.inserted_primary_key[0]
+
+
+def auth_headers(client, email: str, password: str = "secret") -> dict:
+    response = client.post(f"{API}/auth/token", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@asynccontextmanager
+async def running_app():
+    """The app with its lifespan (LLM client, caches, job queue) started."""
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        yield app
+
+
+def app_client(app, address: str = "127.0.0.1") -> httpx.AsyncClient:
+    """A client calling ``app`` in process from ``address``, which is also its rate limit key."""
+    transport = httpx.ASGITransport(app=app, client=(address, 1234))
+    return httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60)